@@ -0,0 +1,166 @@
+"""
+Headless Batch Generation
+Command-line entry point for servers with no display (e.g. nightly
+regeneration): loads config_data.py, generates the chosen semesters in a
+process pool, saves complete timetables to latest_schedules.json (the file
+the Teacher Timetables tab reads), writes one HTML file per semester and
+prints a JSON summary on stdout. All other output goes to stderr.
+With --joint the semesters' times are reported per interacting group.
+
+    python batch_generate.py --sems 3 5 7 --workers 3 --out timetables
+
+Exit status: 0 when every semester is complete, 1 otherwise.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tracing import Tracer, null_tracer, INFO, DEBUG
+
+DEFAULT_SEMS = ["3", "5", "7"]
+
+
+def _load_data():
+    """config_data.py from the working directory (its banner goes to stderr)"""
+    from data import Data
+    with contextlib.redirect_stdout(sys.stderr):
+        return Data()
+
+
+def _tracer(verbosity):
+    return Tracer(DEBUG if verbosity > 1 else INFO) if verbosity else null_tracer
+
+
+def _generate_one(sem, options, verbosity):
+    """Process-pool entry point: load the config and generate one semester"""
+    from scheduler import generate_timetable
+    with contextlib.redirect_stdout(sys.stderr):
+        data = _load_data()
+        started = time.time()
+        result = generate_timetable(data, sem, tracer=_tracer(verbosity), **options)
+        result["seconds"] = time.time() - started
+    return result
+
+
+def _generate_joint(sems, options, workers, verbosity):
+    """All semesters on one shared calendar (no cross-semester double booking)"""
+    from department import generate_department
+    with contextlib.redirect_stdout(sys.stderr):
+        data = _load_data()
+        return generate_department(data, sems, tracer=_tracer(verbosity), workers=workers, **options)
+
+
+def _write_outputs(sem, result, out_dir, save):
+    """HTML file for every semester, storage entry for complete ones"""
+    import schedule_storage
+    html_path = os.path.join(out_dir, f"semester_{sem}.html")
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(result.get("html", f"<h2>No timetable for Semester {sem}</h2>"))
+    saved = False
+    if save and result.get("success"):
+        with contextlib.redirect_stdout(sys.stderr):
+            schedule_storage.save_schedule(sem, result.get("schedule", {}), result.get("time_slots", {}),
+                                           result.get("sections", []), result.get("days", []))
+        saved = True
+    return html_path, saved
+
+
+def _summary(result):
+    return {
+        "success": bool(result.get("success")),
+        "missing": result.get("missing", 0),
+        "violations": result.get("violations", 0),
+        "penalty": result.get("penalty", 0),
+        "seconds": round(result["seconds"], 3) if "seconds" in result else None,
+        "cached": bool(result.get("cached")),
+        "status": result.get("status"),
+        "diagnosis": result.get("diagnosis", [])
+    }
+
+
+def run(sems, workers=None, out_dir="timetables", save=True, joint=False, verbosity=0, **options):
+    """Generate, write and summarise; returns the JSON-ready summary dict"""
+    started = time.time()
+    os.makedirs(out_dir, exist_ok=True)
+    results, errors, clashes, groups = {}, {}, [], None
+    if joint:
+        try:
+            department = _generate_joint(sems, options, workers, verbosity)
+        except Exception as e:
+            errors = dict.fromkeys(sems, f"{type(e).__name__}: {e}")
+        else:
+            results = department["results"]
+            clashes = department["clashes"]
+            # Semesters of a group are solved together: the time is the group's
+            groups = [{"semesters": group, "seconds": round(seconds, 3)}
+                      for group, seconds in zip(department["groups"], department["seconds"])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or len(sems)) as pool:
+            futures = {sem: pool.submit(_generate_one, sem, options, verbosity) for sem in sems}
+            for sem, future in futures.items():
+                try:
+                    results[sem] = future.result()
+                except Exception as e:
+                    errors[sem] = f"{type(e).__name__}: {e}"
+
+    semesters = {}
+    for sem in sems:
+        if sem in errors:
+            semesters[sem] = {"success": False, "error": errors[sem]}
+            continue
+        result = results[sem]
+        semesters[sem] = _summary(result)
+        semesters[sem]["html"], semesters[sem]["saved"] = _write_outputs(sem, result, out_dir, save)
+
+    summary = {
+        "success": all(s["success"] for s in semesters.values()) and not clashes,
+        "semesters": semesters,
+        "missing": sum(s.get("missing", 0) for s in semesters.values()),
+        "violations": sum(s.get("violations", 0) for s in semesters.values()),
+        "clashes": clashes,
+        "seconds": round(time.time() - started, 3)
+    }
+    if groups is not None:
+        summary["groups"] = groups
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate section timetables without the GUI.")
+    parser.add_argument("--sems", nargs="+", default=DEFAULT_SEMS, help="semesters to generate (default: 3 5 7)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per semester)")
+    parser.add_argument("--out", default="timetables",
+                        help="directory for the HTML files (relative to --config-dir)")
+    parser.add_argument("--config-dir", default=None,
+                        help="directory with config_data.py and teacher_availability.json "
+                             "(default: the current directory)")
+    parser.add_argument("--engine", choices=["greedy", "exact"], default="greedy")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--optimize", type=float, default=None, metavar="SECONDS",
+                        help="simulated annealing budget for complete timetables")
+    parser.add_argument("--joint", action="store_true",
+                        help="schedule the semesters on one shared teacher/room calendar")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the on-disk result cache")
+    parser.add_argument("--no-save", action="store_true", help="don't update latest_schedules.json")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="scheduler trace on stderr (-vv for debug)")
+    args = parser.parse_args(argv)
+
+    if args.config_dir:
+        os.chdir(args.config_dir)
+
+    summary = run(args.sems, workers=args.workers, out_dir=args.out, save=not args.no_save, joint=args.joint,
+                  verbosity=args.verbose, engine=args.engine, seed=args.seed, optimize=args.optimize,
+                  cache=not args.no_cache)
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0 if summary["success"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Scheduler Benchmark Suite
+Builds synthetic Data instances at a controlled scale (sections, teachers,
+rooms, labs, electives, availability tightness, misaligned section
+timings), runs generate_timetable on each across several seeds and records
+wall time per phase, success rate, missing lectures and peak memory. Results
+go to a JSON file so regressions and scaling curves can be tracked.
+
+    python benchmark.py --sections 4 8 16 --seeds 5 --out benchmark.json
+
+Timings, phases, search counters and peak memory come from
+generate_timetable(profile=...) (see profiling.py), so both engines are
+broken down the same way. Peak memory uses tracemalloc, which slows the
+run down - pass --no-memory for clean timings.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+
+from problem_model import semester_days
+from profiling import GenerationProfile
+from tracing import null_tracer
+from utils import min_to_time_12h
+
+BENCH_SEM = "5"
+START_MINUTES = 8 * 60
+CLASS_MINUTES = 55
+CLASSES_PER_DAY = 6
+LUNCH = (12 * 60 + 35, 13 * 60 + 30)
+
+
+class SyntheticData:
+    """Stand-in for data.Data with generated contents (nothing read from disk)"""
+
+    def __init__(self, teachers, subjects, classrooms, sections, mappings, timings):
+        self.teachers = teachers
+        self.subjects = subjects
+        self.classrooms = classrooms
+        self.sections = sections
+        self.mappings = mappings
+        self.timings = timings
+        self.open_elective_schedule = {}
+
+
+def synthetic_instance(sections=4, teachers=None, rooms=None, lab_rooms=None, subjects=6, labs=2,
+                       electives=0, tightness=0.0, misaligned=0.0, seed=0):
+    """
+    (data, availability) for one synthetic semester.
+    teachers / rooms / lab_rooms: default to a size that scales with sections
+    tightness: 0..1 - share of each teacher's week blocked (off days + blocked hours)
+    misaligned: 0..1 - share of section-days on a shifted clock or 50-minute classes
+    """
+    rng = random.Random(seed)
+    teachers = teachers or max(4, math.ceil(sections * subjects / 3))
+    rooms = rooms or max(2, math.ceil(sections * 0.75))
+    lab_rooms = lab_rooms or max(1, math.ceil(sections / 3))
+    days = semester_days(BENCH_SEM)
+
+    teacher_names = [f"T{i + 1}" for i in range(teachers)]
+    teacher_list = [{"name": name, "short": name, "desig": "Assistant Professor", "credits": 16,
+                     "start_time": "8:00"} for name in teacher_names]
+
+    subject_list = []
+    for i in range(subjects):
+        subject_list.append({"code": f"S{i + 1}", "name": f"Subject {i + 1}", "elective": "no",
+                             "open_elective": "no", "islab": "yes" if i < labs else "no",
+                             "l": rng.choice([2, 3, 3, 4]), "t": 0, "p": 1 if i < labs else 0})
+    for i in range(electives):
+        subject_list.append({"code": f"E{i + 1}", "name": f"Elective {i + 1}", "elective": "yes",
+                             "open_elective": "no", "islab": "no", "l": 2, "t": 0, "p": 0})
+
+    classrooms = ([{"name": f"CR-{i + 1}", "is_lab": "no"} for i in range(rooms)] +
+                  [{"name": f"LAB-{i + 1}", "is_lab": "yes"} for i in range(lab_rooms)])
+
+    section_names = [f"S{chr(65 + i)}" if i < 26 else f"S{i}" for i in range(sections)]
+    mappings, timings = {}, {}
+    for sec in section_names:
+        mappings[sec] = {}
+        for sub in subject_list:
+            mapping = {"theory": rng.choice(teacher_names), "lab": []}
+            if sub["islab"] == "yes":
+                mapping["lab"] = rng.sample(teacher_names, 2)
+            mappings[sec][sub["code"]] = mapping
+        timings[sec] = {}
+        for day in days:
+            start, duration = START_MINUTES, CLASS_MINUTES
+            if rng.random() < misaligned:
+                if rng.random() < 0.5:
+                    start += rng.choice([10, 15, 20, 25])
+                else:
+                    duration = 50
+            timings[sec][day] = {"start_time": f"{start // 60}:{start % 60:02d}", "class_dur": duration,
+                                 "num_classes": CLASSES_PER_DAY,
+                                 "breaks": [{"start": f"{LUNCH[0] // 60}:{LUNCH[0] % 60:02d}",
+                                             "end": f"{LUNCH[1] // 60}:{LUNCH[1] % 60:02d}"}]}
+
+    # ⏰ Availability: off days and blocked hours in proportion to tightness
+    availability = {}
+    for name in teacher_names:
+        daily_hours, constraints = {}, []
+        for day in days:
+            if rng.random() < tightness / 3:
+                daily_hours[day] = {"off": True}
+                continue
+            for _ in range(round(rng.random() * tightness * 4)):
+                block = START_MINUTES + 60 * rng.randrange(8)
+                constraints.append({"day": day, "start": min_to_time_12h(block),
+                                    "end": min_to_time_12h(block + 60), "reason": "synthetic"})
+        availability[name] = {"daily_hours": daily_hours, "constraints": constraints,
+                              "preference": rng.choice(["No Preference", "Prefer Before Lunch",
+                                                        "Prefer After Lunch"]),
+                              "max_classes": "No Limit"}
+
+    data = SyntheticData(teacher_list, {BENCH_SEM: subject_list}, classrooms, {BENCH_SEM: section_names},
+                         {BENCH_SEM: mappings}, {BENCH_SEM: timings})
+    return data, availability
+
+
+def run_once(data, availability, seed, engine="greedy", memory=True):
+    """One generate_timetable run in a scratch directory holding the availability file"""
+    from scheduler import generate_timetable
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        with open(os.path.join(scratch, "teacher_availability.json"), 'w', encoding='utf-8') as f:
+            json.dump(availability, f)
+        os.chdir(scratch)
+        try:
+            result = generate_timetable(data, BENCH_SEM, tracer=null_tracer, engine=engine, seed=seed,
+                                        profile=GenerationProfile(memory=memory))
+        finally:
+            os.chdir(cwd)
+
+    profile = result["profile"]
+    return {
+        "seed": seed,
+        "success": bool(result.get("success")),
+        "status": result.get("status"),
+        "missing": result.get("missing", 0),
+        "violations": result.get("violations", 0),
+        "penalty": result.get("penalty", 0),
+        "seconds": profile["seconds"],
+        "phases": profile["phases"],
+        "counters": profile["counters"],
+        "peak_memory_kb": profile["peak_memory_kb"]
+    }
+
+
+def _summarise(runs):
+    times = [run["seconds"] for run in runs]
+    phases, counters = {}, {}
+    for run in runs:
+        for phase, seconds in run["phases"].items():
+            phases.setdefault(phase, []).append(seconds)
+        for name, n in run["counters"].items():
+            counters.setdefault(name, []).append(n)
+    peaks = [run["peak_memory_kb"] for run in runs if run["peak_memory_kb"] is not None]
+    return {
+        "success_rate": sum(run["success"] for run in runs) / len(runs),
+        "missing_mean": statistics.mean(run["missing"] for run in runs),
+        "seconds_mean": statistics.mean(times),
+        "seconds_median": statistics.median(times),
+        "seconds_max": max(times),
+        "phase_seconds_mean": {phase: statistics.mean(values) for phase, values in phases.items()},
+        "counters_mean": {name: statistics.mean(values) for name, values in counters.items()},
+        "peak_memory_kb_max": max(peaks) if peaks else None
+    }
+
+
+def run_benchmark(instances, seeds=5, engine="greedy", memory=True, log=print):
+    """instances: [params for synthetic_instance]; returns the JSON-ready report"""
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+              "engine": engine, "seeds": seeds, "instances": []}
+    for params in instances:
+        data, availability = synthetic_instance(**params)
+        runs = [run_once(data, availability, seed, engine, memory) for seed in range(seeds)]
+        summary = _summarise(runs)
+        report["instances"].append({"params": params, "summary": summary, "runs": runs})
+        log(f"📊 {params}: success {summary['success_rate']:.0%}, "
+            f"{summary['seconds_mean'] * 1000:.1f} ms mean, {summary['missing_mean']:.1f} missing")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler on synthetic instances.")
+    parser.add_argument("--sections", type=int, nargs="+", default=[4], help="one instance per value")
+    parser.add_argument("--tightness", type=float, nargs="+", default=[0.0], help="one instance per value")
+    parser.add_argument("--misaligned", type=float, default=0.0)
+    parser.add_argument("--teachers", type=int, default=None)
+    parser.add_argument("--rooms", type=int, default=None)
+    parser.add_argument("--lab-rooms", type=int, default=None)
+    parser.add_argument("--subjects", type=int, default=6)
+    parser.add_argument("--labs", type=int, default=2)
+    parser.add_argument("--electives", type=int, default=0)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--engine", choices=["greedy", "exact"], default="greedy")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (cleaner timings)")
+    parser.add_argument("--out", default="benchmark.json")
+    args = parser.parse_args(argv)
+
+    instances = [{"sections": sections, "teachers": args.teachers, "rooms": args.rooms,
+                  "lab_rooms": args.lab_rooms, "subjects": args.subjects, "labs": args.labs,
+                  "electives": args.electives, "tightness": tightness, "misaligned": args.misaligned}
+                 for sections in args.sections for tightness in args.tightness]
+    report = run_benchmark(instances, args.seeds, args.engine, memory=not args.no_memory)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
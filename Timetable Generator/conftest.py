@@ -0,0 +1,74 @@
+"""
+Shared pytest fixtures: every test runs from this folder, against the
+shipped config_data.py, with the result cache and the saved timetables in a
+temporary directory
+"""
+
+import os
+
+import pytest
+
+import result_cache
+import schedule_storage
+from data import Data
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(autouse=True)
+def shipped_config(monkeypatch, tmp_path):
+    monkeypatch.chdir(HERE)
+    monkeypatch.setattr(result_cache, "CACHE_DIR", str(tmp_path / "schedule_cache"))
+    monkeypatch.setattr(schedule_storage, "STORAGE_FILE", str(tmp_path / "latest_schedules.json"))
+
+
+@pytest.fixture
+def data():
+    return Data()
+
+
+def find_double_bookings(result):
+    """(teacher or room, day) pairs holding two different classes at overlapping minutes"""
+    bookings = set()
+    for (sec, day, idx), entry in result["schedule"].items():
+        if entry.get("skip"):
+            continue
+        slots = result["time_slots"][(sec, day)]
+        start, end = slots[idx][0], slots[idx + 1 if entry.get("lab_span") else idx][1]
+        if entry["type"] == "elective":
+            # One group lecture: a teacher/room shared by sections is one class
+            for code, teacher in entry["teachers"].items():
+                bookings.add((teacher, day, start, end, code))
+                bookings.add((entry["rooms"][code], day, start, end, code))
+            continue
+        for teacher in entry["teacher"].split("/"):
+            bookings.add((teacher, day, start, end, entry["code"]))
+        bookings.add((entry["room"], day, start, end, entry["code"]))
+
+    clashes = []
+    by_resource = {}
+    for name, day, start, end, code in sorted(bookings):
+        for other_start, other_end, other_code in by_resource.get((name, day), []):
+            if other_start < end and start < other_end:
+                clashes.append((name, day, start, other_code, code))
+        by_resource.setdefault((name, day), []).append((start, end, code))
+    return clashes
+
+
+@pytest.fixture
+def double_bookings():
+    return find_double_bookings
+
+
+def count_lectures(result):
+    """(section, code) -> single-slot lectures in a result (theory and lab-subject theory)"""
+    counts = {}
+    for (sec, _, _), entry in result["schedule"].items():
+        if entry["type"] in ("theory", "lab") and not entry.get("lab_span") and not entry.get("skip"):
+            counts[sec, entry["code"]] = counts.get((sec, entry["code"]), 0) + 1
+    return counts
+
+
+@pytest.fixture
+def lecture_counts():
+    return count_lectures
@@ -6,12 +6,162 @@ Handles teacher availability and personal constraints
 import json
 from datetime import datetime, time
 from collections import defaultdict
+from functools import lru_cache
+
+from tracing import default_tracer, TRACE
+
+ALL_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+# Lunch time reference used by the "before/after lunch" preferences (1:00 PM)
+LUNCH_TIME = 13 * 60
+
+# preference -> (minute threshold, penalise slots at/after threshold?, penalty)
+PREFERENCE_RULES = {
+    "Prefer Before Lunch": (LUNCH_TIME, True, 10),
+    "Prefer After Lunch": (LUNCH_TIME, False, 10),
+    "Prefer Early Morning": (10 * 60, True, 15),
+    # Support old preference values for backward compatibility
+    "Prefer Morning (Before 12 PM)": (12 * 60, True, 10),
+    "Prefer Afternoon (After 12 PM)": (12 * 60, False, 10),
+    "Prefer Early Morning (Before 10 AM)": (10 * 60, True, 15),
+}
+
+
+@lru_cache(maxsize=None)
+def parse_12h(time_str):
+    """Convert "HH:MM AM/PM" to minutes since midnight (None if invalid)"""
+    try:
+        time_parts = time_str.split()
+        if len(time_parts) != 2:
+            return None
+        
+        time_part, period = time_parts
+        hour, minute = map(int, time_part.split(':'))
+        
+        # Convert to 24-hour
+        if period == 'PM' and hour != 12:
+            hour += 12
+        elif period == 'AM' and hour == 12:
+            hour = 0
+        
+        return hour * 60 + minute
+    except:
+        return None
+
+
+class AvailabilityIndex:
+    """
+    Compiled, in-memory view of teacher_availability.json.
+    Built once per generation: every time is stored as integer minutes so
+    availability checks are dictionary lookups with no file I/O or parsing.
+    """
+    
+    def __init__(self, availability_data):
+        # teacher -> day -> (off, work_start, work_end, start_label, end_label,
+        #                    ((block_start, block_end, reason), ...))
+        # work_start/work_end are None when no working hours are set for that day
+        self.days = {}
+        self.preferences = {}  # teacher -> PREFERENCE_RULES entry
+        self.max_classes = {}  # teacher -> int limit
+        self._cache = {}
+        
+        for teacher, data in availability_data.items():
+            daily_hours = data.get('daily_hours', {})
+            constraints = data.get('constraints', [])
+            per_day = {}
+            
+            for day in set(ALL_DAYS) | set(daily_hours):
+                off, work_start, work_end, start_label, end_label = False, None, None, None, None
+                if day in daily_hours:
+                    day_hours = daily_hours[day]
+                    off = bool(day_hours.get('off', False))
+                    start_label = day_hours.get('start', '09:00 AM')
+                    end_label = day_hours.get('end', '05:00 PM')
+                    work_start = parse_12h(start_label)
+                    work_end = parse_12h(end_label)
+                
+                blocks = []
+                for constraint in constraints:
+                    if constraint['day'] == day or constraint['day'] == 'All Days':
+                        block_start = parse_12h(constraint['start'])
+                        block_end = parse_12h(constraint['end'])
+                        if block_start is None or block_end is None:
+                            continue
+                        blocks.append((block_start, block_end, constraint.get('reason', '')))
+                blocks.sort()
+                
+                per_day[day] = (off, work_start, work_end, start_label, end_label, tuple(blocks))
+            
+            self.days[teacher] = per_day
+            
+            rule = PREFERENCE_RULES.get(data.get('preference', 'No Preference'))
+            if rule:
+                self.preferences[teacher] = rule
+            
+            try:
+                self.max_classes[teacher] = int(data.get('max_classes', 'No Limit'))
+            except (TypeError, ValueError):
+                pass  # 'No Limit' or invalid limit, ignore
+    
+    def check(self, teacher, day, slot_start, slot_end):
+        """Return (available, reason) for a slot given in minutes since midnight"""
+        key = (teacher, day, slot_start, slot_end)
+        result = self._cache.get(key)
+        if result is None:
+            result = self._check(teacher, day, slot_start, slot_end)
+            self._cache[key] = result
+        return result
+    
+    def _check(self, teacher, day, slot_start, slot_end):
+        per_day = self.days.get(teacher)
+        if per_day is None:
+            return True, "No constraints defined"
+        
+        entry = per_day.get(day)
+        if entry is None:
+            return True, "Available"
+        
+        off, work_start, work_end, start_label, end_label, blocks = entry
+        if off:
+            return False, f"{teacher} has {day} as off day"
+        
+        if work_start is not None and slot_start < work_start:
+            return False, f"{teacher} starts work at {start_label} on {day}"
+        if work_end is not None and slot_end > work_end:
+            return False, f"{teacher} ends work at {end_label} on {day}"
+        
+        for block_start, block_end, reason in blocks:
+            if block_start >= slot_end:
+                break  # blocks are sorted, nothing later can overlap
+            if slot_start < block_end:
+                return False, f"{teacher} unavailable: {reason}"
+        
+        return True, "Available"
+    
+    def preference_penalty(self, teacher, slot_start):
+        """Penalty for a slot starting at slot_start minutes"""
+        rule = self.preferences.get(teacher)
+        if rule is None:
+            return 0
+        threshold, after, penalty = rule
+        if (slot_start >= threshold) == after:
+            return penalty
+        return 0
+
 
 class ConstraintValidator:
     """Validate and check teacher availability constraints"""
     
-    def __init__(self):
+    def __init__(self, tracer=None):
+        # Per-check debug output is only produced at TRACE level
+        self.tracer = tracer or default_tracer
+        self.checks = 0  # availability checks answered (for profiling)
+        self.reload()
+    
+    def reload(self):
+        """Re-read teacher_availability.json and rebuild the compiled index"""
         self.availability_data = self.load_availability()
+        self.index = AvailabilityIndex(self.availability_data)
     
     def load_availability(self):
         """Load teacher availability from file"""
@@ -23,133 +173,55 @@ class ConstraintValidator:
     
     def time_to_minutes(self, time_str):
         """Convert time string to minutes since midnight"""
-        # Parse "HH:MM AM/PM" format
-        try:
-            time_parts = time_str.split()
-            if len(time_parts) != 2:
-                return None
-            
-            time_part, period = time_parts
-            hour, minute = map(int, time_part.split(':'))
-            
-            # Convert to 24-hour
-            if period == 'PM' and hour != 12:
-                hour += 12
-            elif period == 'AM' and hour == 12:
-                hour = 0
-            
-            return hour * 60 + minute
-        except:
-            return None
+        return parse_12h(time_str)
+    
+    def is_available_minutes(self, teacher, day, slot_start, slot_end):
+        """Fast availability check for a slot given in minutes since midnight"""
+        self.checks += 1
+        result = self.index.check(teacher, day, slot_start, slot_end)
+        if self.tracer.trace:
+            self.tracer.emit(TRACE, "availability",
+                             f"🔍 {teacher} on {day} at {slot_start}-{slot_end} min: "
+                             f"{'✅' if result[0] else '❌'} {result[1]}")
+        return result
+    
+    def preference_penalty_minutes(self, teacher, slot_start):
+        """Fast preference penalty for a slot starting at slot_start minutes"""
+        return self.index.preference_penalty(teacher, slot_start)
+    
+    def max_classes_limit(self, teacher):
+        """Max classes per day for teacher (None = no limit)"""
+        return self.index.max_classes.get(teacher)
     
     def is_teacher_available(self, teacher, day, start_time, end_time):
         """Check if teacher is available for given time slot"""
-        
-        # ✅ RELOAD availability data to get latest constraints!
-        self.availability_data = self.load_availability()
+        self.checks += 1
         
         if teacher not in self.availability_data:
             return True, "No constraints defined"
         
-        data = self.availability_data[teacher]
-        
-        # DEBUG: Print what we're checking
-        print(f"🔍 Checking {teacher} on {day} at {start_time}-{end_time}")
-        
-        # Check daily working hours
-        if 'daily_hours' in data and day in data['daily_hours']:
-            day_hours = data['daily_hours'][day]
-            
-            # Check if it's an off day
-            if day_hours.get('off', False):
-                print(f"  ❌ {day} is OFF day for {teacher}")
-                return False, f"{teacher} has {day} as off day"
-            
-            # Check if within working hours
-            work_start = self.time_to_minutes(day_hours.get('start', '09:00 AM'))
-            work_end = self.time_to_minutes(day_hours.get('end', '05:00 PM'))
-            slot_start = self.time_to_minutes(start_time)
-            slot_end = self.time_to_minutes(end_time)
-            
-            if slot_start is None or slot_end is None:
-                return True, "Invalid time format"
-            
-            if slot_start < work_start:
-                print(f"  ❌ Class starts at {start_time}, but {teacher} starts work at {day_hours['start']}")
-                return False, f"{teacher} starts work at {day_hours['start']} on {day}"
-            
-            if slot_end > work_end:
-                print(f"  ❌ Class ends at {end_time}, but {teacher} ends work at {day_hours['end']}")
-                return False, f"{teacher} ends work at {day_hours['end']} on {day}"
-        
-        # Check personal constraints (unavailable blocks)
-        if 'constraints' in data:
-            for constraint in data['constraints']:
-                if constraint['day'] == day or constraint['day'] == 'All Days':
-                    block_start = self.time_to_minutes(constraint['start'])
-                    block_end = self.time_to_minutes(constraint['end'])
-                    slot_start = self.time_to_minutes(start_time)
-                    slot_end = self.time_to_minutes(end_time)
-                    
-                    if slot_start is None or slot_end is None:
-                        continue
-                    
-                    # DEBUG: Show constraint check
-                    print(f"  📋 Checking constraint: {constraint['start']}-{constraint['end']} ({constraint['reason']})")
-                    print(f"     Slot: {start_time}-{end_time}")
-                    print(f"     Block: {block_start}-{block_end} minutes")
-                    print(f"     Slot: {slot_start}-{slot_end} minutes")
-                    
-                    # Check if times overlap
-                    if not (slot_end <= block_start or slot_start >= block_end):
-                        print(f"  ❌ OVERLAP! Constraint blocks this slot: {constraint['reason']}")
-                        return False, f"{teacher} unavailable: {constraint['reason']}"
-        
-        print(f"  ✅ {teacher} is available!")
-        return True, "Available"
+        slot_start = parse_12h(start_time)
+        slot_end = parse_12h(end_time)
+        if slot_start is None or slot_end is None:
+            return True, "Invalid time format"
+        
+        available, reason = self.index.check(teacher, day, slot_start, slot_end)
+        
+        # DEBUG: Show what we checked
+        if self.tracer.trace:
+            self.tracer.emit(TRACE, "availability", f"🔍 Checking {teacher} on {day} at {start_time}-{end_time}")
+            if available:
+                self.tracer.emit(TRACE, "availability", f"  ✅ {teacher} is available!")
+            else:
+                self.tracer.emit(TRACE, "availability", f"  ❌ {reason}")
+        return available, reason
     
     def get_preference_penalty(self, teacher, start_time):
         """Get penalty score for scheduling based on preferences"""
-        # ✅ RELOAD availability data to get latest preferences!
-        self.availability_data = self.load_availability()
-        
-        if teacher not in self.availability_data:
-            return 0
-        
-        data = self.availability_data[teacher]
-        preference = data.get('preference', 'No Preference')
-        
-        slot_minutes = self.time_to_minutes(start_time)
+        slot_minutes = parse_12h(start_time)
         if slot_minutes is None:
             return 0
-        
-        # Calculate penalties based on lunch time reference (~1 PM / 13:00)
-        LUNCH_TIME = 13 * 60  # 1:00 PM in minutes
-        
-        if preference == "Prefer Before Lunch":
-            # Penalty for classes after lunch (after 1 PM)
-            if slot_minutes >= LUNCH_TIME:
-                return 10
-        elif preference == "Prefer After Lunch":
-            # Penalty for classes before lunch (before 1 PM)
-            if slot_minutes < LUNCH_TIME:
-                return 10
-        elif preference == "Prefer Early Morning":
-            # Penalty increases after 10 AM
-            if slot_minutes >= 10 * 60:
-                return 15
-        # Support old preference values for backward compatibility
-        elif preference == "Prefer Morning (Before 12 PM)":
-            if slot_minutes >= 12 * 60:
-                return 10
-        elif preference == "Prefer Afternoon (After 12 PM)":
-            if slot_minutes < 12 * 60:
-                return 10
-        elif preference == "Prefer Early Morning (Before 10 AM)":
-            if slot_minutes >= 10 * 60:
-                return 15
-        
-        return 0
+        return self.index.preference_penalty(teacher, slot_minutes)
     
     def check_max_classes_per_day(self, teacher, day, current_schedule):
         """Check if adding another class would exceed max classes per day"""
@@ -190,7 +262,12 @@ class ConstraintValidator:
             end_time = cls['end_time']
             
             # Check availability
-            available, reason = self.is_teacher_available(teacher, day, start_time, end_time)
+            slot_start = parse_12h(start_time)
+            slot_end = parse_12h(end_time)
+            if slot_start is None or slot_end is None:
+                available, reason = True, "Invalid time format"
+            else:
+                available, reason = self.index.check(teacher, day, slot_start, slot_end)
             if not available:
                 violations.append({
                     'type': 'HARD_CONSTRAINT',
@@ -202,7 +279,7 @@ class ConstraintValidator:
                 })
             
             # Check preferences (soft constraints)
-            penalty = self.get_preference_penalty(teacher, start_time)
+            penalty = self.index.preference_penalty(teacher, slot_start) if slot_start is not None else 0
             if penalty > 0:
                 warnings.append({
                     'type': 'PREFERENCE_VIOLATION',
@@ -270,6 +347,10 @@ class ConstraintValidator:
             work_start = 9 * 60  # 9 AM
             work_end = 17 * 60  # 5 PM
         
+        # Blocked intervals for this day (already compiled to minutes)
+        entry = self.index.days[teacher].get(day)
+        blocks = entry[5] if entry else ()
+        
         # Generate slots
         current_time = work_start
         while current_time + 55 <= work_end:  # 55 min class
@@ -277,23 +358,14 @@ class ConstraintValidator:
             slot_end = self.minutes_to_time(current_time + 55)
             
             # Check if slot is blocked by constraints
-            is_blocked = False
-            if 'constraints' in data:
-                for constraint in data['constraints']:
-                    if constraint['day'] == day or constraint['day'] == 'All Days':
-                        block_start = self.time_to_minutes(constraint['start'])
-                        block_end = self.time_to_minutes(constraint['end'])
-                        
-                        # Check overlap
-                        if not (current_time + 55 <= block_start or current_time >= block_end):
-                            is_blocked = True
-                            break
+            is_blocked = any(not (current_time + 55 <= block_start or current_time >= block_end)
+                             for block_start, block_end, _ in blocks)
             
             if not is_blocked:
                 available_slots.append({
                     'start': slot_start,
                     'end': slot_end,
-                    'penalty': self.get_preference_penalty(teacher, slot_start)
+                    'penalty': self.index.preference_penalty(teacher, current_time)
                 })
             
             current_time += 55  # Next slot
@@ -0,0 +1,784 @@
+"""
+Exact Constraint-Programming Engine
+Alternative backend for generate_timetable(engine="exact").
+
+The whole semester is compiled into one constraint model: every lab block,
+elective group lecture and theory lecture is a variable whose domain is the
+(day, slot) positions it could take - for lab blocks (day, start slot, lab
+room), so lab rooms already named by open electives or other semesters are
+respected exactly. The model is solved with OR-Tools CP-SAT
+when it is installed, otherwise with the built-in backtracking search
+(most-constrained variable first + forward checking). Either way the result
+is a complete timetable, or a proof that none exists - never a random miss.
+"""
+
+import time
+
+from objective import creates_run
+from room_assignment import assign_rooms
+from tracing import default_tracer, INFO, DEBUG
+
+# OR-Tools is optional: without it the built-in search is used
+try:
+    from ortools.sat.python import cp_model
+except ImportError:
+    cp_model = None
+
+# ⏱️ Default search budget in seconds (the engine gives up with "unknown" after this)
+EXACT_TIME_LIMIT = 60.0
+
+# ⏱️ Budget for the lab-only subproblem solved before theory (greedy engine)
+LAB_TIME_LIMIT = 2.0
+LAB_RESTART_NODES = 500  # node budget of the first restart (doubles each time)
+
+
+class Task:
+    """One variable of the model: a lab block, an elective group lecture or a theory lecture"""
+
+    def __init__(self, kind, label, sections, code=None, lab=False):
+        self.kind = kind            # "lab" | "elective" | "theory"
+        self.label = label          # human readable, for diagnosis
+        self.sections = sections    # section ids whose cells it uses
+        self.code = code
+        self.lab = lab              # needs a lab room
+        self.runs = False           # counts toward the 3-in-a-row rule (non-lab theory lectures)
+        self.teachers = []          # teacher ids (for neighbour lookups)
+        # values: (d, idx, key, cells, teach, room_bits, need, counted, penalty, rooms)
+        #   cells: [(s, cell bits)], teach: [(t, time mask)], counted: [t] for max_classes,
+        #   rooms: [(r, time mask)] named rooms held (lab blocks)
+        self.values = []
+        self.prev = None            # interchangeable sibling that must sit earlier
+        self.next = None
+
+
+def _bits(mask):
+    """Bit indexes of a mask, lowest first"""
+    out = []
+    while mask:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+
+def base_state(model, validator, tracer):
+    """Fresh ScheduleState with the pre-scheduled open electives (and pinned labs) placed"""
+    state = model.new_state()
+    for sec, oe_code, teacher, day, slot_idx, room in model.open_electives:
+        if (sec, day) in model.time_slots and slot_idx < len(model.time_slots[(sec, day)]):
+            start_time, end_time = model.time_slots[(sec, day)][slot_idx]
+            available, reason = validator.is_available_minutes(teacher, day, start_time, end_time)
+            if not available:
+                tracer.emit(INFO, "open_electives", f"  ⚠️ Open Elective {oe_code} scheduled despite constraint: {teacher} - {reason}")
+            state.place_open_elective(state.sec_id[sec], state.day_id[day], slot_idx, oe_code, teacher, room)
+    place_pinned_labs(model, state)
+    return state
+
+
+def place_pinned_labs(model, state):
+    """Place the lab blocks department mode fixed for this semester (model.pinned_labs)"""
+    for sec, code, teacher1, teacher2, day, slot_idx, room in model.pinned_labs:
+        state.place_lab(state.sec_id[sec], state.day_id[day], slot_idx, code, teacher1, teacher2,
+                        state.room_id.get(room))
+
+
+def compile_tasks(model, validator, state, demand=None):
+    """
+    Build every task with its statically feasible domain (free cells,
+    availability, lab contiguity). Open electives must already be in state.
+    demand: only what still has to be placed (repair mode) -
+            {"labs": {(sec, code)}, "electives": [lec_num], "theory": {sec: {code: n}}}
+            (None = the whole semester)
+    """
+    tasks = []
+    days = model.days
+    sec_id = state.sec_id
+
+    def add_value(task, d, idx, cells, teach, room_mask, need, counted, penalty, rooms=()):
+        task.values.append((d, idx, d * 64 + idx, cells, teach, _bits(room_mask), need, counted, penalty,
+                            list(rooms)))
+
+    # 🔬 Lab blocks: 2 back-to-back slots, both teachers for the whole block,
+    # one value per lab room free for the whole block
+    for sec in model.sections:
+        s = sec_id[sec]
+        for code, teacher1, teacher2 in model.labs[sec]:
+            if demand is not None and (sec, code) not in demand["labs"]:
+                continue
+            task = Task("lab", f"{sec}/{code} lab", [s], code, lab=True)
+            t1, t2 = state.teacher_id(teacher1), state.teacher_id(teacher2)
+            task.teachers = [t1, t2]
+            for d, day in enumerate(days):
+                slots = state.slots[s][d]
+                for idx in range(len(slots) - 1):
+                    start1, end1 = slots[idx]
+                    start2, end2 = slots[idx + 1]
+                    if end1 != start2 or state.cell_mask[s][d] & (3 << idx):
+                        continue
+                    if not (validator.is_available_minutes(teacher1, day, start1, end2)[0] and
+                            validator.is_available_minutes(teacher2, day, start1, end2)[0]):
+                        continue
+                    mask = state.slot_mask[s][d][idx] | state.slot_mask[s][d][idx + 1]
+                    if (state.teacher_busy[t1][d] | state.teacher_busy[t2][d]) & mask:
+                        continue
+                    penalty = (validator.preference_penalty_minutes(teacher1, start1) +
+                               validator.preference_penalty_minutes(teacher2, start1))
+                    for r in state.lab_rooms:
+                        if not state.room_busy[r][d] & mask:
+                            add_value(task, d, idx, [(s, 3 << idx)], [(t1, mask), (t2, mask)],
+                                      mask, 1, [t1, t2], penalty, [(r, mask)])
+            tasks.append(task)
+
+    # 🎯 Elective groups: lecture k of every elective with l > k, same slot index in all sections
+    electives = model.electives
+    max_lectures = max([x["l"] for x in electives], default=0)
+    previous = None
+    for lec_num in range(max_lectures):
+        if demand is not None and lec_num not in demand["electives"]:
+            continue
+        active = [e["code"] for e in electives if lec_num < e["l"]]
+        task = Task("elective", f"electives #{lec_num + 1} ({'/'.join(active)})",
+                    list(range(len(model.sections))))
+        teacher_names = set()
+        for d, day in enumerate(days):
+            n_slots = min([len(state.slots[s][d]) for s in range(len(model.sections))], default=0)
+            for idx in range(n_slots):
+                bit = 1 << idx
+                if any(state.cell_mask[s][d] & bit for s in range(len(model.sections))):
+                    continue
+                ok = True
+                teach = {}
+                penalty = 0
+                group_mask = 0
+                for s, sec in enumerate(model.sections):
+                    start_time, end_time = state.slots[s][d][idx]
+                    mask = state.slot_mask[s][d][idx]
+                    group_mask |= mask
+                    for code in active:
+                        teacher = model.elective_teachers[sec].get(code)
+                        if not teacher:
+                            continue
+                        t = state.teacher_id(teacher)
+                        teacher_names.add(t)
+                        if (not validator.is_available_minutes(teacher, day, start_time, end_time)[0]
+                                or state.teacher_busy[t][d] & mask):
+                            ok = False
+                            break
+                        teach[t] = teach.get(t, 0) | mask
+                        penalty += validator.preference_penalty_minutes(teacher, start_time)
+                    if not ok:
+                        break
+                if not ok:
+                    continue
+                cells = [(s, bit) for s in range(len(model.sections))]
+                add_value(task, d, idx, cells, list(teach.items()), group_mask,
+                          len(active), list(teach), penalty)
+        task.teachers = sorted(teacher_names)
+        # Groups with the same subjects are interchangeable: keep them in order
+        if previous is not None and previous.code == tuple(active):
+            task.prev = previous
+            previous.next = task
+        task.code = tuple(active)
+        tasks.append(task)
+        previous = task
+
+    # 📖 Theory lectures (one task per lecture, siblings kept in slot order)
+    for sec in model.sections:
+        s = sec_id[sec]
+        for code, teacher, sub in model.theory[sec]:
+            t = state.teacher_id(teacher)
+            values = []
+            for d, day in enumerate(days):
+                for idx, (start_time, end_time) in enumerate(state.slots[s][d]):
+                    if (state.cell_mask[s][d] >> idx) & 1:
+                        continue
+                    mask = state.slot_mask[s][d][idx]
+                    if state.teacher_busy[t][d] & mask:
+                        continue
+                    if not validator.is_available_minutes(teacher, day, start_time, end_time)[0]:
+                        continue
+                    values.append((d, idx, d * 64 + idx, [(s, 1 << idx)], [(t, mask)], _bits(mask), 1, [t],
+                                   validator.preference_penalty_minutes(teacher, start_time), []))
+            needed = sub["l"] if demand is None else demand["theory"].get(sec, {}).get(code, 0)
+            previous = None
+            for k in range(needed):
+                task = Task("theory", f"{sec}/{code} lecture {k + 1} ({teacher})", [s], code)
+                task.teachers = [t]
+                task.teacher = teacher
+                task.runs = model.display_type(code) == "theory"
+                task.values = list(values)
+                if previous is not None:
+                    task.prev = previous
+                    previous.next = task
+                tasks.append(task)
+                previous = task
+
+    for i, task in enumerate(tasks):
+        task.id = i
+    return tasks
+
+
+def room_pools(state):
+    """
+    Room pools as counts: rooms of each type still free per (day, time bit),
+    less the ones held by classes placed without a named room yet
+    """
+    return [[[max(0, bin(free).count("1") - pending) for free, pending in zip(state.room_free[lab][d],
+                                                                               state.room_pending[lab][d])]
+             for d in range(len(state.days))] for lab in (0, 1)]
+
+
+def held_classes(state):
+    """
+    What `state` already holds that the search must respect:
+    (lab blocks per [section][day], theory lecture code or None per [section][day][slot])
+    """
+    n_days = len(state.days)
+    labs_on_day = [[0] * n_days for _ in state.sections]
+    row_code = [[[None] * len(state.slots[s][d]) for d in range(n_days)] for s in range(len(state.sections))]
+    for s in range(len(state.sections)):
+        for d in range(n_days):
+            for idx, entry in enumerate(state.cells[s][d]):
+                if entry is None or entry["type"] not in ("theory", "lab") or entry.get("skip"):
+                    continue
+                if entry.get("lab_span"):
+                    labs_on_day[s][d] += 1
+                elif entry["type"] == "theory":
+                    row_code[s][d][idx] = entry["code"]
+    return labs_on_day, row_code
+
+
+class BacktrackingSolver:
+    """
+    Complete search over compiled tasks.
+    Most-constrained task first, cheapest-preference value first, and after
+    every assignment the domains of all tasks sharing a section, a teacher or
+    a saturated room pool are filtered (forward checking).
+    """
+
+    def __init__(self, model, validator, state, tasks, time_limit=EXACT_TIME_LIMIT, tracer=default_tracer,
+                 max_nodes=None):
+        self.tasks = tasks
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes  # node budget (None = until the time limit)
+        self.tracer = tracer
+        self.two_lab_days_allowed = [model.two_lab_days_allowed(sec) for sec in model.sections]
+        self.nodes = 0
+        self.section_names = model.sections
+
+        n_days = len(model.days)
+        n_secs = len(model.sections)
+        self.cell_mask = [list(row) for row in state.cell_mask]
+        self.busy = [list(row) for row in state.teacher_busy]
+        self.room_busy = [list(row) for row in state.room_busy]
+        self.day_count = [list(row) for row in state.teacher_day_count]
+        self.limits = [validator.max_classes_limit(name) for name in state.teacher_names]
+        self.room_left = room_pools(state)
+        # Lab days and lecture codes per cell (3-in-a-row) start from what state already holds
+        self.labs_on_day, self.row_code = held_classes(state)
+        self.two_lab_days = [sum(1 for n in per_day if n >= 2) for per_day in self.labs_on_day]
+
+        self.assigned = [None] * len(tasks)
+
+        # Value order: lowest preference penalty first, random among equals
+        for task in tasks:
+            model.rng.shuffle(task.values)
+            task.values.sort(key=lambda v: v[8])
+        self.domains = [list(range(len(task.values))) for task in tasks]
+
+        # Neighbours: tasks sharing a section, a teacher or a named room
+        by_section = [[] for _ in range(n_secs)]
+        by_teacher = {}
+        by_room = {}
+        task_rooms = [{r for value in task.values for r, _ in value[9]} for task in tasks]
+        for task in tasks:
+            for s in task.sections:
+                by_section[s].append(task.id)
+            for t in task.teachers:
+                by_teacher.setdefault(t, []).append(task.id)
+            for r in task_rooms[task.id]:
+                by_room.setdefault(r, []).append(task.id)
+        # Lab blocks list each position once per room: compare domains per position
+        self.spread = [max(1, len(rooms)) for rooms in task_rooms]
+        self.neighbours = []
+        for task in tasks:
+            related = set()
+            for s in task.sections:
+                related.update(by_section[s])
+            for t in task.teachers:
+                related.update(by_teacher[t])
+            for r in task_rooms[task.id]:
+                related.update(by_room[r])
+            related.discard(task.id)
+            self.neighbours.append(sorted(related))
+        self.pool_users = [[t.id for t in tasks if not t.lab], [t.id for t in tasks if t.lab]]
+        self.pool_need = [max([t.values[0][6] for t in tasks if t.lab == lab and t.values], default=1)
+                          for lab in (0, 1)]
+
+    # ------------------------------------------------------------ checks
+
+    def fits(self, i, v):
+        task = self.tasks[i]
+        d, idx, key, cells, teach, room_bits, need, counted, _, rooms = task.values[v]
+        for s, bits in cells:
+            if self.cell_mask[s][d] & bits:
+                return False
+        for t, mask in teach:
+            if self.busy[t][d] & mask:
+                return False
+        for r, mask in rooms:
+            if self.room_busy[r][d] & mask:
+                return False
+        left = self.room_left[task.lab][d]
+        for b in room_bits:
+            if left[b] < need:
+                return False
+        for t in counted:
+            limit = self.limits[t]
+            if limit is not None and self.day_count[t][d] >= limit:
+                return False
+        if task.kind == "lab":
+            s = cells[0][0]
+            n = self.labs_on_day[s][d]
+            if n >= 2 or (n == 1 and self.two_lab_days[s] >= self.two_lab_days_allowed[s]):
+                return False
+        elif task.runs:
+            row = self.row_code[cells[0][0]][d]
+            if creates_run(row, idx, task.code):
+                return False
+        # Interchangeable siblings stay in slot order (symmetry breaking)
+        if task.prev is not None and self.assigned[task.prev.id] is not None:
+            if task.prev.values[self.assigned[task.prev.id]][2] >= key:
+                return False
+        if task.next is not None and self.assigned[task.next.id] is not None:
+            if task.next.values[self.assigned[task.next.id]][2] <= key:
+                return False
+        return True
+
+    # ------------------------------------------------------ assign / undo
+
+    def _apply(self, i, v, sign):
+        task = self.tasks[i]
+        d, idx, key, cells, teach, room_bits, need, counted, _, rooms = task.values[v]
+        for s, bits in cells:
+            self.cell_mask[s][d] ^= bits
+        for t, mask in teach:
+            self.busy[t][d] ^= mask
+        for r, mask in rooms:
+            self.room_busy[r][d] ^= mask
+        left = self.room_left[task.lab][d]
+        for b in room_bits:
+            left[b] -= sign * need
+        for t in counted:
+            self.day_count[t][d] += sign
+        if task.kind == "lab":
+            s = cells[0][0]
+            if sign > 0:
+                self.labs_on_day[s][d] += 1
+                if self.labs_on_day[s][d] == 2:
+                    self.two_lab_days[s] += 1
+            else:
+                if self.labs_on_day[s][d] == 2:
+                    self.two_lab_days[s] -= 1
+                self.labs_on_day[s][d] -= 1
+        elif task.runs:
+            self.row_code[cells[0][0]][d][idx] = task.code if sign > 0 else None
+        self.assigned[i] = v if sign > 0 else None
+
+    def _propagate(self, i, v, trail):
+        """Filter neighbour domains after assigning i=v (False on a wipe-out)"""
+        task = self.tasks[i]
+        d = task.values[v][0]
+        targets = set(self.neighbours[i])
+        left = self.room_left[task.lab][d]
+        if any(left[b] < self.pool_need[task.lab] for b in task.values[v][5]):
+            targets.update(self.pool_users[task.lab])  # a room pool ran (nearly) dry
+
+        for j in targets:
+            if self.assigned[j] is not None:
+                continue
+            other = self.tasks[j]
+            # Same-day values always; other days only when a day-spanning rule links them
+            full = (other.prev is task or other.next is task or
+                    (task.kind == "lab" and other.kind == "lab"))
+            values = other.values
+            domain = self.domains[j]
+            kept = [w for w in domain if (values[w][0] != d and not full) or self.fits(j, w)]
+            if len(kept) != len(domain):
+                trail.append((j, domain))
+                self.domains[j] = kept
+                if not kept:
+                    return False
+        return True
+
+    # ------------------------------------------------------------ search
+
+    def solve(self):
+        """Returns "sat", "unsat" or "unknown" (time limit or node budget reached)"""
+        self.deadline = time.time() + self.time_limit if self.time_limit else None
+
+        # Static wipe-outs and over-full sections are an immediate proof
+        self.conflicts = [f"{t.label}: no feasible slot at all" for t in self.tasks if not t.values]
+        needed = [0] * len(self.section_names)
+        for task in self.tasks:
+            if task.values:
+                for s, bits in task.values[0][3]:
+                    needed[s] += bin(bits).count("1")
+        for s, sec in enumerate(self.section_names):
+            free = sum(len(row) for row in self.row_code[s]) - sum(bin(m).count("1") for m in self.cell_mask[s])
+            if needed[s] > free:
+                self.conflicts.append(f"Section {sec}: needs {needed[s]} slots but only {free} are free")
+        if self.conflicts:
+            return "unsat"
+
+        self.unassigned = set(range(len(self.tasks)))
+        try:
+            found = self._search()
+        except TimeoutError:
+            return "unknown"
+        return "sat" if found else "unsat"
+
+    def _search(self):
+        if not self.unassigned:
+            return True
+        # Most-constrained task first (ties: most neighbours)
+        i = min(self.unassigned, key=lambda j: (len(self.domains[j]) / self.spread[j], -len(self.neighbours[j])))
+        self.unassigned.discard(i)
+        values = self.tasks[i].values
+        tried = set()  # (d, idx, room bookings) already explored
+        for v in list(self.domains[i]):
+            self.nodes += 1
+            if self.deadline and self.nodes % 256 == 0 and time.time() > self.deadline:
+                raise TimeoutError
+            if self.max_nodes and self.nodes > self.max_nodes:
+                raise TimeoutError
+            if not self.fits(i, v):
+                continue
+            d, idx = values[v][:2]
+            if values[v][9]:
+                # Rooms booked identically that day are interchangeable: the
+                # same block in another such room leads to a mirrored subtree
+                signature = (d, idx, tuple(self.room_busy[r][d] for r, _ in values[v][9]))
+                if signature in tried:
+                    continue
+                tried.add(signature)
+            self._apply(i, v, 1)
+            trail = []
+            if self._propagate(i, v, trail) and self._search():
+                return True
+            for j, domain in reversed(trail):
+                self.domains[j] = domain
+            self._apply(i, v, -1)
+        self.unassigned.add(i)
+        if self.tracer.debug and len(self.unassigned) == len(self.tasks):
+            self.tracer.emit(DEBUG, "exact", f"  exhausted {self.tasks[i].label}")
+        return False
+
+    def solution(self):
+        return [(task, task.values[self.assigned[task.id]]) for task in self.tasks]
+
+
+def place_labs(model, validator, state, time_limit=LAB_TIME_LIMIT, tracer=None):
+    """
+    Lay out every lab block of the semester at once and place them onto
+    `state` (greedy engine STEP 2). Domains are the (day, start slot, lab
+    room) blocks both teachers and the room are free for, so rooms already
+    held by open electives or other semesters (calendar) are respected and
+    every lab is placed with its room named. The backtracking search
+    (forward checking) enforces the labs-per-day rules across all sections,
+    so an early choice can't strand a later lab.
+    Returns (status, messages): "sat" (all placed), "unsat" (no lab layout
+    exists - messages say why) or "unknown" (time limit - the labs assigned
+    so far are placed, messages name the others).
+    """
+    tracer = tracer or default_tracer
+    demand = {"labs": {(sec, code) for sec in model.sections for code, _, _ in model.labs[sec]},
+              "electives": [], "theory": {}}
+    tasks = compile_tasks(model, validator, state, demand)
+    if not tasks:
+        return "sat", []
+
+    # Restarts with a doubling node budget: a fresh random value order escapes
+    # a bad early branch much sooner than chronological backtracking does
+    deadline = time.time() + time_limit
+    budget, restarts, nodes = LAB_RESTART_NODES, 0, 0
+    while True:
+        left = deadline - time.time()
+        solver = BacktrackingSolver(model, validator, state, tasks, max(left, 0.001), tracer, max_nodes=budget)
+        status = solver.solve()
+        nodes += solver.nodes
+        if status != "unknown" or left <= 0 or solver.nodes <= budget:
+            break
+        budget *= 2
+        restarts += 1
+    if tracer.debug:
+        tracer.emit(DEBUG, "labs", f"  Lab layout: {len(tasks)} blocks, {nodes} search nodes, "
+                                   f"{restarts} restarts ({status})")
+
+    conflicts = list(solver.conflicts)
+    for task in tasks:
+        v = solver.assigned[task.id]
+        if v is None:
+            if status == "unknown":
+                conflicts.append(f"{task.label}: not placed within {time_limit:g}s")
+            continue
+        d, idx = task.values[v][:2]
+        (r, _), = task.values[v][9]
+        s = task.sections[0]
+        code, teacher1, teacher2 = next(lab for lab in model.labs[model.sections[s]] if lab[0] == task.code)
+        state.place_lab(s, d, idx, code, teacher1, teacher2, r)
+
+    if status == "unsat" and not conflicts:
+        allowed = {model.two_lab_days_allowed(sec) for sec in model.sections}
+        per_day = ("one day with 2 labs, otherwise 1 per day" if allowed == {1} else
+                   "1 lab per day" if allowed == {0} else "each semester's labs-per-day rule")
+        conflicts.append(f"No layout fits all {len(tasks)} lab blocks: teacher availability, "
+                         f"lab rooms and the lab-day rule ({per_day}) exclude every combination")
+    return status, conflicts
+
+
+def solve_cp_sat(model, validator, state, tasks, time_limit=EXACT_TIME_LIMIT, tracer=default_tracer):
+    """
+    Same model on OR-Tools CP-SAT (one boolean per task value), seeded from
+    `state` like BacktrackingSolver: classes per teacher and day, lab blocks
+    per section and day, lectures already in the rows and free room pools.
+    Returns (status, [(task, value), ...] or None); status as BacktrackingSolver.solve.
+    """
+    labs_on_day, row_code = held_classes(state)
+    room_left = room_pools(state)
+    m = cp_model.CpModel()
+    x = {}
+    cells, teachers, rooms, named, counts, labs = {}, {}, {}, {}, {}, {}
+    rows = {}
+    for task in tasks:
+        lits = []
+        for v, (d, idx, key, task_cells, teach, room_bits, need, counted, penalty, held) in enumerate(task.values):
+            lit = m.NewBoolVar(f"t{task.id}v{v}")
+            x[task.id, v] = lit
+            lits.append(lit)
+            for s, bits in task_cells:
+                for b in _bits(bits):
+                    cells.setdefault((s, d, b), []).append(lit)
+                    if task.runs:
+                        rows.setdefault((s, task.code, d), {}).setdefault(b, []).append(lit)
+            for t, mask in teach:
+                for b in _bits(mask):
+                    teachers.setdefault((t, d, b), []).append(lit)
+            for b in room_bits:
+                rooms.setdefault((task.lab, d, b), []).append((lit, need))
+            for r, mask in held:
+                for b in _bits(mask):
+                    named.setdefault((r, d, b), []).append(lit)
+            for t in counted:
+                counts.setdefault((t, d), []).append(lit)
+            if task.kind == "lab":
+                labs.setdefault((task.sections[0], d), []).append(lit)
+        m.AddExactlyOne(lits)
+
+    for lits in cells.values():
+        m.AddAtMostOne(lits)
+    for lits in teachers.values():
+        m.AddAtMostOne(lits)
+    for lits in named.values():
+        m.AddAtMostOne(lits)
+    for (lab, d, b), terms in rooms.items():
+        m.Add(sum(need * lit for lit, need in terms) <= room_left[lab][d][b])
+    for (t, d), lits in counts.items():
+        limit = validator.max_classes_limit(state.teacher_names[t])
+        if limit is not None:
+            m.Add(sum(lits) <= limit - state.teacher_day_count[t][d])
+
+    # Lab days: sem 3 allows one 2-lab day per section, others max 1 lab per day
+    # (days that already hold labs count, a day with 2 takes no more)
+    doubles = {}
+    for (s, d), lits in labs.items():
+        held = labs_on_day[s][d]
+        if held >= 2:
+            m.Add(sum(lits) == 0)
+        elif model.two_lab_days_allowed(model.sections[s]):
+            y = m.NewBoolVar(f"two_labs_s{s}d{d}")
+            doubles.setdefault(s, []).append(y)
+            m.Add(sum(lits) + held <= 1 + y)
+        else:
+            m.Add(sum(lits) + held <= 1)
+    for s, ys in doubles.items():
+        held = sum(1 for n in labs_on_day[s] if n >= 2)
+        m.Add(sum(ys) <= max(0, model.two_lab_days_allowed(model.sections[s]) - held))
+
+    # No 3 identical lectures in a row (lectures already in the row count as placed)
+    for (s, code, d), per_idx in rows.items():
+        fixed = {idx for idx, held in enumerate(row_code[s][d]) if held == code}
+        for b in set(per_idx) | fixed:
+            window = (b, b + 1, b + 2)
+            if all(i in per_idx or i in fixed for i in window) and any(i in per_idx for i in window):
+                m.Add(sum(lit for i in window for lit in per_idx.get(i, [])) +
+                      sum(1 for i in window if i in fixed) <= 2)
+
+    # Soft: teacher preferences
+    m.Minimize(sum(task.values[v][8] * x[task.id, v]
+                   for task in tasks for v in range(len(task.values)) if task.values[v][8]))
+
+    solver = cp_model.CpSolver()
+    if time_limit:
+        solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.random_seed = model.rng.randrange(1 << 30)
+    status = solver.Solve(m)
+
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        chosen = []
+        for task in tasks:
+            v = next(v for v in range(len(task.values)) if solver.Value(x[task.id, v]))
+            chosen.append((task, task.values[v]))
+        return "sat", chosen
+    if status == cp_model.INFEASIBLE:
+        return "unsat", None
+    return "unknown", None
+
+
+def materialize(model, validator, tracer, solution, state=None):
+    """
+    Turn a solution into a ScheduleState with concrete room names
+    (placed onto `state` if given, else onto a fresh one).
+    Returns (state, labels of tasks that found no room).
+    """
+    if state is None:
+        state = base_state(model, validator, tracer)
+    failed = []
+
+    # Electives and labs take named rooms (labs chose theirs in the search);
+    # lectures only hold capacity and get their rooms from the matching post-pass
+    order = {"elective": 0, "lab": 1, "theory": 2}
+    solution = sorted(solution, key=lambda item: (order[item[0].kind], item[1][0], item[1][5][0] if item[1][5] else 0))
+
+    for task, (d, idx, key, cells, teach, room_bits, need, counted, _, rooms) in solution:
+        if task.kind == "lab":
+            s = task.sections[0]
+            sec = model.sections[s]
+            code, teacher1, teacher2 = next(lab for lab in model.labs[sec] if lab[0] == task.code)
+            (r, mask), = rooms
+            if state.room_busy[r][d] & mask:
+                failed.append(task.label)
+                continue
+            state.place_lab(s, d, idx, code, teacher1, teacher2, r)
+        elif task.kind == "elective":
+            group_mask = 0
+            for s in range(len(model.sections)):
+                group_mask |= state.slot_mask[s][d][idx]
+            free = state.free_rooms(d, group_mask)
+            if len(free) < len(task.code):
+                failed.append(task.label)
+                continue
+            room_map = dict(zip(task.code, free))
+            used_rooms = set()
+            for s, sec in enumerate(model.sections):
+                teachers_dict, rooms_dict = {}, {}
+                for code in task.code:
+                    teacher = model.elective_teachers[sec].get(code)
+                    if teacher:
+                        teachers_dict[code] = teacher
+                        rooms_dict[code] = state.room_names[room_map[code]]
+                        used_rooms.add(room_map[code])
+                state.place_elective(s, d, idx, teachers_dict, rooms_dict)
+            state.book_elective_rooms(d, group_mask, used_rooms)
+        else:
+            s = task.sections[0]
+            teacher = task.teacher
+            if not state.rooms_left(d, state.slot_mask[s][d][idx]):
+                failed.append(task.label)
+                continue
+            state.place_theory(s, d, idx, task.code, teacher, None, model.display_type(task.code))
+
+    for s, d, idx, entry in assign_rooms(state):
+        failed.append(f"{model.sections[s]}/{entry['code']} {model.days[d]}")
+        if entry.get("lab_span"):
+            state.remove_lab(s, d, idx)
+        else:
+            state.remove_theory(s, d, idx)
+    return state, failed
+
+
+def solve_exact(model, validator, tracer=None, time_limit=EXACT_TIME_LIMIT, backend=None):
+    """
+    Solve one semester exactly.
+    backend: "cp-sat", "search" or None (CP-SAT if OR-Tools is installed)
+    Returns the generate_timetable result dict plus "engine" and "status":
+    "sat", "unsat" (proven infeasible), "unknown" (time limit hit) or
+    "room_assignment_failed" (a solution whose classes could not all get a
+    named room). "missing" counts the lectures, lab blocks and elective
+    groups left unplaced.
+    """
+    from scheduler import generate_html
+
+    tracer = tracer or default_tracer
+    sem = model.sem
+    sections = model.sections
+    if not sections:
+        return {"html": "<h2>No sections found</h2>", "success": False, "engine": "exact", "status": "unsat",
+                "missing": 0, "violations": 0, "penalty": 0}
+    if backend is None:
+        backend = "cp-sat" if cp_model is not None else "search"
+    if backend == "cp-sat" and cp_model is None:
+        raise ValueError("backend 'cp-sat' needs OR-Tools (pip install ortools)")
+
+    tracer.emit(INFO, "setup", f"\n=== EXACT CONSTRAINT SOLVER FOR SEMESTER {sem} ({backend}) ===")
+    started = time.time()
+
+    state = base_state(model, validator, tracer)
+    tasks = compile_tasks(model, validator, state)
+    tracer.emit(INFO, "exact", f"  Model: {len(tasks)} variables, "
+                                f"{sum(len(t.values) for t in tasks)} candidate placements")
+
+    conflicts = []
+    if backend == "cp-sat":
+        status, solution = solve_cp_sat(model, validator, state, tasks, time_limit, tracer)
+    else:
+        solver = BacktrackingSolver(model, validator, state, tasks, time_limit, tracer)
+        status = solver.solve()
+        solution = solver.solution() if status == "sat" else None
+        conflicts = solver.conflicts
+        tracer.emit(INFO, "exact", f"  Search nodes: {solver.nodes}")
+
+    elapsed = time.time() - started
+    result = {"success": False, "schedule": {}, "time_slots": model.time_slots, "days": model.days,
+              "sections": sections, "engine": "exact", "status": status}
+
+    if status != "sat":
+        # Nothing of the search is kept: everything it had to place is missing
+        violations, warnings = validator.validate_schedule(state.scheduled_classes(sem))
+        result.update({"missing": len(tasks), "violations": len(violations),
+                       "penalty": sum(w['penalty'] for w in warnings)})
+
+    if status == "unsat":
+        tracer.emit(INFO, "report", f"\n❌ PROVEN INFEASIBLE in {elapsed:.2f}s: no timetable satisfies every hard constraint")
+        for message in conflicts[:10]:
+            tracer.emit(INFO, "report", f"  ❌ {message}")
+        details = "".join(f"<li>{message}</li>" for message in conflicts)
+        result["html"] = (f"<h2>Semester {sem}: no timetable satisfies every hard constraint</h2>"
+                          f"<ul>{details}</ul>")
+        return result
+    if status == "unknown":
+        tracer.emit(INFO, "report", f"\n⏱️ Time limit ({time_limit}s) reached without a solution or a proof")
+        result["html"] = f"<h2>Semester {sem}: exact solver hit its {time_limit}s time limit</h2>"
+        return result
+
+    state, failed = materialize(model, validator, tracer, solution)
+    if failed:
+        # The search only counted room capacity; matching named rooms can still fail
+        tracer.emit(INFO, "report", f"\n❌ Room assignment failed for: {', '.join(failed)}")
+        result["status"] = "room_assignment_failed"
+    else:
+        tracer.emit(INFO, "report", f"\n✅ PERFECT! ALL LECTURES SCHEDULED! 🎉🎉🎉 ({elapsed:.2f}s)")
+
+    violations, warnings = validator.validate_schedule(state.scheduled_classes(sem))
+    tracer.emit(INFO, "report", f"  Hard constraint violations: {len(violations)}, preference warnings: {len(warnings)}")
+
+    schedule = state.to_schedule()
+    result.update({
+        "success": not failed and not violations,
+        "schedule": schedule,
+        "html": generate_html(sem, sections, model.days, model.time_slots, schedule),
+        "missing": len(failed),
+        "violations": len(violations),
+        "penalty": sum(w['penalty'] for w in warnings)
+    })
+    return result
@@ -0,0 +1,72 @@
+"""
+Unmet Theory Demand Tracker
+Remaining lectures per (section, subject), kept together with the total,
+the per-section counts and the list of stuck (section, subject) pairs, all
+updated on every place/unplace - so "anything left?", "how many?" and "pick
+a stuck lecture" never re-scan the demand table.
+"""
+
+
+class DemandTracker:
+    """Theory lectures still to place for one semester"""
+
+    def __init__(self, model, on_change=None):
+        """on_change(total remaining) is called after every update (live progress)"""
+        self.remaining = model.theory_demand()
+        self.teacher = {(sec, code): teacher for sec in model.sections
+                        for code, teacher, _ in model.theory[sec]}
+        self.per_section = {sec: sum(codes.values()) for sec, codes in self.remaining.items()}
+        self.total = sum(self.per_section.values())
+        self.on_change = on_change
+
+        # Stuck pairs in a list (O(1) random pick) + position index (O(1) removal)
+        self.stuck = []
+        self._pos = {}
+        for sec, codes in self.remaining.items():
+            for code, n in codes.items():
+                if n > 0:
+                    self._add_stuck((sec, code))
+
+    def need(self, sec, code):
+        return self.remaining[sec][code]
+
+    def placed(self, sec, code, n=1):
+        """n lectures of sec/code were placed"""
+        self._update(sec, code, -n)
+
+    def unplaced(self, sec, code, n=1):
+        """n lectures of sec/code were removed again"""
+        self._update(sec, code, n)
+
+    def stuck_lectures(self):
+        """(section, code, teacher) of every demand with lectures left (a new list)"""
+        return [(sec, code, self.teacher[(sec, code)]) for sec, code in self.stuck]
+
+    def missing(self):
+        """{section: {code: n}} of what is left, only non-zero entries"""
+        return {sec: {code: n for code, n in codes.items() if n > 0}
+                for sec, codes in self.remaining.items() if self.per_section[sec] > 0}
+
+    def _update(self, sec, code, step):
+        before = self.remaining[sec][code]
+        after = before + step
+        self.remaining[sec][code] = after
+        self.per_section[sec] += step
+        self.total += step
+        if before > 0 >= after:
+            self._remove_stuck((sec, code))
+        elif after > 0 >= before:
+            self._add_stuck((sec, code))
+        if self.on_change is not None:
+            self.on_change(self.total)
+
+    def _add_stuck(self, key):
+        self._pos[key] = len(self.stuck)
+        self.stuck.append(key)
+
+    def _remove_stuck(self, key):
+        i = self._pos.pop(key)
+        last = self.stuck.pop()
+        if last != key:
+            self.stuck[i] = last
+            self._pos[last] = i
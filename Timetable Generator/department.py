@@ -0,0 +1,300 @@
+"""
+Joint Department-wide Generation
+Schedules several semesters against one shared ResourceCalendar so no
+teacher or room is double-booked across semesters. Semesters that share a
+teacher or a room are solved one after another; groups of semesters that
+can't interact run concurrently.
+
+Labs are the scarce part (a few lab rooms for every semester), so a group's
+lab blocks are laid out first, all semesters in one search, and pinned;
+each semester then only schedules its lectures around the calendar. When no
+joint timetable is found the semesters are generated independently and the
+cross-semester clashes are reported instead.
+"""
+
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from constraint_validator import ConstraintValidator
+from cp_engine import base_state, place_labs
+from problem_model import ProblemModel, ALL_DAYS
+from resource_calendar import ResourceCalendar
+from schedule_state import ScheduleState
+from tracing import default_tracer, null_tracer, INFO
+
+# Rounds per interacting group (failed semesters go first in the next round)
+MAX_ROUNDS = 3
+
+# ⏱️ Budget for laying out the labs of a whole group
+DEPARTMENT_LAB_TIME_LIMIT = 5.0
+
+
+def _footprint(model):
+    """Teachers and rooms a semester can use (rooms: the pool of every kind of class it holds)"""
+    teachers = {t for t in model.teacher_sections if t}
+    rooms = {room for *_, room in model.open_electives}
+    for sec in model.sections:
+        for code, teacher1, teacher2 in model.labs[sec]:
+            teachers.update((teacher1, teacher2))
+        teachers.update(model.elective_teachers[sec].values())
+        if model.labs[sec]:
+            rooms.update(r["name"] for r in model.classrooms if r["is_lab"] == "yes")
+        if model.theory[sec] or model.elective_teachers[sec]:
+            rooms.update(r["name"] for r in model.classrooms if r["is_lab"] == "no")
+    return teachers, rooms
+
+
+def interaction_groups(models):
+    """
+    Split semesters into groups that can be solved independently: two
+    semesters interact if they share a teacher or a room.
+    """
+    sems = list(models)
+    footprints = {sem: _footprint(models[sem]) for sem in sems}
+    parent = {sem: sem for sem in sems}
+
+    def find(sem):
+        while parent[sem] != sem:
+            sem = parent[sem]
+        return sem
+
+    for i, a in enumerate(sems):
+        for b in sems[i + 1:]:
+            teachers_a, rooms_a = footprints[a]
+            teachers_b, rooms_b = footprints[b]
+            if teachers_a & teachers_b or rooms_a & rooms_b:
+                parent[find(a)] = find(b)
+
+    groups = {}
+    for sem in sems:
+        groups.setdefault(find(sem), []).append(sem)
+    return list(groups.values())
+
+
+def _demand(model):
+    """Slots a semester needs (hardest semesters are scheduled first)"""
+    return sum(sum(sub["l"] for _, _, sub in model.theory[sec]) + 2 * len(model.labs[sec])
+               for sec in model.sections)
+
+
+def book_open_electives(calendar, model):
+    """Pre-book a semester's fixed open electives"""
+    for sec, code, teacher, day, slot_idx, room in model.open_electives:
+        slots = model.time_slots.get((sec, day), [])
+        if slot_idx < len(slots):
+            start, end = slots[slot_idx]
+            calendar.book(model.sem, "teacher", teacher, day, start, end, f"{sec}/{code}")
+            calendar.book(model.sem, "room", room, day, start, end, f"{sec}/{code}")
+
+
+def book_pinned_labs(calendar, model):
+    """Pre-book a semester's pinned lab blocks (both teachers and the lab room)"""
+    for sec, code, teacher1, teacher2, day, slot_idx, room in model.pinned_labs:
+        slots = model.time_slots[(sec, day)]
+        start, end = slots[slot_idx][0], slots[slot_idx + 1][1]
+        for kind, name in (("teacher", teacher1), ("teacher", teacher2), ("room", room)):
+            calendar.book(model.sem, kind, name, day, start, end, f"{sec}/{code} lab")
+
+
+def missing_labs(model, result):
+    """"sec/code" of every lab of the semester the result's schedule doesn't hold"""
+    placed = {(sec, entry["code"]) for (sec, day, idx), entry in result.get("schedule", {}).items()
+              if entry.get("lab_span")}
+    return [f"{sec}/{code}" for sec in model.sections for code, _, _ in model.labs[sec]
+            if (sec, code) not in placed]
+
+
+class DepartmentLabModel:
+    """
+    The lab blocks of several semesters as one problem for cp_engine.place_labs:
+    sections are "sem/sec", the open electives of every semester are placed,
+    and each section keeps its own semester's labs-per-day rule.
+    """
+
+    def __init__(self, models):
+        self.models = models
+        self.sem = "+".join(models)
+        self.calendar = None
+        self.days = [day for day in ALL_DAYS if any(day in model.days for model in models.values())]
+        self.classrooms = next(iter(models.values())).classrooms
+        self.sections, self.owner = [], {}
+        self.time_slots, self.labs, self.open_electives = {}, {}, []
+        for sem, model in models.items():
+            for sec in model.sections:
+                key = f"{sem}/{sec}"
+                self.sections.append(key)
+                self.owner[key] = (sem, sec)
+                self.labs[key] = model.labs[sec]
+                for day in model.days:
+                    if (sec, day) in model.time_slots:
+                        self.time_slots[(key, day)] = model.time_slots[(sec, day)]
+            self.open_electives += [(f"{sem}/{sec}",) + tuple(rest) for sec, *rest in model.open_electives]
+        # Nothing but labs is searched for
+        self.theory = {key: [] for key in self.sections}
+        self.electives = []
+        self.elective_teachers = {key: {} for key in self.sections}
+        self.pinned_labs = []
+        self.rng = random.Random()
+
+    def new_state(self):
+        return ScheduleState(self.sections, self.days, self.time_slots, self.classrooms)
+
+    def two_lab_days_allowed(self, key):
+        sem, sec = self.owner[key]
+        return self.models[sem].two_lab_days_allowed(sec)
+
+
+def lay_out_labs(models, tracer=null_tracer, time_limit=DEPARTMENT_LAB_TIME_LIMIT, seed=None):
+    """
+    Place the labs of every semester in `models` at once, so no semester's
+    labs take the lab rooms another one can't do without.
+    Returns ({sem: [(sec, code, day, slot_idx, room), ...]}, None), or
+    (None, messages) when no layout was found.
+    """
+    joint = DepartmentLabModel(models)
+    joint.rng.seed(seed)
+    validator = ConstraintValidator(tracer=null_tracer)
+    state = base_state(joint, validator, tracer)
+    status, messages = place_labs(joint, validator, state, time_limit, tracer)
+    if status != "sat":
+        return None, messages or [f"no lab layout found within {time_limit:g}s"]
+
+    pinned = {sem: [] for sem in models}
+    for s, key in enumerate(joint.sections):
+        sem, sec = joint.owner[key]
+        for d, day in enumerate(joint.days):
+            for idx, entry in enumerate(state.cells[s][d]):
+                if entry is not None and entry.get("lab_span"):
+                    pinned[sem].append((sec, entry["code"], day, idx, entry["room"]))
+    return pinned, None
+
+
+def _solve_group(data, sems, options, tracer=null_tracer):
+    """
+    Solve interacting semesters on a shared calendar: labs laid out jointly,
+    then each semester's lectures one after another.
+    Returns (results, clashes, mode) - mode "joint", or "independent" when
+    the semesters had to be generated without the shared calendar.
+    """
+    from scheduler import generate_timetable
+
+    pinned, problems = lay_out_labs({sem: ProblemModel(data, sem) for sem in sems}, tracer,
+                                    seed=options.get("seed"))
+    if pinned is None:
+        tracer.emit(INFO, "department", f"\n⚠️  No joint lab layout for semesters {list(sems)}: "
+                                        f"{problems[0]}")
+        return _solve_independently(data, sems, options, tracer)
+    models = {sem: ProblemModel(data, sem, pinned_labs=pinned[sem]) for sem in sems}
+
+    def book_fixed(calendar, sem):
+        book_open_electives(calendar, models[sem])
+        book_pinned_labs(calendar, models[sem])
+
+    order = list(sems)
+    for round_num in range(MAX_ROUNDS):
+        if round_num:
+            tracer.emit(INFO, "department", f"\n🔄 Department round {round_num + 1}: order {order}")
+        calendar = ResourceCalendar()
+        # Open electives and the lab layout are fixed: every semester works around all of them
+        for sem in order:
+            book_fixed(calendar, sem)
+
+        results, clashes = {}, []
+        for sem in order:
+            result = generate_timetable(data, sem, tracer=tracer, calendar=calendar,
+                                        pinned_labs=pinned[sem], **options)
+            calendar.release(sem)
+            if result.get("success"):
+                clashes += calendar.book_result(sem, result)
+            else:
+                book_fixed(calendar, sem)
+            results[sem] = result
+
+        if any(result.get("cancelled") for result in results.values()):
+            return results, clashes, "joint"
+        failed = [sem for sem in order if not results[sem].get("success")]
+        if not failed and not clashes:
+            return results, clashes, "joint"
+        order = failed + [sem for sem in order if sem not in failed]
+
+    tracer.emit(INFO, "department", f"\n⚠️  No joint timetable for semesters {list(sems)} "
+                                    f"after {MAX_ROUNDS} rounds")
+    return _solve_independently(data, sems, options, tracer)
+
+
+def _solve_independently(data, sems, options, tracer=null_tracer):
+    """Fallback: every semester on its own, cross-semester clashes only reported"""
+    from scheduler import generate_timetable
+
+    tracer.emit(INFO, "department", f"  Generating semesters {list(sems)} independently")
+    calendar = ResourceCalendar()
+    results, clashes = {}, []
+    for sem in sems:
+        results[sem] = generate_timetable(data, sem, tracer=tracer, **options)
+        if results[sem].get("success"):
+            clashes += calendar.book_result(sem, results[sem])
+    return results, clashes, "independent"
+
+
+def _timed(solve, data, sems, options, tracer=null_tracer):
+    """solve(...)'s (results, clashes, mode) plus the seconds the group took"""
+    started = time.time()
+    return solve(data, sems, options, tracer) + (time.time() - started,)
+
+
+def generate_department(data, sems=("3", "5", "7"), tracer=None, workers=None, mode="joint", **options):
+    """
+    Generate several semesters as one conflict-free department timetable.
+    workers: processes for independent semester groups (1 = all in-process;
+             progress/cancel callbacks always keep it in-process)
+    mode: "joint" (shared calendar, falls back to "independent" per group
+          when no joint timetable is found) or "independent" (each semester
+          on its own, cross-semester clashes only reported)
+    options: passed on to generate_timetable (engine, seed, cache, ...)
+    Returns {"results": {sem: result}, "success": bool, "clashes": [...],
+             "missing_labs": {sem: ["sec/code", ...]}, "groups": [[sem, ...]],
+             "modes": {sem: "joint" | "independent"}, "seconds": [per group]}
+    success: every semester complete (all lectures and labs placed) and no clashes
+    """
+    if mode not in ("joint", "independent"):
+        raise ValueError(f"Unknown mode '{mode}' (use 'joint' or 'independent')")
+    tracer = tracer or default_tracer
+    models = {sem: ProblemModel(data, sem) for sem in sems}
+    if mode == "independent":
+        groups = [list(sems)]
+        outcomes = [_timed(_solve_independently, data, sems, options, tracer)]
+    else:
+        groups = interaction_groups(models)
+        groups = [sorted(group, key=lambda sem: -_demand(models[sem])) for group in groups]
+        tracer.emit(INFO, "department", f"\n🏫 DEPARTMENT GENERATION: semesters {list(sems)} in "
+                                        f"{len(groups)} independent group(s) {groups}")
+        # Callbacks (progress, cancel event) can't be pickled into worker processes
+        in_process = workers == 1 or options.get("progress") is not None or options.get("cancel") is not None
+        if len(groups) > 1 and not in_process:
+            with ProcessPoolExecutor(max_workers=workers or len(groups)) as pool:
+                futures = [pool.submit(_timed, _solve_group, data, group, options) for group in groups]
+                outcomes = [future.result() for future in futures]
+        else:
+            outcomes = [_timed(_solve_group, data, group, options, tracer) for group in groups]
+
+    results, clashes, modes, seconds = {}, [], {}, []
+    for group, (group_results, group_clashes, group_mode, group_seconds) in zip(groups, outcomes):
+        results.update(group_results)
+        clashes += group_clashes
+        modes.update(dict.fromkeys(group, group_mode))
+        seconds.append(group_seconds)
+
+    # "success" alone isn't enough: check every lecture and lab made it in
+    missing = {sem: missing_labs(models[sem], results[sem]) for sem in sems}
+    complete = all(results[sem].get("success") and not results[sem].get("missing") and not missing[sem]
+                   for sem in sems)
+    success = complete and not clashes
+    if clashes:
+        tracer.emit(INFO, "department", f"\n⚠️  {len(clashes)} cross-semester clashes:")
+        for clash in clashes[:10]:
+            tracer.emit(INFO, "department", f"  ❌ {clash}")
+    elif success:
+        tracer.emit(INFO, "department", "\n✅ Department timetable is conflict-free across all semesters")
+    return {"results": {sem: results[sem] for sem in sems}, "success": success, "clashes": clashes,
+            "missing_labs": missing, "groups": groups, "modes": modes, "seconds": seconds}
@@ -7,6 +7,7 @@ Run this to verify that constraints are properly saved and detected
 import json
 import os
 from constraint_validator import ConstraintValidator
+from tracing import Tracer, TRACE
 
 print("=" * 80)
 print("TEACHER CONSTRAINT DIAGNOSTIC TOOL")
@@ -74,7 +75,7 @@ start_time = input("Enter start time (e.g., 1:05 PM): ").strip()
 end_time = input("Enter end time (e.g., 2:00 PM): ").strip()
 
 # Create validator and test
-validator = ConstraintValidator()
+validator = ConstraintValidator(tracer=Tracer(TRACE))  # show every check
 print(f"\n🔍 Testing: {teacher_code} on {day} from {start_time} to {end_time}")
 print("-" * 80)
 
@@ -0,0 +1,138 @@
+"""
+Ejection-Chain Repair for Stuck Lectures
+When a lecture has no free feasible cell, displace ONE blocker - the lecture
+in the target cell, or the teacher's own lecture in another section at that
+time (a Kempe-style swap of the teacher's timetable) - place the stuck
+lecture there and recursively re-place the displaced one, up to MAX_DEPTH
+levels. A failed chain is rolled back completely. Blockers are found through
+the state's per-teacher lecture index, never by scanning the timetable, and
+the objective engine rejects any step that adds a hard violation.
+"""
+
+from objective import is_lecture
+
+# 🔗 Displacements per chain and search nodes per stuck lecture
+MAX_DEPTH = 4
+MAX_NODES = 500
+
+
+class EjectionChains:
+    """Multi-step repair on a ScheduleState with an attached ObjectiveEngine"""
+
+    def __init__(self, model, validator, state, objective, max_depth=MAX_DEPTH, max_nodes=MAX_NODES):
+        self.model = model
+        self.validator = validator
+        self.state = state
+        self.objective = objective
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.log = []        # ("place" | "remove", s, d, idx, entry) for rollback
+        self.locked = set()  # cells placed by the current chain (never ejected again)
+        self.nodes = 0
+        self.chains = 0      # successful insertions that needed displacements
+        self.displaced = 0   # lectures moved by successful chains
+        self.rollbacks = 0   # failed branches undone
+
+    def insert(self, sec, code, teacher):
+        """Place one more lecture of sec/code; True if it (and every displaced lecture) found a cell"""
+        self.log = []
+        self.locked = set()
+        self.nodes = 0
+        placed = self._insert(self.state.sec_id[sec], code, teacher,
+                              self.model.display_type(code), self.max_depth)
+        if not placed:
+            self._rollback(0)
+        elif len(self.log) > 1:
+            self.chains += 1
+            self.displaced += sum(1 for step in self.log if step[0] == "remove")
+        return placed
+
+    # ------------------------------------------------------------ search
+
+    def _insert(self, s, code, teacher, display_type, depth):
+        self.nodes += 1
+        direct, ejecting = self._candidates(s, code, teacher)
+        self.model.rng.shuffle(direct)
+        for d, idx, _ in direct:
+            if self._try_place(s, d, idx, code, teacher, display_type):
+                return True
+        if depth == 0:
+            return False
+
+        self.model.rng.shuffle(ejecting)
+        for d, idx, (bs, bd, bidx) in ejecting:
+            if self.nodes >= self.max_nodes:
+                return False
+            mark = len(self.log)
+            blocker = self._remove(bs, bd, bidx)
+            if self._try_place(s, d, idx, code, teacher, display_type):
+                self.locked.add((s, d, idx))
+                if self._insert(bs, blocker["code"], blocker["teacher"], blocker["type"], depth - 1):
+                    return True
+                self.locked.discard((s, d, idx))
+            self._rollback(mark)
+        return False
+
+    def _candidates(self, s, code, teacher):
+        """
+        (direct, ejecting) cells of section s for this lecture:
+        direct = [(d, idx, None)] free cells with the teacher free,
+        ejecting = [(d, idx, blocker cell)] cells that one displacement would free
+        """
+        state = self.state
+        t = state.teacher_id(teacher)
+        index = state.teacher_lectures[t]
+        direct, ejecting = [], []
+        for d, day in enumerate(self.model.days):
+            busy = state.teacher_busy[t][d]
+            for idx, mask in enumerate(state.slot_mask[s][d]):
+                blocker = None
+                entry = state.cells[s][d][idx]
+                if entry is not None:
+                    if not is_lecture(entry) or entry["code"] == code or (s, d, idx) in self.locked:
+                        continue
+                    blocker = (s, d, idx)
+                if busy & mask:
+                    # Only the teacher's own single lecture at this time can be moved away
+                    owners = [cell for cell in index
+                              if cell[1] == d and state.slot_mask[cell[0]][d][cell[2]] & mask]
+                    if blocker is not None or len(owners) != 1 or owners[0] in self.locked:
+                        continue
+                    blocker = owners[0]
+                    if busy & mask & ~state.slot_mask[blocker[0]][d][blocker[2]]:
+                        continue  # also busy with a lab, elective or other semester
+                start_time, end_time = state.slots[s][d][idx]
+                if not self.validator.is_available_minutes(teacher, day, start_time, end_time)[0]:
+                    continue
+                (direct if blocker is None else ejecting).append((d, idx, blocker))
+        return direct, ejecting
+
+    # ----------------------------------------------------------- changes
+
+    def _try_place(self, s, d, idx, code, teacher, display_type):
+        """Place if room capacity is left and no hard violation is added"""
+        state = self.state
+        if not state.rooms_left(d, state.slot_mask[s][d][idx]):
+            return False
+        hard = self.objective.hard
+        state.place_theory(s, d, idx, code, teacher, None, display_type)
+        if self.objective.hard > hard:
+            state.remove_theory(s, d, idx)
+            return False
+        self.log.append(("place", s, d, idx, None))
+        return True
+
+    def _remove(self, s, d, idx):
+        entry = self.state.remove_theory(s, d, idx)
+        self.log.append(("remove", s, d, idx, entry))
+        return entry
+
+    def _rollback(self, mark):
+        if len(self.log) > mark:
+            self.rollbacks += 1
+        while len(self.log) > mark:
+            action, s, d, idx, entry = self.log.pop()
+            if action == "place":
+                self.state.remove_theory(s, d, idx)
+            else:
+                self.state.restore_theory(s, d, idx, entry)
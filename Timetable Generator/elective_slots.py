@@ -0,0 +1,131 @@
+"""
+Indexed Elective-Group Slot Search
+Elective lecture k of every basket sits at the same slot index in every
+section, with every elective teacher of every section available and free.
+Instead of testing each (day, slot index) against all sections and teachers,
+candidates are masks of slot INDEXES per day:
+  - static: the index exists in every section and all of the group's
+    teachers are available then (asked from the validator once)
+  - dynamic: occupied cells, plus busy teacher times mapped from time bits
+    to slot indexes through a per-section lookup table
+so finding a group's slots is a handful of ANDs, and its rooms come straight
+from the state's free-room index.
+"""
+
+
+def _slot_bits(mask):
+    """Bit indexes of a mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ElectiveSlots:
+    """Candidate slots and placement of the elective lecture groups of one attempt"""
+
+    def __init__(self, model, validator, state):
+        self.model = model
+        self.state = state
+        n_days = len(model.days)
+        n_secs = len(model.sections)
+
+        # bit_slots[s][d][bit] = slot indexes of section s covering that time bit
+        self.bit_slots = [[[0] * len(state.bit_span[d]) for d in range(n_days)] for _ in range(n_secs)]
+        for s in range(n_secs):
+            for d in range(n_days):
+                for idx, mask in enumerate(state.slot_mask[s][d]):
+                    for bit in _slot_bits(mask):
+                        self.bit_slots[s][d][bit] |= 1 << idx
+
+        # Slot indexes that exist in every section
+        common = []
+        for d in range(n_days):
+            mask = -1
+            for s in range(n_secs):
+                mask &= (1 << len(state.slots[s][d])) - 1
+            common.append(mask if n_secs else 0)
+
+        # 🎯 One group per lecture number: (codes, [(s, code, teacher, t)], static mask per day)
+        available = {}  # (teacher, s) -> slot-index mask per day
+        self.groups = []
+        max_lectures = max([e["l"] for e in model.electives], default=0)
+        for lec_num in range(max_lectures):
+            codes = [e["code"] for e in model.electives if lec_num < e["l"]]
+            pairs = []
+            static = list(common)
+            for s, sec in enumerate(model.sections):
+                for code in codes:
+                    teacher = model.elective_teachers[sec].get(code)
+                    if not teacher:
+                        continue
+                    pairs.append((s, code, teacher, state.teacher_id(teacher)))
+                    if (teacher, s) not in available:
+                        available[(teacher, s)] = [self._available(validator, teacher, s, d) for d in range(n_days)]
+                    for d in range(n_days):
+                        static[d] &= available[(teacher, s)][d]
+            self.groups.append((codes, pairs, static))
+
+    def _available(self, validator, teacher, s, d):
+        """Slot indexes of section s on day d the teacher's availability allows"""
+        day = self.model.days[d]
+        mask = 0
+        for idx, (start_time, end_time) in enumerate(self.state.slots[s][d]):
+            if validator.is_available_minutes(teacher, day, start_time, end_time)[0]:
+                mask |= 1 << idx
+        return mask
+
+    # -------------------------------------------------------------- queries
+
+    def busy_slots(self, s, t, d):
+        """Slot indexes of section s whose time overlaps something teacher t already does"""
+        per_bit = self.bit_slots[s][d]
+        mask = 0
+        for bit in _slot_bits(self.state.teacher_busy[t][d]):
+            mask |= per_bit[bit]
+        return mask
+
+    def candidates(self, lec_num, d):
+        """Slot-index mask where elective lecture group lec_num can go on day d"""
+        state = self.state
+        _, pairs, static = self.groups[lec_num]
+        free = static[d]
+        for s in range(len(state.sections)):
+            free &= ~state.cell_mask[s][d]
+        for s, _, _, t in pairs:
+            if not free:
+                break
+            free &= ~self.busy_slots(s, t, d)
+        return free
+
+    def group_mask(self, d, idx):
+        """Time bits of slot index idx across all sections (rooms are held for all of them)"""
+        mask = 0
+        for s in range(len(self.state.sections)):
+            mask |= self.state.slot_mask[s][d][idx]
+        return mask
+
+    # ------------------------------------------------------------ placement
+
+    def place(self, lec_num):
+        """Place group lec_num at the first day / slot with a room per elective; True if placed"""
+        state = self.state
+        codes, pairs, _ = self.groups[lec_num]
+        for d in range(len(state.days)):
+            for idx in _slot_bits(self.candidates(lec_num, d)):
+                group_mask = self.group_mask(d, idx)
+                rooms = state.free_rooms(d, group_mask)
+                if len(rooms) < len(codes):
+                    continue
+                room_map = dict(zip(codes, rooms))
+                teachers = [{} for _ in state.sections]
+                for s, code, teacher, _ in pairs:
+                    teachers[s][code] = teacher
+                used_rooms = set()
+                for s in range(len(state.sections)):
+                    rooms_dict = {code: state.room_names[room_map[code]] for code in teachers[s]}
+                    used_rooms.update(room_map[code] for code in teachers[s])
+                    state.place_elective(s, d, idx, teachers[s], rooms_dict)
+                state.book_elective_rooms(d, group_mask, used_rooms)
+                return True
+        return False
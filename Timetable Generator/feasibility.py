@@ -0,0 +1,183 @@
+"""
+Fast Feasibility Pre-check
+Necessary conditions checked in milliseconds before any search. Each one is a
+relaxation of the real problem, so a failed check PROVES no timetable exists
+and names the over-subscribed teacher, section or room type:
+  - section demand vs free slots
+  - section theory lectures vs slots their teachers are available for (matching)
+  - teacher classes vs non-overlapping available slots and max classes per day
+  - teacher theory lectures vs distinct available times (matching)
+  - section labs vs days with a 2-slot block both lab teachers can take (matching)
+  - lab blocks / lectures vs lab rooms / theory rooms x non-overlapping slot times
+"""
+
+from cp_engine import base_state
+from room_assignment import max_matching
+from tracing import default_tracer, null_tracer, INFO
+
+
+def _max_disjoint(intervals):
+    """Most non-overlapping (start, end) intervals that can be picked at once"""
+    count, last_end = 0, None
+    for start, end in sorted(set(intervals), key=lambda iv: iv[1]):
+        if last_end is None or start >= last_end:
+            count += 1
+            last_end = end
+    return count
+
+
+def _unmatched(candidates, capacity=None):
+    """Indexes of the units a maximum bipartite matching leaves unmatched"""
+    return [u for u, v in enumerate(max_matching(candidates, capacity)) if v is None]
+
+
+def _short(codes):
+    """"CODE x2, OTHER" summary of unmatched lecture codes"""
+    counts = {}
+    for code in codes:
+        counts[code] = counts.get(code, 0) + 1
+    return ", ".join(code if n == 1 else f"{code} x{n}" for code, n in counts.items())
+
+
+def check_feasibility(model, validator):
+    """Diagnosis messages (empty list = no capacity or matching bound is violated)"""
+    state = base_state(model, validator, null_tracer)
+    days = model.days
+    problems = []
+
+    def available(teacher, s, d, idx, span=1):
+        """Teacher can take the slot (or span of slots): availability and other semesters"""
+        slots = state.slots[s][d]
+        mask = 0
+        for i in range(idx, idx + span):
+            mask |= state.slot_mask[s][d][i]
+        if state.teacher_busy[state.teacher_id(teacher)][d] & mask:
+            return False
+        return validator.is_available_minutes(teacher, days[d], slots[idx][0], slots[idx + span - 1][1])[0]
+
+    def lab_blocks(s, d):
+        slots = state.slots[s][d]
+        return [idx for idx in range(len(slots) - 1) if slots[idx][1] == slots[idx + 1][0]
+                and not state.cell_mask[s][d] & (3 << idx)]
+
+    max_lectures = max([e["l"] for e in model.electives], default=0)
+    group_rooms = [sum(1 for e in model.electives if k < e["l"]) for k in range(max_lectures)]
+
+    # 📋 Sections: demand vs free slots, theory lectures vs teacher-available slots
+    for s, sec in enumerate(model.sections):
+        theory = sum(sub["l"] for _, _, sub in model.theory[sec])
+        labs = len(model.labs[sec])
+        free = sum(len(row) for row in state.cells[s]) - sum(m.bit_count() for m in state.cell_mask[s])
+        need = theory + 2 * labs + max_lectures
+        if need > free:
+            problems.append(f"Section {sec}: needs {need} slots ({theory} theory, {2 * labs} lab, "
+                            f"{max_lectures} elective) but only {free} are free")
+            continue
+        units, candidates = [], []
+        for code, teacher, sub in model.theory[sec]:
+            cells = [(d, idx) for d in range(len(days)) for idx in range(len(state.slots[s][d]))
+                     if state.is_empty(s, d, idx) and available(teacher, s, d, idx)]
+            units += [code] * sub["l"]
+            candidates += [cells] * sub["l"]
+        missing = _unmatched(candidates)
+        if missing:
+            problems.append(f"Section {sec}: only {len(units) - len(missing)} of {len(units)} theory lectures "
+                            f"fit slots their teachers are available for (short: {_short(units[u] for u in missing)})")
+
+    # 👨‍🏫 Teachers: classes vs non-overlapping available slots (and max per day)
+    workload = {}  # teacher -> {"theory": [(s, code)], "labs": n, "electives": {(code, lecture)}}
+    for s, sec in enumerate(model.sections):
+        for code, teacher, sub in model.theory[sec]:
+            workload.setdefault(teacher, {"theory": [], "labs": 0, "electives": set()})["theory"] += [(s, code)] * sub["l"]
+        for code, teacher1, teacher2 in model.labs[sec]:
+            for teacher in (teacher1, teacher2):
+                workload.setdefault(teacher, {"theory": [], "labs": 0, "electives": set()})["labs"] += 1
+        for e in model.electives:
+            teacher = model.elective_teachers[sec].get(e["code"])
+            if teacher:
+                load = workload.setdefault(teacher, {"theory": [], "labs": 0, "electives": set()})
+                load["electives"].update((e["code"], k) for k in range(e["l"]))
+
+    for teacher, load in workload.items():
+        need = len(load["theory"]) + load["labs"] + len(load["electives"])
+        limit = validator.max_classes_limit(teacher)
+        capacity = 0
+        for d in range(len(days)):
+            times = [state.slots[s][d][idx] for s in range(len(model.sections)) for idx in range(len(state.slots[s][d]))
+                     if available(teacher, s, d, idx)]
+            fit = _max_disjoint(times)
+            capacity += fit if limit is None else min(limit, fit)
+        if need > capacity:
+            limit_note = f", max {limit}/day" if limit is not None else ""
+            problems.append(f"Teacher {teacher}: needs {need} classes but at most {capacity} fit "
+                            f"their availability{limit_note}")
+            continue
+        # Distinct times: each lecture claims one time bit of its slot
+        candidates = []
+        for s, code in load["theory"]:
+            candidates.append([(d, bit) for d in range(len(days)) for idx in range(len(state.slots[s][d]))
+                               if available(teacher, s, d, idx)
+                               for bit in range(state.slot_mask[s][d][idx].bit_length())
+                               if (state.slot_mask[s][d][idx] >> bit) & 1])
+        missing = _unmatched(candidates)
+        if missing:
+            problems.append(f"Teacher {teacher}: only {len(candidates) - len(missing)} of {len(candidates)} "
+                            f"theory lectures can get distinct available times "
+                            f"(short: {_short(model.sections[load['theory'][u][0]] + '/' + load['theory'][u][1] for u in missing)})")
+
+    # 🔬 Labs: one lab day each (sem 3: a day may hold 2), both teachers on a 2-slot block
+    per_day = 2 if model.sem == "3" else 1
+    for s, sec in enumerate(model.sections):
+        labs, candidates = [], []
+        for code, teacher1, teacher2 in model.labs[sec]:
+            lab_days = [d for d in range(len(days))
+                        if any(available(teacher1, s, d, idx, 2) and available(teacher2, s, d, idx, 2)
+                               for idx in lab_blocks(s, d))]
+            if not lab_days:
+                problems.append(f"Section {sec}/{code} lab: no day has 2 consecutive free slots "
+                                f"with both {teacher1} and {teacher2} available")
+            labs.append(code)
+            candidates.append(lab_days)
+        missing = [u for u in _unmatched(candidates, dict.fromkeys(range(len(days)), per_day)) if candidates[u]]
+        if missing:
+            problems.append(f"Section {sec}: labs {_short(labs[u] for u in missing)} don't fit - "
+                            f"too few days with a 2-slot block for their teachers")
+
+    # 🏫 Rooms: lab blocks and lectures vs rooms x non-overlapping times per day
+    lab_need = sum(len(model.labs[sec]) for sec in model.sections)
+    lab_fit = sum(_max_disjoint([(state.slots[s][d][idx][0], state.slots[s][d][idx + 1][1])
+                                 for s in range(len(model.sections)) for idx in lab_blocks(s, d)])
+                  for d in range(len(days)))
+    if lab_need > len(state.lab_rooms) * lab_fit:
+        problems.append(f"Lab rooms: {lab_need} lab blocks but {len(state.lab_rooms)} lab rooms "
+                        f"hold at most {len(state.lab_rooms) * lab_fit} per week")
+    theory_need = sum(sub["l"] for sec in model.sections for _, _, sub in model.theory[sec]) + sum(group_rooms)
+    theory_fit = sum(_max_disjoint([slot for s in range(len(model.sections)) for slot in state.slots[s][d]])
+                     for d in range(len(days)))
+    if theory_need > len(state.theory_rooms) * theory_fit:
+        problems.append(f"Classrooms: {theory_need} lectures but {len(state.theory_rooms)} theory rooms "
+                        f"hold at most {len(state.theory_rooms) * theory_fit} per week")
+    return problems
+
+
+def infeasible_result(model, problems, tracer=None, stage="pre-check"):
+    """generate_timetable-style result for an instance ruled out before the search finished"""
+    tracer = tracer or default_tracer
+    tracer.emit(INFO, "report", f"\n❌ INFEASIBLE ({stage}): semester {model.sem} can't be scheduled")
+    for message in problems[:10]:
+        tracer.emit(INFO, "report", f"  ❌ {message}")
+    details = "".join(f"<li>{message}</li>" for message in problems)
+    demand = model.theory_demand()
+    return {
+        "html": f"<h2>Semester {model.sem}: no timetable can satisfy these inputs</h2><ul>{details}</ul>",
+        "success": False,
+        "schedule": {},
+        "time_slots": model.time_slots,
+        "days": model.days,
+        "sections": model.sections,
+        "missing": sum(sum(codes.values()) for codes in demand.values()),
+        "violations": 0,
+        "penalty": 0,
+        "status": "unsat",
+        "diagnosis": problems
+    }
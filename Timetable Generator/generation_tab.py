@@ -4,9 +4,28 @@ from tkinter import ttk, messagebox
 import webbrowser
 import os
 import tempfile
+import threading
+import queue
 from scheduler import generate_timetable
+from department import generate_department
 import schedule_storage
 
+# How often (ms) the UI thread drains progress / result events from the workers
+POLL_INTERVAL = 100
+
+def failure_summary(result):
+    """Why a result is incomplete, as bullet lines for a dialog"""
+    if result.get("diagnosis"):
+        return "\n".join(f"• {message}" for message in result["diagnosis"][:5])
+    lines = []
+    if result.get("missing"):
+        lines.append(f"• {result['missing']} lectures could not be placed")
+    if result.get("violations"):
+        lines.append(f"• {result['violations']} classes break teacher availability")
+    if result.get("status") == "room_assignment_failed":
+        lines.append("• no room could be found for every class")
+    return "\n".join(lines) or "• see the generated page for details"
+
 def create_generation_tab(parent, data):
     """Create the generation tab for section timetables"""
     frame = ttk.Frame(parent)
@@ -29,51 +48,114 @@ def create_generation_tab(parent, data):
             temp_path = f.name
         webbrowser.open('file://' + os.path.realpath(temp_path))
 
-    # SECTION TIMETABLES
-    def generate_sem3():
-        """Generate Semester 3 timetable"""
-        result = generate_timetable(data, "3")
-        if result.get("success"):
-            # SAVE the schedule for later use (for teacher timetables)
-            schedule_storage.save_schedule("3", result.get("schedule", {}), 
-                                          result.get("time_slots", {}),
-                                          result.get("sections", []),
-                                          result.get("days", []))
-            messagebox.showinfo("Success", "✅ Semester 3 timetable generated successfully!")
-        else:
-            messagebox.showerror("Failed", "❌ Failed to generate Semester 3 timetable after 5 attempts.\n\nJust click the button again - it will likely work on the next try!")
-        show_html(result.get("html", "<h2>No data for Sem 3</h2>"))
+    # ⚙️ BACKGROUND JOBS: each generation runs on a worker thread. Workers
+    # never touch Tk - they put events on a queue that the UI thread drains
+    # every POLL_INTERVAL ms, so the window stays responsive.
+    jobs_frame = ttk.LabelFrame(frame, text="  ⏳ Running  ", padding=10)
+    events = queue.Queue()
+    running = {}  # job key -> {"cancel", "row", "bar", "label", "title", "on_done", "total", "sem"}
 
-    def generate_sem5():
-        """Generate Semester 5 timetable"""
-        result = generate_timetable(data, "5")
-        if result.get("success"):
-            # SAVE the schedule for later use (for teacher timetables)
-            schedule_storage.save_schedule("5", result.get("schedule", {}), 
-                                          result.get("time_slots", {}),
-                                          result.get("sections", []),
-                                          result.get("days", []))
-            messagebox.showinfo("Success", "✅ Semester 5 timetable generated successfully!")
-        else:
-            messagebox.showerror("Failed", "❌ Failed to generate Semester 5 timetable after 5 attempts.\n\nJust click the button again - it will likely work on the next try!")
-        show_html(result.get("html", "<h2>No data for Sem 5</h2>"))
+    def start_job(key, title, work, on_done):
+        """Run work(progress, cancel) in the background, on_done(result) back on the UI thread"""
+        if key in running:
+            messagebox.showinfo("Busy", f"⏳ {title} is already being generated.")
+            return
+        cancel = threading.Event()
+
+        if not running:
+            jobs_frame.pack(fill='x', padx=40, pady=(0, 10), before=info_frame)
+        row = ttk.Frame(jobs_frame)
+        row.pack(fill='x', pady=3)
+        label = ttk.Label(row, text=f"{title}: starting...", width=55)
+        label.pack(side='left')
+        bar = ttk.Progressbar(row, length=250, mode='determinate')
+        bar.pack(side='left', padx=10)
+        cancel_button = ttk.Button(row, text="✖ Cancel", width=10)
+        cancel_button.configure(command=lambda: (cancel.set(), cancel_button.state(['disabled']),
+                                                 label.configure(text=f"{title}: cancelling...")))
+        cancel_button.pack(side='left')
+        running[key] = {"cancel": cancel, "row": row, "bar": bar, "label": label, "title": title,
+                        "on_done": on_done, "total": 0, "sem": None}
+
+        def progress(info):
+            events.put(("progress", key, info))
+
+        def run():
+            try:
+                events.put(("done", key, work(progress, cancel)))
+            except Exception as e:
+                events.put(("error", key, e))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def finish_job(key):
+        job = running.pop(key)
+        job["row"].destroy()
+        if not running:
+            jobs_frame.pack_forget()
+        return job
+
+    def poll_events():
+        """UI thread: apply queued progress updates and finished results"""
+        while True:
+            try:
+                kind, key, payload = events.get_nowait()
+            except queue.Empty:
+                break
+            job = running.get(key)
+            if job is None:
+                continue
+            if kind == "progress":
+                if job["cancel"].is_set():
+                    continue
+                if payload["sem"] != job["sem"]:
+                    job["sem"], job["total"] = payload["sem"], 0
+                job["total"] = max(job["total"], payload["remaining"])
+                job["bar"].configure(maximum=job["total"] or 1, value=job["total"] - payload["remaining"])
+                job["label"].configure(text=f"{job['title']}: Sem {payload['sem']} {payload['phase']} - "
+                                            f"{payload['remaining']} left (attempt {payload['attempt']})")
+            elif kind == "done":
+                finish_job(key)["on_done"](payload)
+            else:
+                finish_job(key)
+                messagebox.showerror("Error", f"❌ {job['title']} failed:\n\n{payload}")
+        frame.after(POLL_INTERVAL, poll_events)
+
+    # SECTION TIMETABLES
+    def generate_semester(sem):
+        """Generate one semester's timetable in the background"""
+        start_job(sem, f"Semester {sem}",
+                  lambda progress, cancel: generate_timetable(data, sem, progress=progress, cancel=cancel),
+                  lambda result: semester_done(sem, result))
 
-    def generate_sem7():
-        """Generate Semester 7 timetable"""
-        result = generate_timetable(data, "7")
+    def semester_done(sem, result):
+        if result.get("cancelled"):
+            messagebox.showinfo("Cancelled", f"⏹️ Semester {sem} generation was cancelled.")
+            return
         if result.get("success"):
             # SAVE the schedule for later use (for teacher timetables)
-            schedule_storage.save_schedule("7", result.get("schedule", {}), 
+            schedule_storage.save_schedule(sem, result.get("schedule", {}), 
                                           result.get("time_slots", {}),
                                           result.get("sections", []),
                                           result.get("days", []))
-            messagebox.showinfo("Success", "✅ Semester 7 timetable generated successfully!")
+            messagebox.showinfo("Success", f"✅ Semester {sem} timetable generated successfully!")
         else:
-            messagebox.showerror("Failed", "❌ Failed to generate Semester 7 timetable after 5 attempts.\n\nJust click the button again - it will likely work on the next try!")
-        show_html(result.get("html", "<h2>No data for Sem 7</h2>"))
+            messagebox.showerror("Failed", f"❌ Semester {sem} timetable is incomplete:\n\n{failure_summary(result)}\n\n"
+                                           f"The full report opens in your browser.")
+        show_html(result.get("html", f"<h2>No data for Sem {sem}</h2>"))
 
     def generate_all():
-        """Generate all semester timetables in one page"""
+        """Generate all semester timetables in one page (in the background)"""
+        start_job("all", "All Semesters",
+                  lambda progress, cancel: generate_department(data, ["3", "5", "7"], progress=progress,
+                                                               cancel=cancel),
+                  all_done)
+
+    def all_done(department):
+        if any(result.get("cancelled") for result in department["results"].values()):
+            messagebox.showinfo("Cancelled", "⏹️ All Semesters generation was cancelled.")
+            return
+
         full_html = """<html><head><title>Complete Timetable - All Semesters</title>
         <style>
             body { font-family: Arial, sans-serif; background: #f4f6f9; margin: 40px; }
@@ -91,9 +173,11 @@ def create_generation_tab(parent, data):
         
         success_count = 0
         fail_count = 0
+        failures = []
         
-        for sem in ["3", "5", "7"]:
-            result = generate_timetable(data, sem)
+        # Semesters are generated jointly; a group that had to fall back to
+        # independent generation lists its cross-semester clashes below the timetables
+        for sem, result in department["results"].items():
             if result.get("success"):
                 # SAVE the schedule for later use (for teacher timetables)
                 schedule_storage.save_schedule(sem, result.get("schedule", {}), 
@@ -103,6 +187,7 @@ def create_generation_tab(parent, data):
                 success_count += 1
             else:
                 fail_count += 1
+                failures.append(f"Semester {sem}:\n{failure_summary(result)}")
             
             if "html" in result:
                 html = result["html"]
@@ -113,25 +198,33 @@ def create_generation_tab(parent, data):
             else:
                 full_html += f"<h2 style='background:#e74c3c;'>SEMESTER {sem} - Failed to generate</h2>"
         
+        clashes = department["clashes"]
+        if clashes:
+            items = "".join(f"<li>{clash}</li>" for clash in clashes)
+            full_html += (f"<h2 style='background:#e74c3c;'>{len(clashes)} cross-semester clashes</h2>"
+                          f"<ul>{items}</ul>")
         full_html += "</body></html>"
         show_html(full_html)
         
         # Show summary
-        if fail_count == 0:
+        if fail_count == 0 and clashes:
+            messagebox.showwarning("Clashes", f"✅ All {success_count} semesters generated\n"
+                                              f"⚠️ {len(clashes)} cross-semester teacher/room clashes "
+                                              f"(listed at the end of the page)")
+        elif fail_count == 0:
             messagebox.showinfo("Success", f"✅ All {success_count} semesters generated successfully!")
         else:
             messagebox.showwarning("Partial Success", 
                                   f"✅ {success_count} semester(s) generated successfully\n"
-                                  f"❌ {fail_count} semester(s) failed\n\n"
-                                  f"Just click 'All Semesters' again to retry the failed ones!")
+                                  f"❌ {fail_count} semester(s) failed\n\n" + "\n\n".join(failures))
 
     # Section Timetable Buttons
     ttk.Label(frame, text="📚 SECTION TIMETABLES", font=("Arial", 14, "bold"), foreground="#2c3e50").pack(pady=(10, 15))
     
     # Create button grid
-    ttk.Button(button_frame, text="🎓 Semester 3", command=generate_sem3, width=22).grid(row=0, column=0, padx=10, pady=8)
-    ttk.Button(button_frame, text="🎓 Semester 5", command=generate_sem5, width=22).grid(row=0, column=1, padx=10, pady=8)
-    ttk.Button(button_frame, text="🎓 Semester 7", command=generate_sem7, width=22).grid(row=1, column=0, padx=10, pady=8)
+    ttk.Button(button_frame, text="🎓 Semester 3", command=lambda: generate_semester("3"), width=22).grid(row=0, column=0, padx=10, pady=8)
+    ttk.Button(button_frame, text="🎓 Semester 5", command=lambda: generate_semester("5"), width=22).grid(row=0, column=1, padx=10, pady=8)
+    ttk.Button(button_frame, text="🎓 Semester 7", command=lambda: generate_semester("7"), width=22).grid(row=1, column=0, padx=10, pady=8)
     ttk.Button(button_frame, text="🚀 All Semesters", command=generate_all, width=22).grid(row=1, column=1, padx=10, pady=8)
 
     # Info section
@@ -153,8 +246,13 @@ def create_generation_tab(parent, data):
 
 2. Click "All Semesters" button
    → Generates all 3 semesters in one combined page
+   → Teachers or rooms double-booked across semesters are listed at the end
    → Perfect for printing complete timetables
 
+3. Generation runs in the background
+   → A progress bar shows each running job - several semesters can run at once
+   → Click "✖ Cancel" to stop a job
+
 💾 SAVED DATA:
 
 • Generated schedules are automatically saved to latest_schedules.json
@@ -163,10 +261,10 @@ def create_generation_tab(parent, data):
 
 ⚠️ IF GENERATION FAILS:
 
-• The system tries up to 5 times automatically
-• Failures are rare (<1% chance)
-• If it fails, just click the button again!
-• The randomization means each attempt is different
+• Inputs no timetable can satisfy are reported with the reason
+  (e.g. a teacher available for too few slots)
+• Otherwise the page lists the lectures that could not be placed
+• Fix the inputs named in the report, then generate again
 
 ✨ FEATURES:
 
@@ -184,4 +282,6 @@ def create_generation_tab(parent, data):
                           foreground="#34495e")
     info_label.pack()
 
+    poll_events()
+
     return frame
\ No newline at end of file
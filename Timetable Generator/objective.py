@@ -0,0 +1,210 @@
+"""
+Incremental Objective Engine
+Keeps the hard-violation counts and soft-penalty totals of a ScheduleState
+up to date as cells change. The state notifies the engine after every
+place/remove and only the changed cell, its row and its teachers' day are
+re-evaluated - so "what would this move or swap change?" is answered by
+applying it and reading the totals (then undoing it), at O(1) per cell.
+
+Hard terms:
+  unavailable  - teacher rows placed outside the teacher's availability
+  max_classes  - classes beyond a teacher's max per day
+  runs         - 3 identical lectures in a row (counted per window); as in
+                 the original scheduler, lab subjects' lectures are exempt
+  lab_days     - labs beyond the per-day limit (model.two_lab_days_allowed:
+                 days a section may hold 2)
+Soft terms:
+  preference   - teacher preference penalties
+  clustering   - the same subject more than once on a section's day
+  gaps         - idle slots between a section's first and last class of a day
+"""
+
+# ⚖️ Soft term weights (preference penalties are used as-is)
+CLUSTER_PENALTY = 10  # per extra lecture of a subject on the same day
+GAP_PENALTY = 5       # per idle slot inside a section's day
+
+HARD_TERMS = ("unavailable", "max_classes", "runs", "lab_days")
+SOFT_TERMS = ("preference", "clustering", "gaps")
+
+
+def is_lecture(entry):
+    """Single-slot theory lectures (including the theory part of lab subjects)"""
+    return (entry is not None and entry["type"] in ("theory", "lab") and
+            not entry.get("lab_span") and not entry.get("skip"))
+
+
+def creates_run(codes, idx, code):
+    """Would code at codes[idx] make 3 identical lectures in a row? (codes: lecture code or None per slot)"""
+    def same(i):
+        return 0 <= i < len(codes) and codes[i] == code
+    return ((same(idx - 1) and same(idx - 2)) or
+            (same(idx + 1) and same(idx + 2)) or
+            (same(idx - 1) and same(idx + 1)))
+
+
+def row_gaps(mask):
+    """Empty slots between the first and last occupied slot of a row mask"""
+    if not mask:
+        return 0
+    low = (mask & -mask).bit_length()
+    return mask.bit_length() - low + 1 - mask.bit_count()
+
+
+class ObjectiveEngine:
+    """Hard/soft totals of one ScheduleState, attached as state.objective"""
+
+    def __init__(self, model, validator, state):
+        self.validator = validator
+        self.state = state
+        self.days = model.days
+        self.two_lab_days_allowed = [model.two_lab_days_allowed(sec) for sec in state.sections]
+        n_days = len(state.days)
+
+        self.hard_terms = dict.fromkeys(HARD_TERMS, 0)
+        self.soft_terms = dict.fromkeys(SOFT_TERMS, 0)
+
+        # Per row: lecture code per slot (None for lab subjects - no runs), code counts,
+        # run windows (bit j = run starting at j), gaps
+        self.codes = [[[None] * len(state.slots[s][d]) for d in range(n_days)]
+                      for s in range(len(state.sections))]
+        self.code_count = [[{} for _ in range(n_days)] for _ in state.sections]
+        self.run_starts = [[0] * n_days for _ in state.sections]
+        self.gaps = [[0] * n_days for _ in state.sections]
+
+        # Per cell: (unavailable rows, preference penalty) it contributes
+        self.cell_cost = [[[(0, 0)] * len(state.slots[s][d]) for d in range(n_days)]
+                          for s in range(len(state.sections))]
+
+        # (teacher id, d) -> classes over the limit; per section: labs per day, 2-lab days, labs over 2
+        self.overflow = {}
+        self.labs_on_day = [[0] * n_days for _ in state.sections]
+        self.two_lab_days = [0] * len(state.sections)
+        self.lab_excess = [0] * len(state.sections)
+        self.lab_violations = [0] * len(state.sections)
+
+        for s in range(len(state.sections)):
+            for d in range(n_days):
+                for idx, entry in enumerate(state.cells[s][d]):
+                    if entry is not None:
+                        self.changed(s, d, idx, None, entry)
+        state.objective = self
+
+    # ------------------------------------------------------------ totals
+
+    @property
+    def hard(self):
+        return sum(self.hard_terms.values())
+
+    @property
+    def soft(self):
+        terms = self.soft_terms
+        return terms["preference"] + CLUSTER_PENALTY * terms["clustering"] + GAP_PENALTY * terms["gaps"]
+
+    def breakdown(self):
+        """Soft score breakdown: {"preference", "clustering", "gaps", "total"}"""
+        return dict(self.soft_terms, total=self.soft)
+
+    def creates_run(self, s, d, idx, code):
+        """Would code at (s, d, idx) complete a run? Always False for lab subjects"""
+        return creates_run(self.codes[s][d], idx, code)
+
+    # ------------------------------------------------------------ updates
+
+    def changed(self, s, d, idx, old, new):
+        """Called by ScheduleState after cell (s, d, idx) went from old to new"""
+        # 📚 Same-subject counts and 3-in-a-row windows
+        old_code = old["code"] if is_lecture(old) else None
+        new_code = new["code"] if is_lecture(new) else None
+        if old_code != new_code:
+            counts = self.code_count[s][d]
+            if old_code is not None:
+                n = counts.pop(old_code)
+                if n > 1:
+                    counts[old_code] = n - 1
+                    self.soft_terms["clustering"] -= 1
+            if new_code is not None:
+                n = counts.get(new_code, 0)
+                if n:
+                    self.soft_terms["clustering"] += 1
+                counts[new_code] = n + 1
+            self.codes[s][d][idx] = new_code if new_code is not None and new["type"] == "theory" else None
+            self._update_runs(s, d, idx)
+
+        # 🕳️ Idle gaps of the row
+        gaps = row_gaps(self.state.cell_mask[s][d])
+        self.soft_terms["gaps"] += gaps - self.gaps[s][d]
+        self.gaps[s][d] = gaps
+
+        # ⏰ Availability and preferences of the cell's teachers
+        old_unavailable, old_preference = self.cell_cost[s][d][idx]
+        unavailable, preference = self._cell_cost(s, d, idx, new)
+        self.cell_cost[s][d][idx] = (unavailable, preference)
+        self.hard_terms["unavailable"] += unavailable - old_unavailable
+        self.soft_terms["preference"] += preference - old_preference
+
+        # 👨‍🏫 Max classes per day of every teacher involved
+        for teacher in set(self._teachers(old)) | set(self._teachers(new)):
+            self._update_overflow(teacher, d)
+
+        # 🔬 Labs per day
+        if old is not None and old.get("lab_span"):
+            self._count_lab(s, d, -1)
+        if new is not None and new.get("lab_span"):
+            self._count_lab(s, d, 1)
+
+    @staticmethod
+    def _teachers(entry):
+        if entry is None or entry.get("skip") or entry["type"] == "open_elective":
+            return []
+        if entry["type"] == "elective":
+            return list(entry["teachers"].values())
+        return entry["teacher"].split("/")
+
+    def _cell_cost(self, s, d, idx, entry):
+        teachers = self._teachers(entry)
+        if not teachers:
+            return 0, 0
+        slots = self.state.slots[s][d]
+        start_time, end_time = slots[idx]
+        if entry.get("lab_span"):
+            end_time = slots[idx + 1][1]
+        unavailable = preference = 0
+        for teacher in teachers:
+            if not self.validator.is_available_minutes(teacher, self.days[d], start_time, end_time)[0]:
+                unavailable += 1
+            preference += self.validator.preference_penalty_minutes(teacher, start_time)
+        return unavailable, preference
+
+    def _update_runs(self, s, d, idx):
+        codes = self.codes[s][d]
+        runs = self.run_starts[s][d]
+        before = runs.bit_count()
+        for j in range(max(0, idx - 2), min(idx, len(codes) - 3) + 1):
+            if codes[j] is not None and codes[j] == codes[j + 1] == codes[j + 2]:
+                runs |= 1 << j
+            else:
+                runs &= ~(1 << j)
+        self.run_starts[s][d] = runs
+        self.hard_terms["runs"] += runs.bit_count() - before
+
+    def _update_overflow(self, teacher, d):
+        limit = self.validator.max_classes_limit(teacher)
+        if limit is None:
+            return
+        t = self.state.teacher_ids[teacher]
+        over = max(0, self.state.teacher_day_count[t][d] - limit)
+        self.hard_terms["max_classes"] += over - self.overflow.get((t, d), 0)
+        self.overflow[(t, d)] = over
+
+    def _count_lab(self, s, d, step):
+        n = self.labs_on_day[s][d]
+        if step > 0:
+            self.lab_excess[s] += n >= 2
+            self.two_lab_days[s] += n == 1
+        else:
+            self.lab_excess[s] -= n > 2
+            self.two_lab_days[s] -= n == 2
+        self.labs_on_day[s][d] = n + step
+        violations = self.lab_excess[s] + max(0, self.two_lab_days[s] - self.two_lab_days_allowed[s])
+        self.hard_terms["lab_days"] += violations - self.lab_violations[s]
+        self.lab_violations[s] = violations
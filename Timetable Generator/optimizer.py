@@ -0,0 +1,200 @@
+"""
+Timetable Quality Optimizer
+Simulated annealing over a COMPLETE timetable: theory lectures are moved to
+free cells or swapped within their section. A move needs the teacher free
+and a free room, and is undone if it adds any hard violation (availability,
+max classes per day, 3 in a row) - labs, electives and open electives stay
+put. Moves are scored by objective.ObjectiveEngine (preference penalties,
+same-day repeats of a subject, idle gaps).
+"""
+
+import math
+import time
+
+from objective import ObjectiveEngine, is_lecture
+from tracing import default_tracer, INFO, DEBUG
+
+# ⏱️ Default search budget (seconds)
+OPTIMIZE_TIME_LIMIT = 1.0
+
+# 🌡️ Temperature falls geometrically from START to END over the time budget
+START_TEMPERATURE = 20.0
+END_TEMPERATURE = 0.2
+
+
+def state_from_schedule(model, schedule):
+    """Rebuild a ScheduleState from a {(sec, day, idx): entry} schedule"""
+    state = model.new_state()
+    for (sec, day, idx), entry in sorted(schedule.items(), key=lambda item: item[0][2]):
+        if entry.get("skip"):
+            continue
+        s, d = state.sec_id[sec], state.day_id[day]
+        if entry["type"] == "open_elective":
+            state.place_open_elective(s, d, idx, entry["code"], entry["teacher"], entry["room"])
+        elif entry.get("lab_span"):
+            teacher1, teacher2 = entry["teacher"].split("/")
+            state.place_lab(s, d, idx, entry["code"], teacher1, teacher2, state.room_id[entry["room"]])
+        elif entry["type"] == "elective":
+            state.place_elective(s, d, idx, entry["teachers"], entry["rooms"])
+            state.book_elective_rooms(d, state.slot_mask[s][d][idx],
+                                      [state.room_id[room] for room in entry["rooms"].values()])
+        else:
+            state.place_theory(s, d, idx, entry["code"], entry["teacher"],
+                               state.room_id[entry["room"]], entry["type"])
+    return state
+
+
+class QualityOptimizer:
+    """Simulated annealing on one ScheduleState"""
+
+    def __init__(self, model, validator, state):
+        self.state = state
+        self.rng = model.rng
+        self.objective = ObjectiveEngine(model, validator, state)
+
+    def score(self):
+        return self.objective.breakdown()
+
+    # --------------------------------------------------------------- moves
+
+    def fits(self, s, d, idx, entry):
+        """Free room for entry at (s, d, idx) if the cell and teacher are free, else None"""
+        state = self.state
+        if (state.cell_mask[s][d] >> idx) & 1:
+            return None
+        mask = state.slot_mask[s][d][idx]
+        if state.teacher_busy[state.teacher_id(entry["teacher"])][d] & mask:
+            return None
+        return state.first_free_room(d, mask)
+
+    def apply(self, s, d1, i1, d2, i2):
+        """
+        Move the lecture at (d1, i1) to (d2, i2), swapping with the lecture
+        there if the cell is taken. Returns the removed entries (for undo) or
+        None if the move would break a hard constraint (state unchanged).
+        """
+        state = self.state
+        hard = self.objective.hard
+        a = state.remove_theory(s, d1, i1)
+        b = state.remove_theory(s, d2, i2) if state.cells[s][d2][i2] is not None else None
+        room_a = self.fits(s, d2, i2, a)
+        if room_a is not None:
+            state.place_theory(s, d2, i2, a["code"], a["teacher"], room_a, a["type"])
+            if b is None:
+                if self.objective.hard <= hard:
+                    return a, b
+                self.undo(s, d1, i1, d2, i2, a, b)
+                return None
+            room_b = self.fits(s, d1, i1, b)
+            if room_b is not None:
+                state.place_theory(s, d1, i1, b["code"], b["teacher"], room_b, b["type"])
+                if self.objective.hard <= hard:
+                    return a, b
+                self.undo(s, d1, i1, d2, i2, a, b)
+                return None
+            state.remove_theory(s, d2, i2)
+        state.restore_theory(s, d1, i1, a)
+        if b is not None:
+            state.restore_theory(s, d2, i2, b)
+        return None
+
+    def delta(self, s, d1, i1, d2, i2):
+        """
+        Soft-score change of apply(s, d1, i1, d2, i2) without keeping it
+        (applied and undone, so the state is left exactly as it was).
+        None if the move would break a hard constraint.
+        """
+        old = self.objective.soft
+        removed = self.apply(s, d1, i1, d2, i2)
+        if removed is None:
+            return None
+        change = self.objective.soft - old
+        self.undo(s, d1, i1, d2, i2, *removed)
+        return change
+
+    def undo(self, s, d1, i1, d2, i2, a, b):
+        state = self.state
+        state.remove_theory(s, d2, i2)
+        if b is not None:
+            state.remove_theory(s, d1, i1)
+            state.restore_theory(s, d2, i2, b)
+        state.restore_theory(s, d1, i1, a)
+
+    # ---------------------------------------------------------------- search
+
+    def run(self, time_limit=OPTIMIZE_TIME_LIMIT):
+        """Anneal for time_limit seconds; returns (best schedule, stats)"""
+        state = self.state
+        rng = self.rng
+        rows = [(s, d) for s in range(len(state.sections)) for d in range(len(state.days))
+                if state.slots[s][d]]
+        objective = self.objective
+        current = objective.soft
+        best, best_schedule = current, state.to_schedule()
+        iterations = moves = accepted = 0
+        temperature = START_TEMPERATURE
+        started = time.time()
+
+        while rows:
+            if iterations % 64 == 0:
+                progress = (time.time() - started) / time_limit if time_limit > 0 else 1.0
+                if progress >= 1.0:
+                    break
+                temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** progress
+            iterations += 1
+
+            s, d1 = rng.choice(rows)
+            i1 = rng.randrange(len(state.slots[s][d1]))
+            a = state.cells[s][d1][i1]
+            if not is_lecture(a):
+                continue
+            d2 = rng.randrange(len(state.days))
+            if not state.slots[s][d2]:
+                continue
+            i2 = rng.randrange(len(state.slots[s][d2]))
+            b = state.cells[s][d2][i2]
+            if (d1, i1) == (d2, i2) or (b is not None and (not is_lecture(b) or b["code"] == a["code"])):
+                continue
+
+            old = objective.soft
+            removed = self.apply(s, d1, i1, d2, i2)
+            if removed is None:
+                continue
+            moves += 1
+            delta = objective.soft - old
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                accepted += 1
+                current += delta
+                if current < best:
+                    best, best_schedule = current, state.to_schedule()
+            else:
+                self.undo(s, d1, i1, d2, i2, *removed)
+
+        return best_schedule, {"iterations": iterations, "moves": moves, "accepted": accepted,
+                               "seconds": time.time() - started}
+
+
+def optimize_timetable(model, validator, schedule, time_limit=OPTIMIZE_TIME_LIMIT, tracer=None):
+    """
+    Improve the soft score of a complete timetable without breaking any
+    hard constraint.
+    Returns (schedule, before, after): the best schedule found and the
+    score breakdowns ({"preference", "clustering", "gaps", "total"}) of the
+    input and of that schedule.
+    """
+    tracer = tracer or default_tracer
+    optimizer = QualityOptimizer(model, validator, state_from_schedule(model, schedule))
+    before = optimizer.score()
+    tracer.emit(INFO, "optimize", f"\n🌡️ Optimizing timetable quality for {time_limit:g}s "
+                                  f"(score {before['total']})...")
+
+    best_schedule, stats = optimizer.run(time_limit)
+    after = QualityOptimizer(model, validator, state_from_schedule(model, best_schedule)).score()
+    if tracer.debug:
+        tracer.emit(DEBUG, "optimize", f"  {stats['iterations']} iterations, {stats['moves']} feasible moves, "
+                                       f"{stats['accepted']} accepted")
+    tracer.emit(INFO, "optimize", f"  Score {before['total']} → {after['total']} "
+                                  f"(preference {before['preference']} → {after['preference']}, "
+                                  f"same-day repeats {before['clustering']} → {after['clustering']}, "
+                                  f"gaps {before['gaps']} → {after['gaps']})")
+    return best_schedule, before, after
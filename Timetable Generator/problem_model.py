@@ -0,0 +1,150 @@
+"""
+Precompiled Per-Semester Problem Model
+Everything the scheduler needs from Data for one semester, indexed once:
+subject lookup by code, per-section demand lists, the lab/elective/theory
+split and the parsed time slot grid.
+"""
+
+import random
+from collections import defaultdict
+from utils import parse_time
+from schedule_state import ScheduleState
+
+ALL_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+# 🚨 CUTOFF: No slot may start at or after 4:45 PM
+CUTOFF_MINUTES = 16 * 60 + 45
+
+
+def semester_days(sem):
+    """Teaching days for a semester (sem 7 only runs Friday/Saturday)"""
+    return ["Friday", "Saturday"] if sem == "7" else list(ALL_DAYS)
+
+
+def build_time_slots(timings, sections, days):
+    """Parse timing configs into {(sec, day): [(start_min, end_min), ...]}"""
+    time_slots = {}
+    for sec in sections:
+        for day in days:
+            cfg = timings.get(sec, {}).get(day)
+            if not cfg:
+                continue
+            current = parse_time(cfg["start_time"])
+            duration = cfg["class_dur"]
+            num = cfg["num_classes"]
+            breaks = [(parse_time(brk["start"]), parse_time(brk["end"])) for brk in cfg.get("breaks", [])]
+
+            slots = []
+            for _ in range(num):
+                # Don't create slots starting at or after the cutoff
+                if current >= CUTOFF_MINUTES:
+                    break
+
+                for bs, be in breaks:
+                    if bs <= current < be:
+                        current = be
+                slots.append((current, current + duration))
+                current += duration
+            time_slots[(sec, day)] = slots
+    return time_slots
+
+
+class ProblemModel:
+    """Compiled view of one semester, built once per generate_timetable call"""
+
+    def __init__(self, data, sem, calendar=None, pinned_labs=None):
+        self.sem = sem
+        # Bookings of other semesters to schedule around (resource_calendar.ResourceCalendar)
+        self.calendar = calendar
+        # 🎲 Random source of this generation (seeded by generate_timetable), so
+        # concurrent generations neither share nor reseed the global one
+        self.rng = random.Random()
+        self.sections = list(data.sections.get(sem, []))
+        self.days = semester_days(sem)
+        self.classrooms = data.classrooms
+
+        # 📚 code -> subject dict
+        self.subjects = {sub["code"]: sub for sub in data.subjects.get(sem, [])}
+
+        sem_mappings = data.mappings.get(sem, {})
+        self.mappings = {sec: sem_mappings.get(sec, {}) for sec in self.sections}
+
+        # ⏱️ Parsed slot grid
+        self.time_slots = build_time_slots(data.timings.get(sem, {}), self.sections, self.days)
+
+        # 📖 Theory demand: sec -> [(code, teacher, sub), ...] in mapping order
+        self.theory = {}
+        # 🔬 Labs: sec -> [(code, teacher1, teacher2), ...]
+        self.labs = {}
+        self.teacher_sections = defaultdict(list)
+
+        for sec in self.sections:
+            theory, labs = [], []
+            for code, mapping in self.mappings[sec].items():
+                teacher = mapping.get("theory")
+                if teacher and sec not in self.teacher_sections[teacher]:
+                    self.teacher_sections[teacher].append(sec)
+
+                sub = self.subjects.get(code)
+                if not sub:
+                    continue
+                if sub.get("islab") == "yes" and len(mapping.get("lab", [])) >= 2:
+                    labs.append((code, mapping["lab"][0], mapping["lab"][1]))
+                if sub["elective"] == "yes" or sub.get("open_elective") == "yes" or sub["l"] == 0:
+                    continue
+                theory.append((code, teacher, sub))
+            self.theory[sec] = theory
+            self.labs[sec] = labs
+
+        # 🎯 Electives (scheduled as a group across all sections)
+        self.electives = [sub for sub in data.subjects.get(sem, [])
+                          if sub["elective"] == "yes" and sub.get("open_elective", "no") != "yes"]
+        # sec -> {code: teacher}
+        self.elective_teachers = {
+            sec: {sub["code"]: self.mappings[sec][sub["code"]]["theory"]
+                  for sub in self.electives if self.mappings[sec].get(sub["code"])}
+            for sec in self.sections
+        }
+
+        # 🌐 Pre-scheduled open electives: [(sec, code, teacher, day, slot_idx, room), ...]
+        self.open_electives = []
+        for sec, oe_map in data.open_elective_schedule.get(sem, {}).items():
+            if sec not in self.mappings:
+                continue
+            for oe_code, slot_list in oe_map.items():
+                mapping = self.mappings[sec].get(oe_code)
+                if not mapping:
+                    continue
+                for oe_info in slot_list:
+                    self.open_electives.append((sec, oe_code, mapping['theory'], oe_info['day'],
+                                                oe_info['slot_index'], oe_info['room']))
+
+        # 📌 Pinned lab blocks (department mode lays labs out across semesters):
+        # [(sec, code, teacher1, teacher2, day, slot_idx, room), ...] - placed like
+        # open electives, so they leave the lab demand
+        self.pinned_labs = []
+        for sec, code, day, slot_idx, room in pinned_labs or []:
+            lab = next((lab for lab in self.labs.get(sec, []) if lab[0] == code), None)
+            if lab is None:
+                continue
+            self.labs[sec] = [other for other in self.labs[sec] if other is not lab]
+            self.pinned_labs.append((sec, code, lab[1], lab[2], day, slot_idx, room))
+
+    def new_state(self):
+        """Empty ScheduleState for this semester (other semesters' bookings blocked)"""
+        state = ScheduleState(self.sections, self.days, self.time_slots, self.classrooms)
+        if self.calendar is not None:
+            state.block_external(self.calendar, self.sem)
+        return state
+
+    def theory_demand(self):
+        """Fresh {sec: {code: lectures}} counter for one attempt"""
+        return {sec: {code: sub["l"] for code, _, sub in self.theory[sec]} for sec in self.sections}
+
+    def two_lab_days_allowed(self, sec):
+        """Days a section may hold 2 labs (sem 3: one, otherwise labs are 1 per day)"""
+        return 1 if self.sem == "3" else 0
+
+    def display_type(self, code):
+        """Cell type for a theory lecture of this subject (lab subjects render as 'lab')"""
+        return "lab" if self.subjects[code]["islab"] == "yes" else "theory"
@@ -0,0 +1,78 @@
+"""
+Generation Profiling
+Opt-in measurements for one generate_timetable call: wall time per phase
+(summed over retries), search counters, peak traced memory and, when asked,
+a cProfile capture on disk for hot-spot analysis:
+
+    python -c "import pstats; pstats.Stats('gen.prof').sort_stats('cumtime').print_stats(20)"
+
+Nothing here runs unless generate_timetable(profile=True) is used.
+"""
+
+import cProfile
+import time
+import tracemalloc
+from collections import Counter
+
+
+class GenerationProfile:
+    """Phase timers, counters and memory peak of one generation"""
+
+    def __init__(self, memory=True, cprofile_path=None):
+        self.memory = memory
+        self.cprofile_path = cprofile_path
+        self.phases = {}
+        self.counters = Counter()
+        self.phase = None
+        self.phase_started = None
+        self.started = None
+        self._profiler = None
+        self._own_tracemalloc = False
+
+    def start(self):
+        """Begin timing (in phase "setup"), memory tracing and the cProfile capture"""
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        if self.memory:
+            tracemalloc.reset_peak()
+        if self.cprofile_path:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self.started = time.perf_counter()
+        self.enter("setup")
+
+    def enter(self, phase):
+        """Charge the time since the last switch to the current phase and move to `phase`"""
+        now = time.perf_counter()
+        if self.phase is not None:
+            self.phases[self.phase] = self.phases.get(self.phase, 0.0) + now - self.phase_started
+        self.phase = phase
+        self.phase_started = now
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def add(self, counters):
+        """Merge a Counter / dict of counts"""
+        self.counters.update(counters)
+
+    def finish(self):
+        """Stop everything; returns the JSON-ready "profile" dict"""
+        self.enter(None)
+        total = time.perf_counter() - self.started
+        peak = None
+        if self.memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.cprofile_path)
+        return {
+            "seconds": round(total, 6),
+            "phases": {phase: round(seconds, 6) for phase, seconds in self.phases.items()},
+            "counters": dict(self.counters),
+            "peak_memory_kb": round(peak / 1024, 1) if peak is not None else None,
+            "cprofile": self.cprofile_path
+        }
@@ -0,0 +1,311 @@
+"""
+Incremental Repair of a Saved Timetable
+Reloads a semester's last saved schedule (latest_schedules.json), keeps every
+class that is still valid under the current inputs and re-places only the
+invalid ones with the exact solver. If they don't fit, a growing
+neighbourhood of theory lectures around them is freed as well - everything
+else stays exactly where it was.
+"""
+
+import time
+
+import schedule_storage
+from cp_engine import base_state, compile_tasks, materialize, BacktrackingSolver
+from objective import ObjectiveEngine
+from tracing import default_tracer, INFO, DEBUG
+
+# ⏱️ Search budget for the whole repair, shared by its neighbourhood rounds (seconds)
+REPAIR_TIME_LIMIT = 2.0
+
+# Neighbourhood rounds: 0 = only the invalid classes, 1 = the rows (section
+# and day) they sat in plus same-teacher lectures on those days, 2 = whole affected sections and
+# teachers, 3 = every theory lecture (labs and electives stay fixed)
+MAX_ROUNDS = 4
+
+
+def _slot_index(state, s, d, cls):
+    """Index of a saved class's slot in the current grid (None if the grid moved)"""
+    slots = state.slots[s][d]
+    start = cls.get("time_start")
+    idx = cls.get("slot_index")
+    if idx is not None and idx < len(slots) and slots[idx][0] == start:
+        return idx
+    for i, (slot_start, _) in enumerate(slots):
+        if slot_start == start:
+            return i
+    return None
+
+
+def _pick_room(state, d, mask, saved_room, lab=False):
+    """Keep the saved room when it is still free and of the right type"""
+    r = state.room_id.get(saved_room)
+    if r is not None and state.room_is_lab[r] == lab and (state.free_room_mask(d, mask, lab) >> r) & 1:
+        return r
+    return state.first_free_room(d, mask, lab)
+
+
+def restore_saved(model, validator, state, previous):
+    """
+    Put every saved class that is still valid back into state.
+    Returns (kept, dropped, demand): dropped = [(label, s, d)] of invalid
+    classes, demand = what is left to place (compile_tasks format).
+    """
+    days = model.days
+    kept = 0
+    dropped = []
+    lab_blocks, elective_cells, lectures = [], {}, []
+
+    for cls in previous:
+        if cls.get("type") == "open_elective":
+            continue  # always re-placed from the open elective schedule
+        sec, day = cls.get("section"), cls.get("day")
+        label = f"{sec}/{cls.get('subject')} {day} {cls.get('time')}"
+        if sec not in state.sec_id or day not in state.day_id:
+            dropped.append((label, None, None))
+            continue
+        s, d = state.sec_id[sec], state.day_id[day]
+        idx = _slot_index(state, s, d, cls)
+        if idx is None:
+            dropped.append((label, s, d))
+        elif cls["type"] == "elective":
+            if "codes" not in cls:
+                dropped.append((label, s, d))  # saved before elective details were stored
+            else:
+                elective_cells.setdefault((d, idx), {})[s] = cls
+        elif cls["type"] == "lab" and "/" in cls.get("teacher", ""):
+            lab_blocks.append((label, s, d, idx, cls))
+        else:
+            lectures.append((label, s, d, idx, cls))
+
+    # 📈 Availability, max classes, lab-day limits and 3 in a row are judged by
+    # the objective engine: a class is kept only if it adds no hard violation
+    objective = ObjectiveEngine(model, validator, state)
+
+    # 🔬 Labs: same teachers, both slots free and back-to-back
+    labs_kept = set()
+    for label, s, d, idx, cls in lab_blocks:
+        sec = model.sections[s]
+        lab = next((lab for lab in model.labs[sec] if lab[0] == cls["subject"]), None)
+        slots = state.slots[s][d]
+        ok = (lab is not None and (sec, lab[0]) not in labs_kept and
+              cls["teacher"] == f"{lab[1]}/{lab[2]}" and idx + 1 < len(slots) and
+              slots[idx][1] == slots[idx + 1][0] and not state.cell_mask[s][d] & (3 << idx))
+        if ok:
+            mask = state.slot_mask[s][d][idx] | state.slot_mask[s][d][idx + 1]
+            ok = not any(state.teacher_busy[state.teacher_id(teacher)][d] & mask for teacher in lab[1:])
+        room = _pick_room(state, d, mask, cls.get("room"), lab=True) if ok else None
+        if room is not None:
+            hard = objective.hard
+            state.place_lab(s, d, idx, lab[0], lab[1], lab[2], room)
+            if objective.hard > hard:
+                state.remove_lab(s, d, idx)
+                room = None
+        if room is None:
+            dropped.append((label, s, d))
+            continue
+        labs_kept.add((sec, lab[0]))
+        kept += 1
+
+    # 🎯 Elective groups: every section at the same slot, same subjects and teachers
+    max_lectures = max([e["l"] for e in model.electives], default=0)
+    active = [tuple(e["code"] for e in model.electives if k < e["l"]) for k in range(max_lectures)]
+    electives_kept = set()
+    for (d, idx), per_section in sorted(elective_cells.items()):
+        codes = set(next(iter(per_section.values()))["codes"])
+        lec_num = next((k for k in range(max_lectures)
+                        if k not in electives_kept and set(active[k]) == codes), None)
+        ok = lec_num is not None and len(per_section) == len(model.sections)
+        group_mask = 0
+        teachers = {}
+        if ok:
+            for s, sec in enumerate(model.sections):
+                if idx >= len(state.slots[s][d]) or (state.cell_mask[s][d] >> idx) & 1:
+                    ok = False
+                    break
+                mask = state.slot_mask[s][d][idx]
+                group_mask |= mask
+                start_time, end_time = state.slots[s][d][idx]
+                teachers[s] = {code: model.elective_teachers[sec][code]
+                               for code in active[lec_num] if model.elective_teachers[sec].get(code)}
+                if teachers[s] != per_section[s].get("teachers"):
+                    ok = False
+                    break
+                for teacher in teachers[s].values():
+                    if (state.teacher_busy[state.teacher_id(teacher)][d] & mask or
+                            not validator.is_available_minutes(teacher, days[d], start_time, end_time)[0]):
+                        ok = False
+                        break
+                if not ok:
+                    break
+        room_map = {}
+        if ok:
+            saved_rooms = next(iter(per_section.values())).get("rooms", {})
+            free = state.free_rooms(d, group_mask)
+            for code in active[lec_num]:
+                r = state.room_id.get(saved_rooms.get(code))
+                if r not in free or r in room_map.values():
+                    r = next((f for f in free if f not in room_map.values()), None)
+                if r is None:
+                    ok = False
+                    break
+                room_map[code] = r
+        if not ok:
+            for s, cls in per_section.items():
+                dropped.append((f"{model.sections[s]}/electives {cls['day']} {cls['time']}", s, d))
+            continue
+        used_rooms = set()
+        for s in range(len(model.sections)):
+            rooms = {code: state.room_names[room_map[code]] for code in teachers[s]}
+            used_rooms.update(room_map[code] for code in teachers[s])
+            state.place_elective(s, d, idx, teachers[s], rooms)
+        state.book_elective_rooms(d, group_mask, used_rooms)
+        electives_kept.add(lec_num)
+        kept += 1
+
+    # 📖 Theory lectures: same teacher, still within l, free, available, under max classes
+    demand_theory = model.theory_demand()
+    mapped = {sec: {code: teacher for code, teacher, _ in model.theory[sec]} for sec in model.sections}
+    for label, s, d, idx, cls in lectures:
+        sec = model.sections[s]
+        code, teacher = cls["subject"], cls["teacher"]
+        ok = mapped[sec].get(code) == teacher and demand_theory[sec][code] > 0
+        if ok and (state.cell_mask[s][d] >> idx) & 1:
+            ok = False
+        if ok:
+            mask = state.slot_mask[s][d][idx]
+            ok = not state.teacher_busy[state.teacher_id(teacher)][d] & mask
+        room = _pick_room(state, d, mask, cls.get("room")) if ok else None
+        if room is not None:
+            hard = objective.hard
+            state.place_theory(s, d, idx, code, teacher, room, model.display_type(code))
+            if objective.hard > hard:
+                state.remove_theory(s, d, idx)
+                room = None
+        if room is None:
+            dropped.append((label, s, d))
+            continue
+        demand_theory[sec][code] -= 1
+        kept += 1
+
+    demand = {
+        "labs": {(sec, code) for sec in model.sections for code, _, _ in model.labs[sec]
+                 if (sec, code) not in labs_kept},
+        "electives": [k for k in range(max_lectures) if k not in electives_kept],
+        "theory": demand_theory
+    }
+    return kept, dropped, demand
+
+
+def _free_neighbourhood(model, state, demand, dropped, round_num):
+    """Unassign theory lectures around the invalid classes (see MAX_ROUNDS); returns how many"""
+    sections = {s for _, s, _ in dropped if s is not None}
+    sections.update(model.sections.index(sec) for sec, code in demand["labs"])
+    sections.update(model.sections.index(sec) for sec, codes in demand["theory"].items()
+                    if any(codes.values()))
+    rows = {(s, d) for _, s, d in dropped if s is not None}
+    days = {d for _, _, d in dropped if d is not None} or set(range(len(model.days)))
+    teachers = {teacher for sec, codes in demand["theory"].items()
+                for code, teacher, _ in model.theory[sec] if codes.get(code)}
+    for sec, code in demand["labs"]:
+        for lab in model.labs[sec]:
+            if lab[0] == code:
+                teachers.update(lab[1:])
+    if demand["electives"]:
+        # An elective group needs the same free slot in every section
+        sections.update(range(len(model.sections)))
+        teachers.update(t for per_sec in model.elective_teachers.values() for t in per_sec.values())
+
+    freed = 0
+    for s, sec in enumerate(model.sections):
+        for d in range(len(model.days)):
+            row = state.cells[s][d]
+            for idx, entry in enumerate(row):
+                if (entry is None or entry["type"] not in ("theory", "lab") or
+                        entry.get("lab_span") or entry.get("skip")):
+                    continue
+                if round_num == 1:
+                    take = (s, d) in rows or (entry["teacher"] in teachers and d in days)
+                elif round_num == 2:
+                    take = s in sections or entry["teacher"] in teachers
+                else:
+                    take = True
+                if take:
+                    state.remove_theory(s, d, idx)
+                    demand["theory"][sec][entry["code"]] += 1
+                    freed += 1
+    return freed
+
+
+def repair_timetable(model, validator, tracer=None, previous=None, time_limit=REPAIR_TIME_LIMIT):
+    """
+    Repair the saved timetable of model.sem against the current inputs.
+    previous: saved class list (default: latest_schedules.json via schedule_storage)
+    Returns a generate_timetable-style result dict with a "repair" summary,
+    or None if there is no saved schedule or it can't be repaired (the caller
+    then generates from scratch).
+    """
+    from scheduler import generate_html
+
+    tracer = tracer or default_tracer
+    sem = model.sem
+    if previous is None:
+        previous = schedule_storage.get_classes_for_semester(sem)
+    if not previous or not model.sections:
+        return None
+
+    started = time.time()
+    tracer.emit(INFO, "repair", f"\n=== REPAIRING SAVED TIMETABLE FOR SEMESTER {sem} ===")
+
+    state = base_state(model, validator, tracer)
+    kept, dropped, demand = restore_saved(model, validator, state, previous)
+    tracer.emit(INFO, "repair", f"  Kept {kept} saved classes, {len(dropped)} no longer valid")
+    if tracer.debug:
+        for label, _, _ in dropped:
+            tracer.emit(DEBUG, "repair", f"  ❌ {label}")
+
+    # One deadline for all rounds: a later round only gets what the earlier ones left
+    deadline = started + time_limit
+    freed, status = 0, "unknown"
+    for round_num in range(MAX_ROUNDS):
+        left = deadline - time.time()
+        if left <= 0:
+            tracer.emit(INFO, "repair", f"  ⏱️ Repair budget ({time_limit:g}s) used up")
+            break
+        if round_num:
+            n = _free_neighbourhood(model, state, demand, dropped, round_num)
+            freed += n
+            tracer.emit(INFO, "repair", f"  🔄 Round {round_num}: freed {n} neighbouring lectures")
+        tasks = compile_tasks(model, validator, state, demand)
+        solver = BacktrackingSolver(model, validator, state, tasks, left, tracer)
+        status = solver.solve()
+        if tracer.debug:
+            tracer.emit(DEBUG, "repair", f"  round {round_num}: {len(tasks)} items, {status} after {solver.nodes} nodes")
+        if status == "sat":
+            break
+    if status != "sat":
+        tracer.emit(INFO, "repair", "  ❌ Repair failed - a full regeneration is needed")
+        return None
+
+    state, failed = materialize(model, validator, tracer, solver.solution(), state)
+    elapsed = time.time() - started
+    if failed:
+        tracer.emit(INFO, "repair", f"  ❌ Room assignment failed for: {', '.join(failed)}")
+        return None
+    tracer.emit(INFO, "repair", f"  ✅ Re-placed {len(tasks)} items in {elapsed * 1000:.0f} ms "
+                                f"({freed} extra lectures moved)")
+
+    violations, warnings = validator.validate_schedule(state.scheduled_classes(sem))
+    schedule = state.to_schedule()
+    return {
+        "html": generate_html(sem, model.sections, model.days, model.time_slots, schedule),
+        "success": True,
+        "schedule": schedule,
+        "time_slots": model.time_slots,
+        "days": model.days,
+        "sections": model.sections,
+        "missing": 0,
+        "violations": len(violations),
+        "penalty": sum(w['penalty'] for w in warnings),
+        "repair": {"kept": kept, "dropped": [label for label, _, _ in dropped],
+                   "moved": freed, "rounds": round_num, "seconds": elapsed}
+    }
@@ -0,0 +1,89 @@
+"""
+Department-wide Resource Calendar
+Teacher and room bookings of every generated semester on one shared clock
+(minute-resolution bitmasks per day), so the next semester can be scheduled
+around them and cross-semester double bookings are detected.
+"""
+
+import hashlib
+
+from utils import min_to_time_12h
+
+
+def minute_mask(start, end):
+    """Bitmask with one bit per minute in [start, end)"""
+    return ((1 << (end - start)) - 1) << start
+
+
+class ResourceCalendar:
+    """Bookings keyed by ("teacher" | "room", name, day), tagged with their semester"""
+
+    def __init__(self):
+        # (kind, name, day) -> {sem: minute mask}
+        self.masks = {}
+        # (kind, name, day) -> [(sem, start, end, label)] (for conflict reports)
+        self.entries = {}
+
+    def book(self, sem, kind, name, day, start, end, label=""):
+        """Book [start, end) minutes; returns clashes with OTHER semesters"""
+        key = (kind, name, day)
+        mask = minute_mask(start, end)
+        per_sem = self.masks.setdefault(key, {})
+        clashes = []
+        for other, other_mask in per_sem.items():
+            if other != sem and other_mask & mask:
+                for o_sem, o_start, o_end, o_label in self.entries[key]:
+                    if o_sem == other and o_start < end and start < o_end:
+                        clashes.append(f"{kind} {name} on {day} {min_to_time_12h(start)}: "
+                                       f"sem {sem} {label} vs sem {o_sem} {o_label}")
+        per_sem[sem] = per_sem.get(sem, 0) | mask
+        self.entries.setdefault(key, []).append((sem, start, end, label))
+        return clashes
+
+    def busy_mask(self, kind, name, day, exclude_sem=None):
+        """Minutes booked for a resource on a day by every semester but exclude_sem"""
+        mask = 0
+        for sem, sem_mask in self.masks.get((kind, name, day), {}).items():
+            if sem != exclude_sem:
+                mask |= sem_mask
+        return mask
+
+    def resources(self, kind, exclude_sem=None):
+        """(name, day, minute mask) of every booked resource of one kind"""
+        for (k, name, day) in self.masks:
+            if k == kind:
+                mask = self.busy_mask(k, name, day, exclude_sem)
+                if mask:
+                    yield name, day, mask
+
+    def book_result(self, sem, result):
+        """Book every class of a generated semester; returns cross-semester clashes"""
+        clashes = []
+        time_slots = result.get("time_slots", {})
+        for (sec, day, idx), entry in result.get("schedule", {}).items():
+            if entry.get("skip"):
+                continue
+            start, end = time_slots[(sec, day)][idx]
+            if entry.get("lab_span"):
+                end = time_slots[(sec, day)][idx + 1][1]
+            if entry["type"] == "elective":
+                rows = [(code, entry["teachers"][code], entry["rooms"][code]) for code in entry["codes"]]
+            else:
+                rows = [(entry["code"], teacher, entry["room"]) for teacher in entry["teacher"].split("/")]
+            for code, teacher, room in rows:
+                label = f"{sec}/{code}"
+                clashes += self.book(sem, "teacher", teacher, day, start, end, label)
+                clashes += self.book(sem, "room", room, day, start, end, label)
+        return list(dict.fromkeys(clashes))
+
+    def release(self, sem):
+        """Forget every booking of one semester"""
+        for key in list(self.masks):
+            self.masks[key].pop(sem, None)
+            self.entries[key] = [e for e in self.entries[key] if e[0] != sem]
+
+    def fingerprint(self, exclude_sem=None):
+        """Stable digest of the bookings other semesters hold (for the result cache)"""
+        parts = sorted(f"{kind}|{name}|{day}|{self.busy_mask(kind, name, day, exclude_sem):x}"
+                       for kind, name, day in self.masks)
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
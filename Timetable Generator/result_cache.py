@@ -0,0 +1,87 @@
+"""
+On-disk Cache of Generation Results
+Results are keyed by a stable hash of everything that shapes a semester's
+timetable (subjects, mappings, timings, classrooms, open electives, teacher
+availability) plus the seed and engine options. Oldest entries are evicted
+once the cache grows past MAX_CACHE_BYTES.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+# Next to the code, so the GUI, batch CLI and benchmark share one cache
+# whatever their working directory
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schedule_cache")
+MAX_CACHE_BYTES = 50 * 1024 * 1024  # 50 MB
+
+# Bump when the scheduler changes in a way that makes old results stale
+CACHE_VERSION = 3
+
+
+def input_hash(data, sem, availability, **options):
+    """Stable hex digest of one semester's inputs (dict order does not matter)"""
+    payload = {
+        "version": CACHE_VERSION,
+        "sem": sem,
+        "subjects": data.subjects.get(sem, []),
+        "sections": data.sections.get(sem, []),
+        "mappings": data.mappings.get(sem, {}),
+        "timings": data.timings.get(sem, {}),
+        "classrooms": data.classrooms,
+        "open_electives": data.open_elective_schedule.get(sem, {}),
+        "availability": availability,
+        "options": options
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.pkl")
+
+
+def load(key):
+    """Cached result dict for key, or None"""
+    path = _path(key)
+    try:
+        with open(path, "rb") as f:
+            result = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ImportError):
+        return None  # missing, truncated, or pickled from classes that have since moved
+    os.utime(path)  # mark as recently used
+    return result
+
+
+def save(key, result):
+    """Store a result (schedule, time_slots, html, ...) and evict if over budget"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = _path(key) + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, _path(key))
+    evict()
+
+
+def evict(max_bytes=MAX_CACHE_BYTES):
+    """Delete least recently used entries until the cache fits in max_bytes"""
+    try:
+        names = [n for n in os.listdir(CACHE_DIR) if n.endswith(".pkl")]
+    except FileNotFoundError:
+        return
+    entries = []
+    for name in names:
+        stat = os.stat(os.path.join(CACHE_DIR, name))
+        entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(os.path.join(CACHE_DIR, name))
+        total -= size
+
+
+def clear():
+    """Remove every cached result"""
+    evict(max_bytes=0)
@@ -0,0 +1,87 @@
+"""
+Room Assignment Post-pass
+During the search lectures and lab blocks only hold room CAPACITY (per time
+bit, see ScheduleState.rooms_left). Afterwards every class placed without a
+room gets a named one here: classes are taken in start-time order (interval
+colouring - capacity counts that fit at every moment then leave a room for
+each) and all classes sharing the same time are matched to the free rooms
+with maximum bipartite matching. Room preferences only break ties.
+"""
+
+
+def max_matching(candidates, capacity=None):
+    """
+    Maximum bipartite matching of units to resources (augmenting paths).
+    candidates: per unit, the resources it may use, most preferred first
+    capacity: {resource: n} (default 1 each)
+    Returns the resource matched to each unit (None = unmatched).
+    """
+    holders = {}
+    match = [None] * len(candidates)
+
+    def assign(u, seen):
+        for v in candidates[u]:
+            if v in seen:
+                continue
+            seen.add(v)
+            taken = holders.setdefault(v, [])
+            if len(taken) < (capacity.get(v, 1) if capacity else 1):
+                taken.append(u)
+                match[u] = v
+                return True
+            for i, w in enumerate(taken):
+                if assign(w, seen):
+                    taken[i] = u
+                    match[u] = v
+                    return True
+        return False
+
+    for u in range(len(candidates)):
+        assign(u, set())
+    return match
+
+
+def assign_rooms(state, preferences=None):
+    """
+    Name the room of every lecture / lab block placed without one.
+    preferences: optional {section: room name} or {(section, code): room name};
+                 otherwise a section keeps the room of its previous class that day
+    Returns [(s, d, idx, entry)] of classes no room was left for (still unassigned).
+    """
+    preferences = preferences or {}
+    failed = []
+    for d in range(len(state.days)):
+        # (is_lab, time mask) -> [(s, idx, entry)]
+        groups = {}
+        for s in range(len(state.sections)):
+            for idx, entry in enumerate(state.cells[s][d]):
+                if (entry is None or entry.get("skip") or
+                        entry["type"] in ("elective", "open_elective") or entry["room"] is not None):
+                    continue
+                lab = bool(entry.get("lab_span"))
+                mask = state.slot_mask[s][d][idx]
+                if lab:
+                    mask |= state.slot_mask[s][d][idx + 1]
+                groups.setdefault((lab, mask), []).append((s, idx, entry))
+
+        last_room = {}  # (s, is_lab) -> room id of the section's latest class
+        for lab, mask in sorted(groups, key=lambda key: ((key[1] & -key[1]).bit_length(), key[1].bit_length())):
+            items = groups[(lab, mask)]
+            rooms = state.free_rooms(d, mask, lab)
+            candidates = []
+            for s, idx, entry in items:
+                sec = state.sections[s]
+                wanted = state.room_id.get(preferences.get((sec, entry["code"]), preferences.get(sec)))
+                if wanted is None:
+                    wanted = last_room.get((s, lab))
+                order = rooms
+                if wanted in rooms:
+                    order = [wanted] + [r for r in rooms if r != wanted]
+                candidates.append(order)
+            for (s, idx, entry), r in zip(items, max_matching(candidates)):
+                if r is None:
+                    failed.append((s, d, idx, entry))
+                    continue
+                state.assign_room(s, d, idx, r)
+                last_room[(s, lab)] = r
+    return failed
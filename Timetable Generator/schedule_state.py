@@ -0,0 +1,434 @@
+"""
+Dense Schedule State for Timetable Generation
+Sections, teachers, rooms, days and slots get integer ids and all occupancy
+lives in int bitmasks, so "is this teacher free", "which rooms are free" and
+"is this cell empty" are bit operations instead of tuple hashing.
+
+Time bits are elementary intervals: every slot start and end of the day is a
+boundary, each piece between two boundaries gets a bit, and a slot's mask is
+the pieces it covers. Two slots share a bit exactly when they overlap in
+time, whatever grid (8:00, 8:55, 50- or 55-minute classes) they come from.
+"""
+
+from utils import min_to_time_12h
+from resource_calendar import minute_mask
+
+
+class ScheduleState:
+    """Occupancy tables for one generation attempt"""
+
+    def __init__(self, sections, days, time_slots, classrooms):
+        self.sections = list(sections)
+        self.days = list(days)
+        self.sec_id = {sec: i for i, sec in enumerate(self.sections)}
+        self.day_id = {day: i for i, day in enumerate(self.days)}
+
+        self.room_names = [r["name"] for r in classrooms]
+        self.room_id = {name: i for i, name in enumerate(self.room_names)}
+        self.theory_rooms = [i for i, r in enumerate(classrooms) if r["is_lab"] == "no"]
+        self.lab_rooms = [i for i, r in enumerate(classrooms) if r["is_lab"] == "yes"]
+
+        self.teacher_names = []
+        self.teacher_ids = {}
+
+        n_days = len(self.days)
+
+        # Per (section, day): raw slots
+        self.slots = [[time_slots.get((sec, day), []) for day in self.days] for sec in self.sections]
+
+        # ⏱️ Time grid: per day, one bit per elementary interval covered by some slot
+        self.bit_span = [[] for _ in self.days]  # (start, end) minutes per bit
+        self.interval_mask = [{} for _ in self.days]  # (start, end) -> bits it covers
+        for d in range(n_days):
+            day_slots = {slot for s in range(len(self.sections)) for slot in self.slots[s][d]}
+            bounds = sorted({t for slot in day_slots for t in slot})
+            for lo, hi in zip(bounds, bounds[1:]):
+                if any(start <= lo and hi <= end for start, end in day_slots):
+                    self.bit_span[d].append((lo, hi))
+            for slot in day_slots:
+                self.interval_mask[d][slot] = self.bits_between(d, *slot)
+
+        # Time-bit mask of every slot
+        self.slot_mask = [[[self.interval_mask[d][slot] for slot in self.slots[s][d]]
+                           for d in range(n_days)]
+                          for s in range(len(self.sections))]
+
+        # 📋 Cells: entry dict (or None) per slot + bitmask of occupied slot indexes
+        self.cells = [[[None] * len(self.slots[s][d]) for d in range(n_days)]
+                      for s in range(len(self.sections))]
+        self.cell_mask = [[0] * n_days for _ in self.sections]
+
+        # 👨‍🏫 Teacher tables (grown on demand by teacher_id)
+        self.teacher_busy = []          # tid -> [time mask per day]
+        self.teacher_day_count = []     # tid -> [classes per day]
+        self.teacher_section_mask = []  # tid -> {sid: [time mask per day]} (theory only)
+        self.teacher_lectures = []      # tid -> {(s, d, idx)} of placed theory lectures
+
+        # 🏫 Room occupancy: rid -> [time mask per day]
+        self.room_busy = [[0] * n_days for _ in self.room_names]
+
+        # 🏫 Incremental free-room index, the transpose of room_busy:
+        # room_free[is_lab][d][bit] = bitmask of free room ids of that type
+        self.room_is_lab = [r["is_lab"] == "yes" for r in classrooms]
+        type_masks = [sum(1 << r for r in self.theory_rooms), sum(1 << r for r in self.lab_rooms)]
+        self.room_free = [[[type_masks[lab]] * len(self.bit_span[d]) for d in range(n_days)]
+                          for lab in (0, 1)]
+
+        # 🏫 Classes placed without a named room (room None) only hold capacity:
+        # room_pending[is_lab][d][bit] = how many of them use that time.
+        # room_assignment.assign_rooms names their rooms after the search.
+        self.room_pending = [[[0] * len(self.bit_span[d]) for d in range(n_days)] for _ in (0, 1)]
+
+        # 📈 Optional objective.ObjectiveEngine, told about every cell change
+        self.objective = None
+
+    # ------------------------------------------------------------------ ids
+
+    def teacher_id(self, name):
+        """Integer id for a teacher (allocated on first use)"""
+        tid = self.teacher_ids.get(name)
+        if tid is None:
+            tid = len(self.teacher_names)
+            self.teacher_ids[name] = tid
+            self.teacher_names.append(name)
+            self.teacher_busy.append([0] * len(self.days))
+            self.teacher_day_count.append([0] * len(self.days))
+            self.teacher_section_mask.append({})
+            self.teacher_lectures.append(set())
+        return tid
+
+    # -------------------------------------------------------------- queries
+
+    def bits_between(self, d, start, end):
+        """Time bits of day d overlapping the minutes [start, end)"""
+        mask = 0
+        for bit, (lo, hi) in enumerate(self.bit_span[d]):
+            if lo < end and start < hi:
+                mask |= 1 << bit
+        return mask
+
+    def is_empty(self, s, d, idx):
+        return not (self.cell_mask[s][d] >> idx) & 1
+
+    def teacher_free(self, t, d, mask):
+        return not self.teacher_busy[t][d] & mask
+
+    def free_room_mask(self, d, mask, lab=False):
+        """Bitmask of room ids of the given type free at every time in mask"""
+        per_bit = self.room_free[lab][d]
+        if mask & (mask - 1) == 0:
+            return per_bit[mask.bit_length() - 1]  # single slot: one lookup
+        free = -1
+        while mask:
+            low = mask & -mask
+            free &= per_bit[low.bit_length() - 1]
+            mask ^= low
+        return free
+
+    def first_free_room(self, d, mask, lab=False):
+        """Lowest-id free room of the given type (None if all taken)"""
+        free = self.free_room_mask(d, mask, lab)
+        if not free:
+            return None
+        return (free & -free).bit_length() - 1
+
+    def free_room_count(self, d, mask, lab=False):
+        return self.free_room_mask(d, mask, lab).bit_count()
+
+    def free_rooms(self, d, mask, lab=False):
+        """Room ids of the given type with nothing booked in mask (in id order)"""
+        free = self.free_room_mask(d, mask, lab)
+        rooms = []
+        while free:
+            low = free & -free
+            rooms.append(low.bit_length() - 1)
+            free ^= low
+        return rooms
+
+    def rooms_left(self, d, mask, lab=False):
+        """How many more rooms of the given type are free at every time in mask (never below 0)"""
+        free = self.room_free[lab][d]
+        pending = self.room_pending[lab][d]
+        left = None
+        while mask:
+            low = mask & -mask
+            bit = low.bit_length() - 1
+            n = free[bit].bit_count() - pending[bit]
+            if left is None or n < left:
+                left = n
+            mask ^= low
+        # Pinned rooms booked over capacity holders can push n below zero:
+        # a negative count would read as "rooms left" in `if rooms_left(...)`
+        return max(0, left or 0)
+
+    def forbidden_mask(self, t, s, d):
+        """Times this teacher already uses for theory in OTHER sections on day d"""
+        mask = 0
+        for other, per_day in self.teacher_section_mask[t].items():
+            if other != s:
+                mask |= per_day[d]
+        return mask
+
+    # ----------------------------------------------------------- primitives
+
+    def _set_cell(self, s, d, idx, entry):
+        self.cells[s][d][idx] = entry
+        self.cell_mask[s][d] |= 1 << idx
+
+    def _clear_cell(self, s, d, idx):
+        entry = self.cells[s][d][idx]
+        self.cells[s][d][idx] = None
+        self.cell_mask[s][d] &= ~(1 << idx)
+        return entry
+
+    def _notify(self, s, d, idx, old, new):
+        if self.objective is not None:
+            self.objective.changed(s, d, idx, old, new)
+
+    def _book_teacher(self, t, d, mask, count=True):
+        self.teacher_busy[t][d] |= mask
+        if count:
+            self.teacher_day_count[t][d] += 1
+
+    def _free_teacher(self, t, d, mask, count=True):
+        self.teacher_busy[t][d] &= ~mask
+        if count:
+            self.teacher_day_count[t][d] -= 1
+
+    def _book_room(self, r, d, mask):
+        self.room_busy[r][d] |= mask
+        per_bit = self.room_free[self.room_is_lab[r]][d]
+        clear = ~(1 << r)
+        while mask:
+            low = mask & -mask
+            per_bit[low.bit_length() - 1] &= clear
+            mask ^= low
+
+    def _free_room(self, r, d, mask):
+        self.room_busy[r][d] &= ~mask
+        per_bit = self.room_free[self.room_is_lab[r]][d]
+        bit = 1 << r
+        while mask:
+            low = mask & -mask
+            per_bit[low.bit_length() - 1] |= bit
+            mask ^= low
+
+    def _hold_room(self, r, d, mask, lab):
+        """Book room r, or just one room's capacity when r is None"""
+        if r is not None:
+            self._book_room(r, d, mask)
+            return
+        pending = self.room_pending[lab][d]
+        while mask:
+            low = mask & -mask
+            pending[low.bit_length() - 1] += 1
+            mask ^= low
+
+    def _release_room(self, room, d, mask, lab):
+        if room is not None:
+            self._free_room(self.room_id[room], d, mask)
+            return
+        pending = self.room_pending[lab][d]
+        while mask:
+            low = mask & -mask
+            pending[low.bit_length() - 1] -= 1
+            mask ^= low
+
+    def block_external(self, calendar, sem):
+        """
+        Mark teachers and rooms booked by OTHER semesters in a
+        resource_calendar.ResourceCalendar as busy at every overlapping time.
+        """
+        for kind in ("teacher", "room"):
+            for name, day, minutes in calendar.resources(kind, exclude_sem=sem):
+                d = self.day_id.get(day)
+                if d is None:
+                    continue
+                mask = 0
+                for bit, (lo, hi) in enumerate(self.bit_span[d]):
+                    if minute_mask(lo, hi) & minutes:
+                        mask |= 1 << bit
+                if not mask:
+                    continue
+                if kind == "teacher":
+                    self._book_teacher(self.teacher_id(name), d, mask, count=False)
+                elif name in self.room_id:
+                    self._book_room(self.room_id[name], d, mask)
+
+    # ----------------------------------------------------- place / remove
+
+    def place_open_elective(self, s, d, idx, code, teacher, room):
+        """Pre-scheduled open elective (no conflict checks, not counted per day)"""
+        t = self.teacher_id(teacher)
+        mask = self.slot_mask[s][d][idx]
+        self._set_cell(s, d, idx, {
+            "type": "open_elective",
+            "code": code,
+            "teacher": teacher,
+            "room": room
+        })
+        self._book_teacher(t, d, mask, count=False)
+        r = self.room_id.get(room)
+        if r is not None:
+            self._book_room(r, d, mask)
+        self._notify(s, d, idx, None, self.cells[s][d][idx])
+
+    def place_lab(self, s, d, idx, code, teacher1, teacher2, r=None):
+        """
+        2-slot lab block starting at idx, both teachers busy for both slots
+        (r None: only lab-room capacity is held until assign_room)
+        """
+        t1, t2 = self.teacher_id(teacher1), self.teacher_id(teacher2)
+        mask = self.slot_mask[s][d][idx] | self.slot_mask[s][d][idx + 1]
+        room = self.room_names[r] if r is not None else None
+        self._set_cell(s, d, idx, {
+            "type": "lab",
+            "code": code,
+            "teacher": f"{teacher1}/{teacher2}",
+            "room": room,
+            "lab_span": 2
+        })
+        self._set_cell(s, d, idx + 1, {
+            "type": "lab",
+            "code": code,
+            "teacher": f"{teacher1}/{teacher2}",
+            "room": room,
+            "skip": True
+        })
+        self._book_teacher(t1, d, mask)
+        self._book_teacher(t2, d, mask)
+        self._hold_room(r, d, mask, True)
+        self._notify(s, d, idx, None, self.cells[s][d][idx])
+        self._notify(s, d, idx + 1, None, self.cells[s][d][idx + 1])
+
+    def remove_lab(self, s, d, idx):
+        """Undo place_lab, returning the removed block entry"""
+        entry = self._clear_cell(s, d, idx)
+        second = self._clear_cell(s, d, idx + 1)
+        mask = self.slot_mask[s][d][idx] | self.slot_mask[s][d][idx + 1]
+        for teacher in entry["teacher"].split("/"):
+            self._free_teacher(self.teacher_ids[teacher], d, mask)
+        self._release_room(entry["room"], d, mask, True)
+        self._notify(s, d, idx, entry, None)
+        self._notify(s, d, idx + 1, second, None)
+        return entry
+
+    def place_elective(self, s, d, idx, teachers, rooms):
+        """
+        One section's cell of an elective group.
+        teachers/rooms: {code: teacher name} / {code: room name}
+        (rooms are booked for the whole group by book_elective_rooms)
+        A teacher already teaching the group at this time (for another
+        section) is counted once per day, not once per section.
+        """
+        mask = self.slot_mask[s][d][idx]
+        for code, teacher in teachers.items():
+            t = self.teacher_id(teacher)
+            self._book_teacher(t, d, mask, count=not self.teacher_busy[t][d] & mask)
+        self._set_cell(s, d, idx, {
+            "type": "elective",
+            "codes": list(teachers),
+            "rooms": dict(rooms),
+            "teachers": dict(teachers)
+        })
+        self._notify(s, d, idx, None, self.cells[s][d][idx])
+
+    def book_elective_rooms(self, d, mask, room_ids):
+        """Book elective rooms for every section's time of the group"""
+        for r in room_ids:
+            self._book_room(r, d, mask)
+
+    def place_theory(self, s, d, idx, code, teacher, r=None, display_type="theory"):
+        """
+        Single theory lecture (also used for the theory part of lab subjects)
+        (r None: only classroom capacity is held until assign_room)
+        """
+        t = self.teacher_id(teacher)
+        mask = self.slot_mask[s][d][idx]
+        self._set_cell(s, d, idx, {
+            "type": display_type,
+            "code": code,
+            "teacher": teacher,
+            "room": self.room_names[r] if r is not None else None
+        })
+        self._book_teacher(t, d, mask)
+        self._hold_room(r, d, mask, False)
+        per_day = self.teacher_section_mask[t].get(s)
+        if per_day is None:
+            per_day = self.teacher_section_mask[t][s] = [0] * len(self.days)
+        per_day[d] |= mask
+        self.teacher_lectures[t].add((s, d, idx))
+        self._notify(s, d, idx, None, self.cells[s][d][idx])
+
+    def remove_theory(self, s, d, idx):
+        """Undo place_theory, returning the removed entry"""
+        entry = self._clear_cell(s, d, idx)
+        t = self.teacher_ids[entry["teacher"]]
+        mask = self.slot_mask[s][d][idx]
+        self._free_teacher(t, d, mask)
+        self._release_room(entry["room"], d, mask, False)
+        self.teacher_section_mask[t][s][d] &= ~mask
+        self.teacher_lectures[t].discard((s, d, idx))
+        self._notify(s, d, idx, entry, None)
+        return entry
+
+    def restore_theory(self, s, d, idx, entry):
+        """Put back an entry returned by remove_theory"""
+        self.place_theory(s, d, idx, entry["code"], entry["teacher"],
+                          self.room_id.get(entry["room"]), entry["type"])
+
+    def assign_room(self, s, d, idx, r):
+        """Name the room of a lecture or lab block placed with r=None"""
+        entry = self.cells[s][d][idx]
+        lab = bool(entry.get("lab_span"))
+        mask = self.slot_mask[s][d][idx]
+        if lab:
+            mask |= self.slot_mask[s][d][idx + 1]
+            self.cells[s][d][idx + 1] = dict(self.cells[s][d][idx + 1], room=self.room_names[r])
+        self._release_room(None, d, mask, lab)
+        self._book_room(r, d, mask)
+        self.cells[s][d][idx] = dict(entry, room=self.room_names[r])
+
+    # --------------------------------------------------------------- export
+
+    def to_schedule(self):
+        """Export as the classic {(sec, day, idx): entry} dict"""
+        schedule = {}
+        for s, sec in enumerate(self.sections):
+            for d, day in enumerate(self.days):
+                for idx, entry in enumerate(self.cells[s][d]):
+                    if entry is not None:
+                        schedule[(sec, day, idx)] = entry
+        return schedule
+
+    def scheduled_classes(self, sem):
+        """Flat class list (one row per teacher) for ConstraintValidator.validate_schedule"""
+        classes = []
+        for s, sec in enumerate(self.sections):
+            for d, day in enumerate(self.days):
+                slots = self.slots[s][d]
+                for idx, entry in enumerate(self.cells[s][d]):
+                    if entry is None or entry.get("skip"):
+                        continue
+                    start, end = slots[idx]
+                    if entry.get("lab_span"):
+                        end = slots[idx + 1][1]
+                    if entry["type"] == "elective":
+                        rows = [(code, entry["teachers"][code], entry["rooms"][code]) for code in entry["codes"]]
+                    elif entry["type"] == "lab":
+                        rows = [(entry["code"], teacher, entry["room"]) for teacher in entry["teacher"].split("/")]
+                    else:
+                        rows = [(entry["code"], entry["teacher"], entry["room"])]
+                    for code, teacher, room in rows:
+                        classes.append({
+                            'day': day,
+                            'start_time': min_to_time_12h(start),
+                            'end_time': min_to_time_12h(end),
+                            'subject': code,
+                            'teacher': teacher,
+                            'section': sec,
+                            'semester': sem,
+                            'room': room,
+                            'type': entry["type"]
+                        })
+        return classes
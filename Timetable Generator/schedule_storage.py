@@ -34,17 +34,26 @@ def save_schedule(sem, schedule, time_slots, sections, days):
             _, end = time_slots[slots_key][idx + 1]
             time_str = f"{min_to_time_12h(start)}-{min_to_time_12h(end)}"
         
-        classes.append({
+        cls = {
             "sem": sem,
             "section": sec,
             "day": day,
             "time": time_str,
             "time_start": start,
+            "slot_index": idx,
             "subject": entry.get("code", "???"),
             "teacher": entry.get("teacher", "???"),
             "room": entry.get("room", "???"),
             "type": entry.get("type", "theory")
-        })
+        }
+        
+        # Keep elective group details so the schedule can be reloaded (repair mode)
+        if entry.get("type") == "elective":
+            cls["codes"] = entry.get("codes", [])
+            cls["teachers"] = entry.get("teachers", {})
+            cls["rooms"] = entry.get("rooms", {})
+        
+        classes.append(cls)
     
     # Store for this semester
     all_data[sem] = classes
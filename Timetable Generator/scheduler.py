@@ -1,963 +1,834 @@
-import random
-from utils import parse_time, min_to_time, min_to_time_12h
-from collections import defaultdict, Counter
+import heapq
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils import min_to_time, min_to_time_12h
+from collections import Counter
 
 # ✅ Import constraint validator for validation reporting AND scheduling
 from constraint_validator import ConstraintValidator
 
-# 🔥 Global validator instance
-validator = None
+# 📡 Structured tracing (replaces print() debugging)
+from tracing import default_tracer, null_tracer, INFO, DEBUG
 
-def generate_timetable(data, sem):
+# 📚 Precompiled per-semester problem model
+from problem_model import ProblemModel
+
+# 🧩 Exact constraint-programming backend (engine="exact")
+from cp_engine import solve_exact, place_labs, place_pinned_labs, LAB_TIME_LIMIT
+
+# 💾 On-disk cache of finished results
+import result_cache
+
+# 🩹 Incremental repair of the saved timetable
+from repair import repair_timetable
+
+# 🌡️ Soft-constraint optimizer for complete timetables
+from optimizer import OPTIMIZE_TIME_LIMIT, optimize_timetable, state_from_schedule
+
+# 📈 Incrementally maintained hard/soft objective
+from objective import ObjectiveEngine
+
+# 🔗 Multi-step displacement repair for stuck lectures
+from ejection_chain import EjectionChains
+
+# 📋 Incrementally tracked unmet theory demand
+from demand import DemandTracker
+
+# 🩺 Capacity / matching bounds checked before any search
+from feasibility import check_feasibility, infeasible_result
+
+# 🏫 Named rooms are assigned after the search
+from room_assignment import assign_rooms
+
+# 🎯 Elective groups placed through precomputed slot masks
+from elective_slots import ElectiveSlots
+
+# ⏱️ Opt-in phase timers, counters and memory peak
+from profiling import GenerationProfile
+
+def generate_timetable(data, sem, tracer=None, engine="greedy", workers=None, starts=None, pick="first",
+                       seed=None, cache=True, repair=False, calendar=None, optimize=None, progress=None,
+                       cancel=None, profile=False, cprofile=None, pinned_labs=None):
+    """
+    Generate the timetable for one semester.
+    tracer: optional tracing.Tracer - controls verbosity and where output goes
+            (default: INFO level to stdout)
+    engine: "greedy" (randomized heuristic with retries, default) or
+            "exact" (constraint solver - complete, or proves no timetable exists)
+    workers: greedy only - run `starts` differently-seeded attempts in a pool
+             of this many processes instead of the sequential retries
+    pick: "first" (first complete timetable) or "best" (wait for all starts,
+          lowest soft-constraint score wins)
+    seed: seeds the random search so a run can be reproduced
+    cache: reuse / store complete results in the on-disk result cache
+    repair: start from the saved timetable (latest_schedules.json) and only
+            re-place what the current inputs invalidate; falls back to a
+            full generation when there is nothing to repair
+    calendar: resource_calendar.ResourceCalendar with other semesters'
+              bookings - teachers/rooms are kept free at those times
+    optimize: seconds of simulated annealing on a complete timetable to cut
+              preference penalties, same-day repeats and idle gaps
+              (adds "quality": {"before": ..., "after": ...} to the result)
+    progress: greedy retries only - callback(info), see generate_timetable_anytime
+    cancel: greedy retries only - threading.Event; once set the search stops
+            at the next check and returns what it has ("cancelled": True)
+    profile: add "profile": {"seconds", "phases" (wall time per phase, summed
+             over retries), "counters" (availability checks, candidate slots,
+             placements, swaps, rollbacks), "peak_memory_kb", "cprofile"} to
+             the result; the result cache is bypassed. Counters only cover
+             this process (not multi-start workers). A
+             profiling.GenerationProfile may be passed instead of True,
+             e.g. GenerationProfile(memory=False) for timings without
+             tracemalloc overhead
+    cprofile: path - also profile with cProfile and dump the stats there
+              (implies profile)
+    pinned_labs: lab blocks already laid out (department mode) -
+                 [(sec, code, day, slot_idx, room), ...], kept as they are
+    """
+    tracer = tracer or default_tracer
+    if engine not in ("greedy", "exact"):
+        raise ValueError(f"Unknown engine '{engine}' (use 'greedy' or 'exact')")
+    
+    if isinstance(profile, GenerationProfile):
+        profiler = profile
+    else:
+        profiler = GenerationProfile(cprofile_path=cprofile) if profile or cprofile else None
+    if profiler is not None:
+        profiler.start()
+    
+    # 🔥 Compile teacher availability ONCE per generation (reload to get latest data!)
+    # One per call, so generations running side by side never share it
+    validator = ConstraintValidator(tracer=tracer)
+    
+    # 💾 Same inputs + seed + options -> same timetable, skip the search
+    cache_key = None
+    if cache and not repair and profiler is None:
+        cache_key = result_cache.input_hash(data, sem, validator.availability_data, seed=seed, engine=engine,
+                                            multi_start=bool(workers and workers > 1), starts=starts, pick=pick,
+                                            calendar=calendar.fingerprint(sem) if calendar is not None else None,
+                                            optimize=optimize, pinned_labs=pinned_labs)
+        cached = result_cache.load(cache_key)
+        if cached is not None:
+            tracer.emit(INFO, "generate", f"💾 Semester {sem}: inputs unchanged, using cached timetable ({cache_key[:12]})")
+            cached["cached"] = True
+            return cached
+    
+    # 📚 Compile the semester (subjects, demands, slot grid) ONCE as well
+    model = ProblemModel(data, sem, calendar, pinned_labs)
+    if seed is not None:
+        model.rng.seed(seed)
+    
+    if repair:
+        if profiler is not None:
+            profiler.enter("repair")
+        result = repair_timetable(model, validator, tracer)
+        if result is not None:
+            return _attach_profile(result, profiler, tracer, validator)
+        tracer.emit(INFO, "generate", "  No repairable saved timetable - generating from scratch")
+    
+    # 🩺 Provably impossible inputs fail in milliseconds, with the reason
+    if profiler is not None:
+        profiler.enter("feasibility")
+    problems = check_feasibility(model, validator)
+    if problems:
+        return _attach_profile(infeasible_result(model, problems, tracer), profiler, tracer, validator)
+    
+    if engine == "exact":
+        if profiler is not None:
+            profiler.enter("exact")
+        result = solve_exact(model, validator, tracer)
+    elif workers and workers > 1:
+        if profiler is not None:
+            profiler.enter("multi_start")
+        result = _generate_multi_start(model, tracer, workers, starts or workers, pick)
+    else:
+        result = _generate_with_retries(model, validator, tracer, progress, cancel, profiler)
+    
+    if optimize and result["success"]:
+        if profiler is not None:
+            profiler.enter("optimize")
+        _optimize_result(model, validator, result, optimize, tracer)
+    
+    if cache_key and result["success"]:
+        result_cache.save(cache_key, result)
+    return _attach_profile(result, profiler, tracer, validator)
+
+def _attach_profile(result, profiler, tracer, validator):
+    """Stop the profiler (if any) and add its report to the result"""
+    if profiler is None:
+        return result
+    profiler.count("availability_checks", validator.checks)
+    result["profile"] = report = profiler.finish()
+    phases = ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in report["phases"].items())
+    tracer.emit(INFO, "profile", f"\n⏱️ PROFILE: {report['seconds']:.2f}s ({phases})")
+    tracer.emit(INFO, "profile", f"   {report['counters']}, peak memory {report['peak_memory_kb']} KB")
+    if report["cprofile"]:
+        tracer.emit(INFO, "profile", f"   cProfile stats written to {report['cprofile']}")
+    return result
+
+def generate_timetable_anytime(data, sem, budget, progress=None, tracer=None, calendar=None, optimize=True,
+                               cancel=None):
+    """
+    Best timetable for one semester found within `budget` seconds.
+    Randomized attempts run until one is complete or the budget is spent
+    (an attempt running into the deadline cuts its repair phases short);
+    time left after a complete timetable goes to the quality optimizer
+    when optimize is set: it anneals in rounds of OPTIMIZE_TIME_LIMIT
+    seconds and stops at the first round that doesn't improve the score,
+    so the budget is a cap, not a wait.
+    progress: optional callback(info), info = {"sem", "phase", "remaining"
+              (lectures still unplaced in the current attempt), "best_score"
+              (soft_score of the best result so far, None before the
+              first), "attempt", "elapsed"}
+    cancel: optional threading.Event - once set, the search stops at the
+            next check and the best result so far is returned
+    Returns the best result dict plus "complete" (every class placed),
+    "elapsed" seconds and "cancelled".
+    """
+    tracer = tracer or default_tracer
+    deadline = time.time() + budget
+
+    validator = ConstraintValidator(tracer=tracer)
+    model = ProblemModel(data, sem, calendar)
+    report = _ProgressReport(progress, sem)
+
+    problems = check_feasibility(model, validator)
+    if problems:
+        report.best = infeasible_result(model, problems, tracer)
+    else:
+        tracer.emit(INFO, "generate", f"\n⏱️ ANYTIME GENERATION: semester {sem}, budget {budget:g}s")
+        # At least one attempt, however small the budget
+        while report.best is None or (time.time() < deadline and not _cancelled(cancel)):
+            report.attempt += 1
+            result = _attempt_timetable_generation(model, validator, report.attempt, tracer, report, deadline, cancel)
+            if report.best is None or soft_score(result) < soft_score(report.best):
+                report.best = result
+            if result["success"] or result.get("status") == "unsat":
+                break
+
+        left = deadline - time.time()
+        before = None
+        while optimize and report.best["success"] and left > 0.05 and not _cancelled(cancel):
+            report("optimize", 0)
+            _optimize_result(model, validator, report.best, min(left, OPTIMIZE_TIME_LIMIT), tracer)
+            quality = report.best["quality"]
+            before = before or quality["before"]
+            if quality["after"]["total"] >= quality["before"]["total"]:
+                break
+            left = deadline - time.time()
+        if before is not None:
+            report.best["quality"]["before"] = before
+
+    best = report.best
+    best["complete"] = bool(best["success"])
+    best["elapsed"] = time.time() - report.started
+    best["cancelled"] = _cancelled(cancel)
+    report("done", best.get("missing", 0))
+    tracer.emit(INFO, "generate", f"\n{'✅ Complete' if best['complete'] else '❌ Incomplete'} timetable "
+                                  f"after {report.attempt} attempts in {best['elapsed']:.2f}s "
+                                  f"(score {soft_score(best)})")
+    return best
+
+class _ProgressReport:
+    """Turns an attempt's (phase, remaining) events into progress(info) calls"""
+
+    def __init__(self, callback, sem):
+        self.callback = callback
+        self.sem = sem
+        self.started = time.time()
+        self.best = None
+        self.attempt = 0
+
+    def __call__(self, phase, remaining):
+        if self.callback is not None:
+            self.callback({"sem": self.sem, "phase": phase, "remaining": remaining,
+                           "best_score": soft_score(self.best) if self.best is not None else None,
+                           "attempt": self.attempt, "elapsed": time.time() - self.started})
+
+def _cancelled(cancel):
+    return cancel is not None and cancel.is_set()
+
+def _optimize_result(model, validator, result, time_limit, tracer):
+    """Replace a complete result's schedule with the annealed one"""
+    schedule, before, after = optimize_timetable(model, validator, result["schedule"], time_limit, tracer)
+    classes = state_from_schedule(model, schedule).scheduled_classes(model.sem)
+    violations, warnings = validator.validate_schedule(classes)
+    result.update({
+        "html": generate_html(model.sem, model.sections, model.days, model.time_slots, schedule),
+        "schedule": schedule,
+        "violations": len(violations),
+        "penalty": sum(w['penalty'] for w in warnings),
+        "quality": {"before": before, "after": after}
+    })
+
+def _generate_with_retries(model, validator, tracer, progress=None, cancel=None, profile=None):
+    """Sequential attempts until one schedules everything"""
     # RETRY MECHANISM: Try up to 5 times if scheduling fails
     max_attempts = 5
+    report = _ProgressReport(progress, model.sem)
     
     for attempt_num in range(1, max_attempts + 1):
         if attempt_num > 1:
-            print(f"\n🔄 RETRY #{attempt_num}: Restarting with different randomization...")
+            tracer.emit(INFO, "generate", f"\n🔄 RETRY #{attempt_num}: Restarting with different randomization...")
         
-        result = _attempt_timetable_generation(data, sem, attempt_num)
+        report.attempt = attempt_num
+        result = _attempt_timetable_generation(model, validator, attempt_num, tracer, report, cancel=cancel,
+                                               profile=profile)
+        if report.best is None or soft_score(result) < soft_score(report.best):
+            report.best = result
         
-        if result["success"]:
+        if result["success"] or result.get("status") == "unsat":
+            return result
+        if _cancelled(cancel):
+            tracer.emit(INFO, "generate", f"\n⏹️ Cancelled after {attempt_num} attempts")
+            result["cancelled"] = True
             return result
     
     # All attempts failed
-    print(f"\n❌ FAILED after {max_attempts} attempts")
+    tracer.emit(INFO, "generate", f"\n❌ FAILED after {max_attempts} attempts")
+    return result
+
+def soft_score(result):
+    """
+    Lower is better: missing lectures dominate, then hard availability
+    violations, then the summed preference penalties.
+    """
+    return (result.get("missing", 0) * 1000000 + result.get("violations", 0) * 1000 +
+            result.get("penalty", 0))
+
+def _multi_start_worker(model, attempt_num, seed):
+    """Process-pool entry point: one seeded, silent attempt"""
+    model.rng.seed(seed)
+    validator = ConstraintValidator(tracer=null_tracer)
+    result = _attempt_timetable_generation(model, validator, attempt_num, null_tracer)
+    result["seed"] = seed
     return result
 
-def _attempt_timetable_generation(data, sem, attempt_num):
-    """Single attempt at generating timetable"""
+def _generate_multi_start(model, tracer, workers, starts, pick):
+    """Run `starts` seeded attempts on `workers` processes (see generate_timetable)"""
+    if pick not in ("first", "best"):
+        raise ValueError(f"Unknown pick '{pick}' (use 'first' or 'best')")
+
+    base_seed = model.rng.randrange(1 << 30)
+    tracer.emit(INFO, "generate", f"\n🚀 MULTI-START: {starts} seeded attempts on {workers} processes (pick={pick})")
+
+    best = None
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(_multi_start_worker, model, n + 1, base_seed + n) for n in range(starts)]
+        for future in as_completed(futures):
+            result = future.result()
+            tracer.emit(INFO, "generate", f"  seed {result['seed']}: "
+                                          f"{'✅ complete' if result['success'] else '❌ incomplete'}, "
+                                          f"score {soft_score(result)}")
+            if best is None or soft_score(result) < soft_score(best):
+                best = result
+            if (pick == "first" and result["success"]) or result.get("status") == "unsat":
+                break
+    finally:
+        # Don't wait for attempts that are no longer needed
+        pool.shutdown(wait=pick == "best", cancel_futures=True)
+
+    if best["success"]:
+        tracer.emit(INFO, "generate", f"\n✅ Using seed {best['seed']} (score {soft_score(best)})")
+    else:
+        tracer.emit(INFO, "generate", f"\n❌ FAILED: no complete timetable in {starts} starts, returning the closest one")
+    return best
+
+def _attempt_timetable_generation(model, validator, attempt_num, tracer=default_tracer, progress=None, deadline=None,
+                                  cancel=None, profile=None):
+    """
+    Single attempt at generating timetable
+    progress: optional callback(phase, lectures remaining), called when a
+              phase starts and on every change
+    deadline: optional time.time() value - the repair phases stop there and
+              the attempt reports what it has
+    cancel: optional threading.Event, checked like the deadline
+    profile: optional profiling.GenerationProfile - gets the phase switches
+             and the attempt's counters
+    """
+    sem = model.sem
     if attempt_num == 1:
-        print(f"\n=== ULTIMATE FINAL BOSS SCHEDULING FOR SEMESTER {sem} ===")
-        print(f"🚨 CUTOFF: No classes scheduled at or after 4:45 PM")
-        print(f"🔥 CONSTRAINT-AWARE SCHEDULING: Teacher availability & preferences ENABLED")
-    
-    # 🔥 Initialize constraint validator (reload to get latest data!)
-    global validator
-    validator = ConstraintValidator()
-    scheduled_classes = []  # Track all scheduled classes for validation
-    
-    # 🔥 Track classes per day per teacher for max_classes constraint
-    teacher_classes_per_day = defaultdict(lambda: defaultdict(int))
-    
-    sections = data.sections.get(sem, [])
+        tracer.emit(INFO, "setup", f"\n=== ULTIMATE FINAL BOSS SCHEDULING FOR SEMESTER {sem} ===")
+        tracer.emit(INFO, "setup", f"🚨 CUTOFF: No classes scheduled at or after 4:45 PM")
+        tracer.emit(INFO, "setup", f"🔥 CONSTRAINT-AWARE SCHEDULING: Teacher availability & preferences ENABLED")
+
+    rng = model.rng
+    sections = model.sections
     if not sections:
         return {"html": "<h2>No sections found</h2>", "success": False}
-    
+
     if attempt_num == 1:
-        print(f"Sections: {sections}")
-    
-    days = ["Friday", "Saturday"] if sem == "7" else ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-    
-    # Build time slots
-    time_slots = {}
-    for sec in sections:
-        for day in days:
-            cfg = data.timings.get(sem, {}).get(sec, {}).get(day)
-            if not cfg:
-                continue
-            current = parse_time(cfg["start_time"])
-            duration = cfg["class_dur"]
-            num = cfg["num_classes"]
-            breaks = cfg.get("breaks", [])
-            
-            slots = []
-            for _ in range(num):
-                # 🚨 CUTOFF: Don't create slots starting at or after 4:45 PM (1005 min)
-                if current >= 1005:  # 4:45 PM = 16*60+45
-                    break
-                    
-                for brk in breaks:
-                    bs = parse_time(brk["start"])
-                    be = parse_time(brk["end"])
-                    if bs <= current < be:
-                        current = be
-                slots.append((current, current + duration))
-                current += duration
-            time_slots[(sec, day)] = slots
-
-    schedule = {}
-    teacher_busy = defaultdict(set)
-    room_busy = {r["name"]: set() for r in data.classrooms}
-    
-    def get_time_key(day, start_time):
-        return (day, start_time)
+        tracer.emit(INFO, "setup", f"Sections: {sections}")
+
+    days = model.days
+    time_slots = model.time_slots
+
+    # 🧮 Dense integer-indexed state: all occupancy checks are bit operations
+    state = model.new_state()
+    objective = ObjectiveEngine(model, validator, state)
+    sec_id = state.sec_id
+    cells = state.cells
+    cell_mask = state.cell_mask
+    slot_mask = state.slot_mask
+    teacher_busy = state.teacher_busy
+    teacher_day_count = state.teacher_day_count
 
     # Analyze teacher workload
-    teacher_sections = defaultdict(list)
-    for sec in sections:
-        for code, mapping in data.mappings.get(sem, {}).get(sec, {}).items():
-            teacher = mapping.get('theory')
-            if teacher and sec not in teacher_sections[teacher]:
-                teacher_sections[teacher].append(sec)
-    
+    teacher_sections = model.teacher_sections
+
     if attempt_num == 1:
-        print(f"Teachers with 2+ sections: {len([t for t, secs in teacher_sections.items() if len(secs) >= 2])}")
+        tracer.emit(INFO, "setup", f"Teachers with 2+ sections: {len([t for t, secs in teacher_sections.items() if len(secs) >= 2])}")
         for t, secs in list(teacher_sections.items())[:5]:
             if len(secs) >= 2:
-                print(f"  {t}: {secs}")
-    
+                tracer.emit(INFO, "setup", f"  {t}: {secs}")
+
     # Initialize tracking structures
-    lectures_remaining = {}
-    for sec in sections:
-        lectures_remaining[sec] = {}
-        for code, mapping in data.mappings.get(sem, {}).get(sec, {}).items():
-            sub = next((s for s in data.subjects[sem] if s["code"] == code), None)
-            if not sub or sub["elective"] == "yes" or sub.get("open_elective") == "yes" or sub["l"] == 0:
-                continue
-            lectures_remaining[sec][code] = sub["l"]
-    
-    teacher_section_slots = defaultdict(lambda: defaultdict(set))
-    
+    phase = "setup"
+    stats = Counter()  # candidate slots, placements, swaps, rollbacks (for profiling)
+
+    def report(remaining):
+        if progress is not None:
+            progress(phase, remaining)
+
+    def enter(name):
+        nonlocal phase
+        phase = name
+        if profile is not None:
+            profile.enter(name)
+        report(demand.total)
+
+    def out_of_time():
+        return (deadline is not None and time.time() > deadline) or _cancelled(cancel)
+
+    demand = DemandTracker(model, on_change=report)
+
     # SKIP PRE-SCHEDULING - it blocks too many slots!
     # Go straight to smart scheduling with more attempts
 
     # STEP 1: Open Electives (keep first - they're pre-scheduled)
-    for sem_key in data.open_elective_schedule:
-        if sem_key == sem:
-            for sec in data.open_elective_schedule[sem_key]:
-                if sec not in sections:
-                    continue
-                for oe_code, slot_list in data.open_elective_schedule[sem_key][sec].items():
-                    mapping = data.mappings.get(sem, {}).get(sec, {}).get(oe_code)
-                    if not mapping:
-                        continue
-                    teacher = mapping['theory']
-                    for oe_info in slot_list:
-                        day = oe_info['day']
-                        slot_idx = oe_info['slot_index']
-                        room = oe_info['room']
-                        if (sec, day) in time_slots and slot_idx < len(time_slots[(sec, day)]):
-                            start_time, end_time = time_slots[(sec, day)][slot_idx]
-                            time_key = get_time_key(day, start_time)
-                            
-                            # ✅ CHECK CONSTRAINT: Warn if open elective violates teacher constraints
-                            start_12h = min_to_time_12h(start_time)
-                            end_12h = min_to_time_12h(end_time)
-                            available, reason = validator.is_teacher_available(teacher, day, start_12h, end_12h)
-                            if not available:
-                                print(f"  ⚠️ Open Elective {oe_code} scheduled despite constraint: {teacher} - {reason}")
-                            
-                            schedule[(sec, day, slot_idx)] = {
-                                "type": "open_elective",
-                                "code": oe_code,
-                                "teacher": teacher,
-                                "room": room
-                            }
-                            teacher_busy[teacher].add(time_key)
-                            room_busy[room].add(time_key)
-                            
-                            # ✅ Track for validation
-                            scheduled_classes.append({
-                                'day': day,
-                                'start_time': min_to_time_12h(start_time),
-                                'end_time': min_to_time_12h(end_time),
-                                'subject': oe_code,
-                                'teacher': teacher,
-                                'section': sec,
-                                'semester': sem,
-                                'room': room,
-                                'type': 'open_elective'
-                            })
-
-    # STEP 2: Labs (with constraints per semester)
+    enter("open_electives")
+    for sec, oe_code, teacher, day, slot_idx, room in model.open_electives:
+        if (sec, day) in time_slots and slot_idx < len(time_slots[(sec, day)]):
+            start_time, end_time = time_slots[(sec, day)][slot_idx]
+
+            # ✅ CHECK CONSTRAINT: Warn if open elective violates teacher constraints
+            available, reason = validator.is_available_minutes(teacher, day, start_time, end_time)
+            if not available:
+                tracer.emit(INFO, "open_electives", f"  ⚠️ Open Elective {oe_code} scheduled despite constraint: {teacher} - {reason}")
+
+            state.place_open_elective(sec_id[sec], state.day_id[day], slot_idx, oe_code, teacher, room)
+
+    # STEP 2: Labs - all sections solved together as one exact subproblem
+    # (backtracking + forward checking), so an early choice can't strand a later lab
     # SEMESTER 3: At most ONE day can have 2 labs, rest have max 1 lab
     # SEMESTER 5, 7: Max 1 lab per day (any day)
-    labs_per_day = defaultdict(lambda: defaultdict(int))  # Track labs count: labs_per_day[sec][day]
-    days_with_2_labs = defaultdict(int)  # Track how many days have 2 labs per section (ONLY for sem 3)
-    
-    for sec in sections:
-        lab_subjects = [(code, mapping) for code, mapping in data.mappings.get(sem, {}).get(sec, {}).items()
-                       if next((s for s in data.subjects[sem] if s["code"] == code), {}).get("islab") == "yes"
-                       and len(mapping.get("lab", [])) >= 2]
-        
-        for code, mapping in lab_subjects:
-            labs = mapping.get("lab", [])
-            teacher1, teacher2 = labs[0], labs[1]
-            placed = False
-            
-            # RANDOMIZE day order so labs don't always go Mon-Tue-Wed!
-            shuffled_days = days.copy()
-            random.shuffle(shuffled_days)
-            
-            for day in shuffled_days:
-                if placed:
-                    break
-                
-                # SEMESTER 3 SPECIAL: At most ONE day can have 2 labs
-                if sem == "3":
-                    # If this day already has 2 labs, skip it (can't place 3rd)
-                    if labs_per_day[sec][day] >= 2:
-                        continue
-                    # If another day already has 2 labs AND current day has 1, skip it (can't add 2nd)
-                    if days_with_2_labs[sec] >= 1 and labs_per_day[sec][day] >= 1:
-                        continue
-                    # Otherwise: Can place lab (might result in 1 or 2 labs on this day)
-                else:
-                    # OTHER SEMESTERS (5, 7): Max 1 lab per day (any day, just spread them)
-                    if labs_per_day[sec][day] >= 1:
-                        continue
-                
-                slots = time_slots.get((sec, day), [])
-                
-                # 🚀 SOLUTION 2: RANDOMIZE SLOT POSITIONS TOO!
-                slot_indices = list(range(len(slots) - 1))
-                random.shuffle(slot_indices)
-                
-                for idx in slot_indices:
-                    start1, end1 = slots[idx]
-                    start2, end2 = slots[idx + 1]
-                    
-                    if end1 != start2:
-                        continue
-                    if (sec, day, idx) in schedule or (sec, day, idx + 1) in schedule:
-                        continue
-                    
-                    # ✅ CHECK CONSTRAINT: Both lab teachers must be available
-                    start_12h = min_to_time_12h(start1)
-                    end_12h = min_to_time_12h(end2)
-                    
-                    available1, reason1 = validator.is_teacher_available(teacher1, day, start_12h, end_12h)
-                    if not available1:
-                        # print(f"    ⏭️ {teacher1} not available for lab {code} on {day} {start_12h}: {reason1}")
-                        continue  # Teacher 1 not available, skip this slot
-                    
-                    available2, reason2 = validator.is_teacher_available(teacher2, day, start_12h, end_12h)
-                    if not available2:
-                        # print(f"    ⏭️ {teacher2} not available for lab {code} on {day} {start_12h}: {reason2}")
-                        continue  # Teacher 2 not available, skip this slot
-                    
-                    time_key1 = get_time_key(day, start1)
-                    time_key2 = get_time_key(day, start2)
-                    
-                    if time_key1 in teacher_busy[teacher1] or time_key2 in teacher_busy[teacher2]:
-                        continue
-                    
-                    labs_available = [r for r in data.classrooms if r["is_lab"] == "yes" 
-                                     and time_key1 not in room_busy[r["name"]] 
-                                     and time_key2 not in room_busy[r["name"]]]
-                    
-                    if labs_available:
-                        lab_room = labs_available[0]["name"]
-                        schedule[(sec, day, idx)] = {
-                            "type": "lab",
-                            "code": code,
-                            "teacher": f"{teacher1}/{teacher2}",
-                            "room": lab_room,
-                            "lab_span": 2
-                        }
-                        schedule[(sec, day, idx + 1)] = {
-                            "type": "lab",
-                            "code": code,
-                            "teacher": f"{teacher1}/{teacher2}",
-                            "room": lab_room,
-                            "skip": True
-                        }
-                        teacher_busy[teacher1].add(time_key1)
-                        teacher_busy[teacher1].add(time_key2)
-                        teacher_busy[teacher2].add(time_key1)
-                        teacher_busy[teacher2].add(time_key2)
-                        room_busy[lab_room].add(time_key1)
-                        room_busy[lab_room].add(time_key2)
-                        
-                        # INCREMENT lab count for this day!
-                        labs_per_day[sec][day] += 1
-                        
-                        # 🔥 Track classes per day for both lab teachers
-                        teacher_classes_per_day[teacher1][day] += 1
-                        teacher_classes_per_day[teacher2][day] += 1
-                        
-                        # SEMESTER 3 ONLY: Track if this day just reached 2 labs
-                        if sem == "3" and labs_per_day[sec][day] == 2:
-                            days_with_2_labs[sec] += 1
-                            print(f"  ℹ️  Sem 3: {sec} now has 2 labs on {day} (the one allowed 2-lab day)")
-                        
-                        # ✅ Track for validation (both teachers)
-                        scheduled_classes.append({
-                            'day': day,
-                            'start_time': min_to_time_12h(start1),
-                            'end_time': min_to_time_12h(end2),
-                            'subject': code,
-                            'teacher': teacher1,
-                            'section': sec,
-                            'semester': sem,
-                            'room': lab_room,
-                            'type': 'lab'
-                        })
-                        scheduled_classes.append({
-                            'day': day,
-                            'start_time': min_to_time_12h(start1),
-                            'end_time': min_to_time_12h(end2),
-                            'subject': code,
-                            'teacher': teacher2,
-                            'section': sec,
-                            'semester': sem,
-                            'room': lab_room,
-                            'type': 'lab'
-                        })
-                        
-                        placed = True
-                        break
+    enter("labs")
+    place_pinned_labs(model, state)
+    lab_limit = LAB_TIME_LIMIT if deadline is None else max(0.01, min(LAB_TIME_LIMIT, deadline - time.time()))
+    if _cancelled(cancel):
+        lab_limit = 0.01
+    lab_status, lab_conflicts = place_labs(model, validator, state, lab_limit, tracer)
+    if lab_status == "unsat":
+        # No lab layout exists - every retry would fail the same way. Under a
+        # calendar that is only relative to the other semesters' bookings
+        if profile is not None:
+            profile.add(stats)
+        stage = "lab placement" if model.calendar is None else "lab placement on the shared calendar"
+        return infeasible_result(model, lab_conflicts, tracer, stage=stage)
+    unplaced_labs = lab_conflicts if lab_status == "unknown" else []
+    if unplaced_labs:
+        tracer.emit(INFO, "labs", f"  ⏱️ Lab layout search hit its time limit - {len(unplaced_labs)} labs unplaced")
 
-    # STEP 3: Electives
-    elective_subjects = [s for s in data.subjects.get(sem, []) if s["elective"] == "yes" and s.get("open_elective", "no") != "yes"]
-    
-    if elective_subjects:
-        max_lectures = max([s["l"] for s in elective_subjects])
-        for lec_num in range(max_lectures):
-            placed = False
-            for day in days:
-                if placed:
-                    break
-                max_slots = max([len(time_slots.get((sec, day), [])) for sec in sections], default=0)
-                for try_slot_idx in range(max_slots):
-                    all_ok = True
-                    for sec in sections:
-                        slots = time_slots.get((sec, day), [])
-                        if try_slot_idx >= len(slots) or (sec, day, try_slot_idx) in schedule:
-                            all_ok = False
-                            break
-                    if not all_ok:
-                        continue
-                    
-                    teachers_ok = True
-                    for sec in sections:
-                        slots = time_slots.get((sec, day), [])
-                        if try_slot_idx >= len(slots):
-                            continue
-                        start_time, end_time = slots[try_slot_idx]
-                        time_key = get_time_key(day, start_time)
-                        
-                        # Convert to 12h for constraint checking
-                        start_12h = min_to_time_12h(start_time)
-                        end_12h = min_to_time_12h(end_time)
-                        
-                        for elec in elective_subjects:
-                            if lec_num >= elec["l"]:
-                                continue
-                            mapping = data.mappings.get(sem, {}).get(sec, {}).get(elec["code"])
-                            if mapping:
-                                teacher = mapping["theory"]
-                                
-                                # ✅ CHECK CONSTRAINT: Teacher must be available
-                                available, reason = validator.is_teacher_available(teacher, day, start_12h, end_12h)
-                                if not available:
-                                    teachers_ok = False
-                                    break
-                                
-                                if time_key in teacher_busy[teacher]:
-                                    teachers_ok = False
-                                    break
-                        if not teachers_ok:
-                            break
-                    if not teachers_ok:
-                        continue
-                    
-                    elective_room_map = {}
-                    rooms_ok = True
-                    all_time_keys = set()
-                    for sec in sections:
-                        slots = time_slots.get((sec, day), [])
-                        if try_slot_idx < len(slots):
-                            start_time, _ = slots[try_slot_idx]
-                            all_time_keys.add(get_time_key(day, start_time))
-                    
-                    for elec in elective_subjects:
-                        if lec_num >= elec["l"]:
-                            continue
-                        available = [r["name"] for r in data.classrooms
-                                   if r["is_lab"] == "no"
-                                   and all(tk not in room_busy[r["name"]] for tk in all_time_keys)
-                                   and r["name"] not in elective_room_map.values()]
-                        if not available:
-                            rooms_ok = False
-                            break
-                        elective_room_map[elec["code"]] = available[0]
-                    if not rooms_ok:
-                        continue
-                    
-                    for sec in sections:
-                        slots = time_slots.get((sec, day), [])
-                        if try_slot_idx >= len(slots):
-                            continue
-                        start_time, _ = slots[try_slot_idx]
-                        time_key = get_time_key(day, start_time)
-                        
-                        codes_list = []
-                        rooms_dict = {}
-                        teachers_dict = {}
-                        
-                        for elec in elective_subjects:
-                            if lec_num >= elec["l"]:
-                                continue
-                            mapping = data.mappings.get(sem, {}).get(sec, {}).get(elec["code"])
-                            if mapping:
-                                teacher = mapping["theory"]
-                                room = elective_room_map[elec["code"]]
-                                teacher_busy[teacher].add(time_key)
-                                # 🔥 Track classes per day for this teacher
-                                teacher_classes_per_day[teacher][day] += 1
-                                codes_list.append(elec["code"])
-                                rooms_dict[elec["code"]] = room
-                                teachers_dict[elec["code"]] = teacher
-                        
-                        for code in codes_list:
-                            room = elective_room_map[code]
-                            for tk in all_time_keys:
-                                room_busy[room].add(tk)
-                        
-                        schedule[(sec, day, try_slot_idx)] = {
-                            "type": "elective",
-                            "codes": codes_list,
-                            "rooms": rooms_dict,
-                            "teachers": teachers_dict
-                        }
-                        
-                        # ✅ Track for validation
-                        slots = time_slots.get((sec, day), [])
-                        if try_slot_idx < len(slots):
-                            start_time, end_time = slots[try_slot_idx]
-                            for code in codes_list:
-                                scheduled_classes.append({
-                                    'day': day,
-                                    'start_time': min_to_time_12h(start_time),
-                                    'end_time': min_to_time_12h(end_time),
-                                    'subject': code,
-                                    'teacher': teachers_dict[code],
-                                    'section': sec,
-                                    'semester': sem,
-                                    'room': rooms_dict[code],
-                                    'type': 'elective'
-                                })
-                    
-                    placed = True
-                    break
+    # STEP 3: Electives - candidate slots are ANDed index masks, rooms come
+    # from the free-room index (see elective_slots.py)
+    enter("electives")
+    electives = ElectiveSlots(model, validator, state)
+    for lec_num in range(len(electives.groups)):
+        if not electives.place(lec_num):
+            tracer.emit(INFO, "electives", f"  ⚠️ Elective lecture #{lec_num + 1}: no common free slot with rooms")
 
     # STEP 4: THEORY LECTURES
-    
-    def place_lecture_smart(sec, code, teacher, sub):
-        """Smart placement avoiding cross-section conflicts"""
-        other_sections = [s for s in teacher_sections.get(teacher, []) if s != sec]
-        forbidden_times = set()
-        for other_sec in other_sections:
-            forbidden_times.update(teacher_section_slots[teacher][other_sec])
-        
+
+    def candidate_slots(sec, code, teacher):
+        """Every feasible (priority, d, idx) for one more lecture of sec/code"""
+        s = sec_id[sec]
+        t = state.teacher_id(teacher)
+        max_limit = validator.max_classes_limit(teacher)
+        busy = teacher_busy[t]
+        counts = teacher_day_count[t]
+
         available_slots = []
-        for day in days:
+        for d, day in enumerate(days):
             # REMOVED: Max 2 per day check - only checking consecutive now!
-            
-            slots = time_slots.get((sec, day), [])
-            for idx in range(len(slots)):
-                if (sec, day, idx) in schedule:
+
+            # 🔥 CHECK MAX CLASSES PER DAY
+            if max_limit is not None and counts[d] >= max_limit:
+                continue  # Teacher already at max classes for this day
+
+            slots = state.slots[s][d]
+            masks = slot_mask[s][d]
+            occupied = cell_mask[s][d]
+            forbidden = state.forbidden_mask(t, s, d)
+            n = len(slots)
+            stats["candidate_slots"] += n
+
+            for idx in range(n):
+                if (occupied >> idx) & 1:
                     continue
-                
-                start_time, end_time = slots[idx]
-                time_key = get_time_key(day, start_time)
-                
-                if time_key in teacher_busy[teacher]:
+
+                mask = masks[idx]
+                if busy[d] & mask:
                     continue
-                
+
+                start_time, end_time = slots[idx]
+
                 # ✅ CHECK CONSTRAINT: Teacher must be available
-                start_12h = min_to_time_12h(start_time)
-                end_12h = min_to_time_12h(end_time)
-                available, reason = validator.is_teacher_available(teacher, day, start_12h, end_12h)
+                available, reason = validator.is_available_minutes(teacher, day, start_time, end_time)
                 if not available:
                     continue  # Teacher not available, skip this slot
-                
-                available_rooms = [r["name"] for r in data.classrooms 
-                                 if r["is_lab"] == "no" and time_key not in room_busy[r["name"]]]
-                
-                if not available_rooms:
+
+                if not state.rooms_left(d, mask):
                     continue
-                
-                # 🔥 CHECK MAX CLASSES PER DAY
-                current_count = teacher_classes_per_day[teacher][day]
-                if teacher in validator.availability_data:
-                    max_classes = validator.availability_data[teacher].get('max_classes', 'No Limit')
-                    if max_classes != 'No Limit':
-                        try:
-                            max_limit = int(max_classes)
-                            if current_count >= max_limit:
-                                continue  # Teacher already at max classes for this day
-                        except:
-                            pass  # Invalid limit, ignore
-                
+
                 # 🔥 GET PREFERENCE PENALTY (soft constraint)
-                preference_penalty = validator.get_preference_penalty(teacher, start_12h)
-                
+                preference_penalty = validator.preference_penalty_minutes(teacher, start_time)
+
                 # PRIORITY SYSTEM:
                 # 1. Avoid teacher cross-section conflicts
                 # 2. NO 3+ same subjects in a row (HARD BLOCK!)
                 # 3. Soft preference to spread same subjects
                 # 4. 🔥 PREFER slots aligned with teacher preferences
-                
-                priority = 0 if time_key in forbidden_times else 1
-                
+
+                priority = 0 if forbidden & mask else 1
+
                 # 🔥 Apply preference penalty (higher penalty = lower priority)
                 priority -= (preference_penalty / 20.0)  # Scale down penalty
-                
+
                 # CHECK 1: Would this create 3+ in a row? (HARD BLOCK!)
-                would_create_3_in_row = False
-                
-                # Check if idx-1 and idx-2 are same subject
-                if idx >= 2:
-                    if (sec, day, idx-1) in schedule and (sec, day, idx-2) in schedule:
-                        entry1 = schedule[(sec, day, idx-1)]
-                        entry2 = schedule[(sec, day, idx-2)]
-                        if (entry1.get("code") == code and entry2.get("code") == code and
-                            entry1.get("type") != "lab" and entry2.get("type") != "lab"):
-                            would_create_3_in_row = True
-                
-                # Check if idx+1 and idx+2 are same subject
-                if idx <= len(slots) - 3:
-                    if (sec, day, idx+1) in schedule and (sec, day, idx+2) in schedule:
-                        entry1 = schedule[(sec, day, idx+1)]
-                        entry2 = schedule[(sec, day, idx+2)]
-                        if (entry1.get("code") == code and entry2.get("code") == code and
-                            entry1.get("type") != "lab" and entry2.get("type") != "lab"):
-                            would_create_3_in_row = True
-                
-                # Check if idx-1 same and idx+1 same (we'd be in the middle of 3)
-                if idx >= 1 and idx < len(slots) - 1:
-                    if (sec, day, idx-1) in schedule and (sec, day, idx+1) in schedule:
-                        entry1 = schedule[(sec, day, idx-1)]
-                        entry2 = schedule[(sec, day, idx+1)]
-                        if (entry1.get("code") == code and entry2.get("code") == code and
-                            entry1.get("type") != "lab" and entry2.get("type") != "lab"):
-                            would_create_3_in_row = True
-                
-                # HARD SKIP if creates 3 in a row!
-                if would_create_3_in_row:
+                if objective.creates_run(s, d, idx, code):
                     continue
-                
+
                 # ✅ Allow 2 consecutive freely - no penalty!
                 # Only hard constraint is 3+ consecutive (checked above)
-                
-                available_slots.append((priority, day, idx, time_key, available_rooms[0]))
-        
-        available_slots.sort(key=lambda x: x[0], reverse=True)
-        
-        if len(available_slots) > 0:
-            priority_groups = {}
-            for slot in available_slots:
-                p = slot[0]
-                if p not in priority_groups:
-                    priority_groups[p] = []
-                priority_groups[p].append(slot)
-            
-            shuffled_slots = []
-            for p in sorted(priority_groups.keys(), reverse=True):
-                group = priority_groups[p]
-                random.shuffle(group)
-                shuffled_slots.extend(group)
-            
-            available_slots = shuffled_slots
-        
-        for priority, day, idx, time_key, room in available_slots:
-            display_type = "lab" if sub["islab"] == "yes" else "theory"
-            schedule[(sec, day, idx)] = {
-                "type": display_type,
-                "code": code,
-                "teacher": teacher,
-                "room": room
-            }
-            teacher_busy[teacher].add(time_key)
-            room_busy[room].add(time_key)
-            teacher_section_slots[teacher][sec].add(time_key)
-            # 🔥 Track classes per day for this teacher
-            teacher_classes_per_day[teacher][day] += 1
-            # REMOVED: lectures_per_day_per_subject tracking
-            
-            # ✅ Track for validation
-            slots = time_slots.get((sec, day), [])
-            if idx < len(slots):
-                start_time, end_time = slots[idx]
-                scheduled_classes.append({
-                    'day': day,
-                    'start_time': min_to_time_12h(start_time),
-                    'end_time': min_to_time_12h(end_time),
-                    'subject': code,
-                    'teacher': teacher,
-                    'section': sec,
-                    'semester': sem,
-                    'room': room,
-                    'type': display_type
-                })
-            
-            return True
-        
-        return False
-    
-    print("ULTRA SMART SCHEDULING: 20000 attempts with intelligent conflict avoidance...")
-    
-    for attempt in range(20000):
-        if attempt % 2000 == 0 and attempt > 0:
-            remaining = sum(sum(lectures_remaining[s].values()) for s in sections)
-            print(f"  Attempt {attempt}: {remaining} lectures remaining...")
-        
-        shuffled_sections = sections.copy()
-        random.shuffle(shuffled_sections)
-        
-        for sec in shuffled_sections:
-            subjects = [(code, mapping, sub)
-                       for code, mapping in data.mappings.get(sem, {}).get(sec, {}).items()
-                       for sub in [next((s for s in data.subjects[sem] if s["code"] == code), None)]
-                       if sub and sub["elective"] != "yes" and sub.get("open_elective") != "yes"
-                       and sub["l"] > 0 and code in lectures_remaining.get(sec, {})
-                       and lectures_remaining[sec][code] > 0]
-            
-            random.shuffle(subjects)
-            
-            for code, mapping, sub in subjects:
-                if lectures_remaining[sec][code] <= 0:
-                    continue
-                teacher = mapping["theory"]
-                if place_lecture_smart(sec, code, teacher, sub):
-                    lectures_remaining[sec][code] -= 1
-                    break
-    
-    print("FINAL SWAP PHASE: Moving lectures (10000 attempts)...")
-    
-    for attempt in range(10000):  # DOUBLED from 5000 to 10000!
-        stuck = [(sec, code, mapping, sub)
-                 for sec in sections
-                 for code, mapping in data.mappings.get(sem, {}).get(sec, {}).items()
-                 for sub in [next((s for s in data.subjects[sem] if s["code"] == code), None)]
-                 if sub and code in lectures_remaining.get(sec, {}) and lectures_remaining[sec][code] > 0]
-        
-        if not stuck:
-            break
-        
-        sec, code, mapping, sub = random.choice(stuck)
-        teacher = mapping["theory"]
-        
-        teacher_lectures = []
-        for s in sections:
-            for d in days:
-                slots = time_slots.get((s, d), [])
-                for idx in range(len(slots)):
-                    if (s, d, idx) in schedule:
-                        entry = schedule[(s, d, idx)]
-                        if (entry.get("teacher") == teacher and 
-                            entry.get("type") not in ["open_elective", "elective", "lab"]):
-                            teacher_lectures.append((s, d, idx, entry["code"]))
-        
-        if not teacher_lectures:
+
+                available_slots.append((priority, d, idx))
+
+        return available_slots
+
+    def place_lecture_smart(sec, code, teacher, candidates=None):
+        """Smart placement avoiding cross-section conflicts"""
+        if candidates is None:
+            candidates = candidate_slots(sec, code, teacher)
+        if not candidates:
+            return False
+
+        # Best priority wins, random pick among equally good slots
+        best = max(c[0] for c in candidates)
+        priority, d, idx = rng.choice([c for c in candidates if c[0] == best])
+        state.place_theory(sec_id[sec], d, idx, code, teacher, None, model.display_type(code))
+        return True
+
+    # 🎯 MOST-CONSTRAINED-FIRST (DSATUR-style) placement:
+    # always place a lecture of the demand with the least slack
+    # (feasible slots - lectures still needed). Placements only ever remove
+    # feasible slots, so stored keys are upper bounds and are refreshed lazily.
+    tracer.emit(INFO, "theory", "MOST-CONSTRAINED-FIRST SCHEDULING: placing lectures with the fewest feasible slots first...")
+    enter("theory")
+
+    queue = []
+    for sec in sections:
+        for code, teacher, _ in model.theory[sec]:
+            need = demand.need(sec, code)
+            if need > 0:
+                slack = len(candidate_slots(sec, code, teacher)) - need
+                heapq.heappush(queue, (slack, rng.random(), sec, code, teacher))
+
+    placed_count = 0
+    dead_ends = 0
+    while queue:
+        old_slack, tie, sec, code, teacher = heapq.heappop(queue)
+        need = demand.need(sec, code)
+        candidates = candidate_slots(sec, code, teacher)
+        if not candidates:
+            dead_ends += 1  # can never become feasible again in this phase
             continue
-        
-        random.shuffle(teacher_lectures)
-        
-        # INCREASED from 5 to 15 swap attempts per stuck lecture!
-        for move_sec, move_day, move_idx, move_code in teacher_lectures[:15]:
-            move_slots = time_slots.get((move_sec, move_day), [])
-            move_start, _ = move_slots[move_idx]
-            move_time_key = get_time_key(move_day, move_start)
-            
-            old_entry = schedule[(move_sec, move_day, move_idx)]
-            old_room = old_entry["room"]
-            old_code = old_entry["code"]  # Store the code being removed
-            
-            del schedule[(move_sec, move_day, move_idx)]
-            teacher_busy[teacher].discard(move_time_key)
-            room_busy[old_room].discard(move_time_key)
-            teacher_section_slots[teacher][move_sec].discard(move_time_key)
-            # REMOVED: lectures_per_day_per_subject tracking
-            
-            if move_sec == sec:
-                if move_time_key not in teacher_busy[teacher]:
-                    available_rooms = [r["name"] for r in data.classrooms 
-                                     if r["is_lab"] == "no" and move_time_key not in room_busy[r["name"]]]
-                    if available_rooms:
-                        display_type = "lab" if sub["islab"] == "yes" else "theory"
-                        schedule[(sec, move_day, move_idx)] = {
-                            "type": display_type,
-                            "code": code,
-                            "teacher": teacher,
-                            "room": available_rooms[0]
-                        }
-                        teacher_busy[teacher].add(move_time_key)
-                        room_busy[available_rooms[0]].add(move_time_key)
-                        teacher_section_slots[teacher][sec].add(move_time_key)
-                        lectures_remaining[sec][code] -= 1
-                        # REMOVED: lectures_per_day_per_subject tracking
-                        
-                        move_sub = next((s for s in data.subjects[sem] if s["code"] == move_code), None)
-                        if not place_lecture_smart(move_sec, move_code, teacher, move_sub):
-                            if move_sec in lectures_remaining and move_code in lectures_remaining[move_sec]:
-                                lectures_remaining[move_sec][move_code] += 1
-                        
-                        break
-            
-            if place_lecture_smart(sec, code, teacher, sub):
-                lectures_remaining[sec][code] -= 1
-                
-                move_sub = next((s for s in data.subjects[sem] if s["code"] == move_code), None)
-                if not place_lecture_smart(move_sec, move_code, teacher, move_sub):
-                    if move_sec in lectures_remaining and move_code in lectures_remaining[move_sec]:
-                        lectures_remaining[move_sec][move_code] += 1
-                
-                break
-            else:
-                schedule[(move_sec, move_day, move_idx)] = old_entry
-                teacher_busy[teacher].add(move_time_key)
-                room_busy[old_room].add(move_time_key)
-                teacher_section_slots[teacher][move_sec].add(move_time_key)
-                # REMOVED: lectures_per_day_per_subject tracking
-    
+
+        slack = len(candidates) - need
+        if queue and slack > queue[0][0]:
+            heapq.heappush(queue, (slack, tie, sec, code, teacher))  # stale key, re-queue
+            continue
+
+        place_lecture_smart(sec, code, teacher, candidates)
+        demand.placed(sec, code)
+        placed_count += 1
+        if need > 1:
+            heapq.heappush(queue, (slack, rng.random(), sec, code, teacher))
+
+    stats["placements"] += placed_count
+    tracer.emit(INFO, "theory", f"  Placed {placed_count} lectures, {demand.total} remaining ({dead_ends} demands out of slots)")
+
+    # 🔗 EJECTION CHAINS: displace blockers (recursively) to fit the stuck lectures
+    tracer.emit(INFO, "swap", "EJECTION CHAIN PHASE: displacing blocking lectures to fit stuck ones...")
+    enter("ejection_chains")
+    chains = EjectionChains(model, validator, state, objective)
+
+    for round_num in range(3):
+        if not demand.total or out_of_time():
+            break
+
+        stuck = demand.stuck_lectures()
+        rng.shuffle(stuck)
+        before = demand.total
+        for sec, code, teacher in stuck:
+            while demand.need(sec, code) > 0 and not out_of_time() and chains.insert(sec, code, teacher):
+                demand.placed(sec, code)
+                stats["placements"] += 1
+        if demand.total == before:
+            break
+
+    stats["swaps"] += chains.displaced
+    stats["rollbacks"] += chains.rollbacks
+    if chains.chains:
+        tracer.emit(INFO, "swap", f"  {chains.chains} lectures placed via ejection chains, {demand.total} remaining")
+
     # BRUTE FORCE LAST RESORT - Try EVERY slot systematically
     # IGNORES quality constraints (3 in a row, compactness) - just places anywhere valid!
-    remaining_count = sum(sum(lectures_remaining[s].values()) for s in sections)
-    if remaining_count > 0:
-        print(f"BRUTE FORCE LAST RESORT: Trying all {remaining_count} remaining lectures...")
-        
+    if demand.total > 0 and not out_of_time():
+        tracer.emit(INFO, "brute_force", f"BRUTE FORCE LAST RESORT: Trying all {demand.total} remaining lectures...")
+        enter("brute_force")
+
         # Try up to 10 passes - keep going until nothing changes
         for pass_num in range(10):
-            stuck_before = sum(sum(lectures_remaining[s].values()) for s in sections)
-            
-            stuck = [(sec, code, mapping, sub)
-                     for sec in sections
-                     for code, mapping in data.mappings.get(sem, {}).get(sec, {}).items()
-                     for sub in [next((s for s in data.subjects[sem] if s["code"] == code), None)]
-                     if sub and code in lectures_remaining.get(sec, {}) and lectures_remaining[sec][code] > 0]
-            
-            if not stuck:
+            stuck_before = demand.total
+
+            if not stuck_before:
                 break
-            
+            if out_of_time():
+                tracer.emit(INFO, "brute_force", f"  ⏱️ Time budget spent (or cancelled) - stopping")
+                break
+
+            stuck = demand.stuck_lectures()
+
             # Shuffle to try different orders
-            random.shuffle(stuck)
-            
-            for sec, code, mapping, sub in stuck:
-                teacher = mapping["theory"]
-                
+            rng.shuffle(stuck)
+
+            for sec, code, teacher in stuck:
+                s = sec_id[sec]
+                t = state.teacher_id(teacher)
+
                 # DEBUG: Count why we can't place
                 total_slots = 0
                 occupied_slots = 0
                 teacher_busy_slots = 0
                 no_room_slots = 0
-                
-                while lectures_remaining[sec][code] > 0:
+
+                while demand.need(sec, code) > 0:
                     placed = False
-                    
+
                     # Try EVERY slot in this section - NO quality constraints!
-                    for day in days:
+                    for d, day in enumerate(days):
                         if placed:
                             break
-                        slots = time_slots.get((sec, day), [])
-                        for idx in range(len(slots)):
+                        for idx in range(len(cells[s][d])):
                             total_slots += 1
-                            
-                            if (sec, day, idx) in schedule:
+
+                            if (cell_mask[s][d] >> idx) & 1:
                                 occupied_slots += 1
                                 continue
-                            
-                            start_time, _ = slots[idx]
-                            time_key = get_time_key(day, start_time)
-                            
-                            if time_key in teacher_busy[teacher]:
+
+                            mask = slot_mask[s][d][idx]
+
+                            if teacher_busy[t][d] & mask:
                                 teacher_busy_slots += 1
                                 continue
-                            
-                            available_rooms = [r["name"] for r in data.classrooms 
-                                             if r["is_lab"] == "no" and time_key not in room_busy[r["name"]]]
-                            
-                            if not available_rooms:
+
+                            if not state.rooms_left(d, mask):
                                 no_room_slots += 1
                                 continue
-                            
+
                             # PLACE IT - ignore all quality constraints!
-                            display_type = "lab" if sub["islab"] == "yes" else "theory"
-                            schedule[(sec, day, idx)] = {
-                                "type": display_type,
-                                "code": code,
-                                "teacher": teacher,
-                                "room": available_rooms[0]
-                            }
-                            teacher_busy[teacher].add(time_key)
-                            room_busy[available_rooms[0]].add(time_key)
-                            teacher_section_slots[teacher][sec].add(time_key)
-                            lectures_remaining[sec][code] -= 1
-                            # REMOVED: lectures_per_day_per_subject tracking
-                            
+                            state.place_theory(s, d, idx, code, teacher, None, model.display_type(code))
+                            demand.placed(sec, code)
+                            stats["placements"] += 1
+
                             placed = True
-                            print(f"  ✅ Pass {pass_num+1}: Placed {sec}/{code} at {day} slot {idx}")
+                            if tracer.debug:
+                                tracer.emit(DEBUG, "brute_force", f"  ✅ Pass {pass_num+1}: Placed {sec}/{code} at {day} slot {idx}")
                             break
-                    
+
                     if not placed:
-                        print(f"  ❌ Cannot place {sec}/{code} (Teacher {teacher}):")
-                        print(f"     Total slots checked: {total_slots}")
-                        print(f"     Already occupied: {occupied_slots}")
-                        print(f"     Teacher busy: {teacher_busy_slots}")
-                        print(f"     No rooms: {no_room_slots}")
+                        tracer.emit(INFO, "brute_force", f"  ❌ Cannot place {sec}/{code} (Teacher {teacher}):")
+                        if tracer.debug:
+                            tracer.emit(DEBUG, "brute_force", f"     Total slots checked: {total_slots}")
+                            tracer.emit(DEBUG, "brute_force", f"     Already occupied: {occupied_slots}")
+                            tracer.emit(DEBUG, "brute_force", f"     Teacher busy: {teacher_busy_slots}")
+                            tracer.emit(DEBUG, "brute_force", f"     No rooms: {no_room_slots}")
                         break  # Can't place this lecture, move to next
-            
-            stuck_after = sum(sum(lectures_remaining[s].values()) for s in sections)
-            if stuck_after == stuck_before:
-                print(f"  Pass {pass_num+1}: No progress made with empty slots.")
-                
+                stats["candidate_slots"] += total_slots
+
+            if demand.total == stuck_before:
+                tracer.emit(INFO, "brute_force", f"  Pass {pass_num+1}: No progress made with empty slots.")
+
                 # LAST RESORT: Try SWAPPING existing lectures!
                 if pass_num >= 1:  # After just 2 failed passes, try desperate mode!
-                    print(f"  🔥 DESPERATE MODE: Trying swaps...")
+                    tracer.emit(INFO, "brute_force", f"  🔥 DESPERATE MODE: Trying swaps...")
                     swapped_any = False
-                    
-                    for sec, code, mapping, sub in stuck:
-                        if lectures_remaining[sec][code] <= 0:
+
+                    for sec, code, teacher in stuck:
+                        if demand.need(sec, code) <= 0:
                             continue
-                        
-                        teacher = mapping["theory"]
-                        
+
+                        s = sec_id[sec]
+                        t = state.teacher_id(teacher)
+
                         # Find ALL lectures by ANY teacher in this section
                         swap_candidates = []
-                        for day in days:
-                            slots = time_slots.get((sec, day), [])
-                            for idx in range(len(slots)):
-                                if (sec, day, idx) in schedule:
-                                    entry = schedule[(sec, day, idx)]
-                                    if entry.get("type") not in ["open_elective", "elective", "lab"]:
-                                        swap_candidates.append((day, idx, entry))
-                        
-                        random.shuffle(swap_candidates)
-                        
+                        for d in range(len(days)):
+                            for idx, entry in enumerate(cells[s][d]):
+                                if entry is not None and entry.get("type") not in ["open_elective", "elective", "lab"]:
+                                    swap_candidates.append((d, idx, entry))
+
+                        rng.shuffle(swap_candidates)
+
                         # Try swapping with other lectures
-                        for swap_day, swap_idx, swap_entry in swap_candidates[:30]:  # Try more swaps!
+                        for swap_d, swap_idx, swap_entry in swap_candidates[:30]:  # Try more swaps!
                             swap_code = swap_entry["code"]
-                            swap_teacher = swap_entry["teacher"]
-                            swap_room = swap_entry["room"]
-                            
-                            # Get time key
-                            swap_slots = time_slots.get((sec, swap_day), [])
-                            swap_start, _ = swap_slots[swap_idx]
-                            swap_time_key = get_time_key(swap_day, swap_start)
-                            
+                            swap_mask = slot_mask[s][swap_d][swap_idx]
+
                             # Can our stuck teacher use this slot?
-                            if swap_time_key in teacher_busy[teacher]:
+                            if teacher_busy[t][swap_d] & swap_mask:
                                 continue
-                            
+
                             # Remove the existing lecture
-                            del schedule[(sec, swap_day, swap_idx)]
-                            teacher_busy[swap_teacher].discard(swap_time_key)
-                            room_busy[swap_room].discard(swap_time_key)
-                            teacher_section_slots[swap_teacher][sec].discard(swap_time_key)
-                            # REMOVED: lectures_per_day_per_subject tracking
-                            
+                            state.remove_theory(s, swap_d, swap_idx)
+
                             # Place our stuck lecture
-                            available_rooms = [r["name"] for r in data.classrooms 
-                                             if r["is_lab"] == "no" and swap_time_key not in room_busy[r["name"]]]
-                            
-                            if available_rooms:
-                                display_type = "lab" if sub["islab"] == "yes" else "theory"
-                                schedule[(sec, swap_day, swap_idx)] = {
-                                    "type": display_type,
-                                    "code": code,
-                                    "teacher": teacher,
-                                    "room": available_rooms[0]
-                                }
-                                teacher_busy[teacher].add(swap_time_key)
-                                room_busy[available_rooms[0]].add(swap_time_key)
-                                teacher_section_slots[teacher][sec].add(swap_time_key)
-                                lectures_remaining[sec][code] -= 1
-                                # REMOVED: lectures_per_day_per_subject tracking
-                                
-                                print(f"  🔄 SWAPPED: Placed {sec}/{code}, removed {sec}/{swap_code}")
-                                
+                            if state.rooms_left(swap_d, swap_mask):
+                                state.place_theory(s, swap_d, swap_idx, code, teacher, None, model.display_type(code))
+                                demand.placed(sec, code)
+
+                                if tracer.debug:
+                                    tracer.emit(DEBUG, "brute_force", f"  🔄 SWAPPED: Placed {sec}/{code}, removed {sec}/{swap_code}")
+
                                 # Mark the removed lecture as stuck for next iteration
-                                lectures_remaining[sec][swap_code] += 1
+                                demand.unplaced(sec, swap_code)
+                                stats["swaps"] += 1
                                 swapped_any = True
                                 break
                             else:
                                 # Restore the lecture we tried to remove
-                                schedule[(sec, swap_day, swap_idx)] = swap_entry
-                                teacher_busy[swap_teacher].add(swap_time_key)
-                                room_busy[swap_room].add(swap_time_key)
-                                teacher_section_slots[swap_teacher][sec].add(swap_time_key)
-                                # REMOVED: lectures_per_day_per_subject tracking
-                    
+                                state.restore_theory(s, swap_d, swap_idx, swap_entry)
+                                stats["rollbacks"] += 1
+
                     if not swapped_any:
-                        print(f"  ❌ Desperate mode failed - stopping")
+                        tracer.emit(INFO, "brute_force", f"  ❌ Desperate mode failed - stopping")
                         break
                     # If we swapped something, continue to next pass!
                 else:
                     # Not reached desperate mode yet, stop after a few passes
                     break
-    
-    print("Checking results...")
-    
+
+    # 🏫 ROOMS: the search only held room capacity - name the rooms now,
+    # one time interval at a time (maximum bipartite matching)
+    enter("rooms")
+    for s, d, idx, entry in assign_rooms(state):
+        tracer.emit(INFO, "rooms", f"  ❌ No room left for {sections[s]}/{entry['code']} on {days[d]} slot {idx}")
+        if entry.get("lab_span"):
+            state.remove_lab(s, d, idx)
+            unplaced_labs.append(f"{sections[s]}/{entry['code']} lab: no lab room left")
+        else:
+            state.remove_theory(s, d, idx)
+            demand.unplaced(sections[s], entry["code"])
+
+    if profile is not None:
+        profile.enter("report")
+        profile.add(stats)
+    tracer.emit(INFO, "report", "Checking results...")
+
+    schedule = state.to_schedule()
+
     # FINAL VERIFICATION: Count actual scheduled lectures vs expected
-    print("\n📊 FINAL VERIFICATION:")
-    for sec in sections:
+    tracer.emit(INFO, "report", "\n📊 FINAL VERIFICATION:")
+    for s, sec in enumerate(sections):
         scheduled_count = {}
         expected_count = {}
-        
-        # Count what was actually scheduled
-        for (s, day, idx), entry in schedule.items():
-            if s == sec and entry.get("type") != "lab" and not entry.get("skip") and "code" in entry:
-                code = entry["code"]
-                scheduled_count[code] = scheduled_count.get(code, 0) + 1
-        
+
+        # Count what was actually scheduled (single-slot lectures, not lab blocks)
+        for d in range(len(days)):
+            for entry in cells[s][d]:
+                if (entry is not None and entry.get("type") in ("theory", "lab")
+                        and not entry.get("lab_span") and not entry.get("skip")):
+                    code = entry["code"]
+                    scheduled_count[code] = scheduled_count.get(code, 0) + 1
+
         # Get expected count
-        for code, mapping in data.mappings.get(sem, {}).get(sec, {}).items():
-            sub = next((s for s in data.subjects[sem] if s["code"] == code), None)
-            if sub and sub["elective"] != "yes" and sub.get("open_elective") != "yes" and sub["l"] > 0:
-                expected_count[code] = sub["l"]
-        
+        for code, _, sub in model.theory[sec]:
+            expected_count[code] = sub["l"]
+
         # Compare
         section_ok = True
         for code in expected_count:
             actual = scheduled_count.get(code, 0)
             expected = expected_count[code]
             if actual != expected:
-                print(f"  ❌ {sec}/{code}: scheduled {actual}, expected {expected} (missing {expected-actual})")
+                tracer.emit(INFO, "report", f"  ❌ {sec}/{code}: scheduled {actual}, expected {expected} (missing {expected-actual})")
                 section_ok = False
-        
+
         if section_ok:
             total = sum(scheduled_count.values())
-            print(f"  ✅ {sec}: All {total} lectures scheduled correctly")
-    
+            tracer.emit(INFO, "report", f"  ✅ {sec}: All {total} lectures scheduled correctly")
+
     unscheduled = []
     total_missing = 0
+    missing = demand.missing()
     for sec in sections:
         sec_total = 0
         sec_details = []
-        for code in lectures_remaining.get(sec, {}):
-            if lectures_remaining[sec][code] > 0:
-                unscheduled.append(f"{sec}/{code}: {lectures_remaining[sec][code]} missing")
-                sec_details.append(f"{code}:{lectures_remaining[sec][code]}")
-                total_missing += lectures_remaining[sec][code]
-                sec_total += lectures_remaining[sec][code]
+        for code, n in missing.get(sec, {}).items():
+            unscheduled.append(f"{sec}/{code}: {n} missing")
+            sec_details.append(f"{code}:{n}")
+            total_missing += n
+            sec_total += n
         if sec_total > 0:
-            print(f"  ⚠️  Section {sec}: {sec_total} lectures missing ({', '.join(sec_details)})")
-    
+            tracer.emit(INFO, "report", f"  ⚠️  Section {sec}: {sec_total} lectures missing ({', '.join(sec_details)})")
+    for message in unplaced_labs:
+        unscheduled.append(message)
+        total_missing += 1
+
     if unscheduled or total_missing > 0:
-        print(f"\n❌ SCHEDULING INCOMPLETE: {total_missing} lectures still missing")
+        tracer.emit(INFO, "report", f"\n❌ SCHEDULING INCOMPLETE: {total_missing} lectures still missing")
         for msg in unscheduled:
-            print(f"  {msg}")
+            tracer.emit(INFO, "report", f"  {msg}")
         success = False
     else:
-        print(f"\n✅ PERFECT! ALL LECTURES SCHEDULED! 🎉🎉🎉")
+        tracer.emit(INFO, "report", f"\n✅ PERFECT! ALL LECTURES SCHEDULED! 🎉🎉🎉")
         success = True
-    
+
     # ✅ VALIDATE AGAINST TEACHER CONSTRAINTS
-    print(f"\n🔍 VALIDATING SCHEDULE AGAINST TEACHER CONSTRAINTS")
-    violations, warnings = validator.validate_schedule(scheduled_classes)
-    
+    tracer.emit(INFO, "report", f"\n🔍 VALIDATING SCHEDULE AGAINST TEACHER CONSTRAINTS")
+    violations, warnings = validator.validate_schedule(state.scheduled_classes(sem))
+
     if violations:
-        print(f"\n⚠️  HARD CONSTRAINT VIOLATIONS: {len(violations)}")
+        tracer.emit(INFO, "report", f"\n⚠️  HARD CONSTRAINT VIOLATIONS: {len(violations)}")
         for v in violations[:10]:  # Show first 10
-            print(f"  ❌ {v['class']} - {v['teacher']} on {v['day']} {v['time']}")
-            print(f"     Reason: {v['reason']}")
+            tracer.emit(INFO, "report", f"  ❌ {v['class']} - {v['teacher']} on {v['day']} {v['time']}")
+            tracer.emit(INFO, "report", f"     Reason: {v['reason']}")
     else:
-        print(f"\n✅ NO HARD CONSTRAINT VIOLATIONS! All teachers available for assigned slots!")
-    
+        tracer.emit(INFO, "report", f"\n✅ NO HARD CONSTRAINT VIOLATIONS! All teachers available for assigned slots!")
+
     if warnings:
-        print(f"\n💡 SOFT CONSTRAINT (PREFERENCE) VIOLATIONS: {len(warnings)}")
-        print(f"   (These don't prevent scheduling, just not ideal)")
+        tracer.emit(INFO, "report", f"\n💡 SOFT CONSTRAINT (PREFERENCE) VIOLATIONS: {len(warnings)}")
+        tracer.emit(INFO, "report", f"   (These don't prevent scheduling, just not ideal)")
         for w in warnings[:5]:  # Show first 5
-            print(f"  ⚡ {w['class']} - {w['teacher']} on {w['day']} {w['time']}")
-            print(f"     Penalty: {w['penalty']} points - {w['reason']}")
+            tracer.emit(INFO, "report", f"  ⚡ {w['class']} - {w['teacher']} on {w['day']} {w['time']}")
+            tracer.emit(INFO, "report", f"     Penalty: {w['penalty']} points - {w['reason']}")
     else:
-        print(f"\n⭐ PERFECT! All preferences respected!")
-    
+        tracer.emit(INFO, "report", f"\n⭐ PERFECT! All preferences respected!")
+
     html = generate_html(sem, sections, days, time_slots, schedule)
-    return {"html": html, "success": success, "schedule": schedule, "time_slots": time_slots, "days": days, "sections": sections}
+    return {"html": html, "success": success, "schedule": schedule, "time_slots": time_slots, "days": days, "sections": sections,
+            "missing": total_missing, "violations": len(violations), "penalty": sum(w['penalty'] for w in warnings)}
 
 def generate_html(sem, sections, days, time_slots, schedule):
     html = f"""<html><head><title>Semester {sem}</title>
@@ -0,0 +1,78 @@
+"""
+Tests for the time-budgeted anytime generation API and cancelling:
+
+    cd "Timetable Generator" && python -m pytest -q test_anytime.py
+"""
+
+import threading
+
+import pytest
+
+import scheduler
+from scheduler import generate_timetable, generate_timetable_anytime
+from tracing import null_tracer
+
+
+@pytest.fixture
+def incomplete_attempts(monkeypatch):
+    """Every greedy attempt comes back one lecture short"""
+    attempt = scheduler._attempt_timetable_generation
+
+    def incomplete(*args, **kwargs):
+        result = attempt(*args, **kwargs)
+        result.update(success=False, missing=result["missing"] + 1)
+        return result
+
+    monkeypatch.setattr(scheduler, "_attempt_timetable_generation", incomplete)
+
+
+def test_complete_timetable_with_progress(data):
+    infos = []
+    result = generate_timetable_anytime(data, "7", 30, progress=infos.append, tracer=null_tracer, optimize=False)
+    assert result["complete"] and result["success"] and result["elapsed"] < 30
+    phases = [info["phase"] for info in infos]
+    assert {"labs", "electives", "theory"} <= set(phases) and phases[-1] == "done"
+    assert infos[-1]["remaining"] == 0 and infos[-1]["best_score"] is not None
+    assert all(later["elapsed"] >= earlier["elapsed"] for earlier, later in zip(infos, infos[1:]))
+
+
+def test_incomplete_when_the_budget_runs_out(data, incomplete_attempts):
+    infos = []
+    result = generate_timetable_anytime(data, "7", 0.5, progress=infos.append, tracer=null_tracer)
+    assert not result["complete"] and result["missing"] > 0
+    assert result["elapsed"] < 5 and infos[-1]["attempt"] >= 1
+    assert "optimize" not in [info["phase"] for info in infos]
+
+
+def test_cancel_returns_the_best_so_far(data, incomplete_attempts):
+    cancel = threading.Event()
+    infos = []
+
+    def progress(info):
+        infos.append(info)
+        if info["phase"] == "theory":
+            cancel.set()
+
+    result = generate_timetable_anytime(data, "7", 30, progress=progress, tracer=null_tracer, cancel=cancel)
+    assert result["cancelled"] and not result["complete"]
+    assert result["elapsed"] < 30 and infos[-1]["attempt"] == 1
+    assert all(info["sem"] == "7" for info in infos)
+
+
+def test_cancel_stops_the_retries(data, incomplete_attempts):
+    cancel = threading.Event()
+    attempts = set()
+
+    def progress(info):
+        attempts.add(info["attempt"])
+        cancel.set()
+
+    result = generate_timetable(data, "7", tracer=null_tracer, cache=False, progress=progress, cancel=cancel)
+    assert result["cancelled"] and not result["success"] and attempts == {1}
+
+
+def test_optimizer_stops_once_it_stops_improving(data, monkeypatch):
+    monkeypatch.setattr(scheduler, "OPTIMIZE_TIME_LIMIT", 0.1)
+    result = generate_timetable_anytime(data, "5", budget=60, tracer=null_tracer)
+    assert result["complete"] and result["elapsed"] < 30
+    assert result["quality"]["after"]["total"] <= result["quality"]["before"]["total"]
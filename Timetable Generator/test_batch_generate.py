@@ -0,0 +1,54 @@
+"""
+Tests for the headless batch CLI:
+
+    cd "Timetable Generator" && python -m pytest -q test_batch_generate.py
+"""
+
+import json
+
+import schedule_storage
+from batch_generate import main
+
+
+def test_summary_files_and_storage(tmp_path, capsys):
+    out = tmp_path / "out"
+    assert main(["--sems", "5", "7", "--workers", "2", "--out", str(out), "--seed", "1", "--no-cache"]) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["success"] and summary["missing"] == 0 and summary["clashes"] == []
+    for sem in ("5", "7"):
+        semester = summary["semesters"][sem]
+        assert semester["success"] and semester["saved"] and semester["seconds"] is not None
+        assert (out / f"semester_{sem}.html").read_text(encoding="utf-8").strip()
+        assert schedule_storage.get_classes_for_semester(sem)
+
+
+def test_incomplete_semester_fails_the_run(tmp_path, capsys):
+    out = tmp_path / "out"
+    assert main(["--sems", "7", "9", "--out", str(out), "--no-save", "--no-cache"]) == 1
+    summary = json.loads(capsys.readouterr().out)
+    assert not summary["success"]
+    assert summary["semesters"]["7"]["success"] and not summary["semesters"]["9"]["success"]
+    assert not summary["semesters"]["7"]["saved"]
+
+
+def test_joint_run_reports_group_times(tmp_path, capsys):
+    out = tmp_path / "out"
+    assert main(["--sems", "5", "7", "--joint", "--workers", "1", "--out", str(out), "--seed", "2",
+                 "--no-save", "--no-cache"]) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["success"] and summary["clashes"] == []
+    assert sorted(sem for group in summary["groups"] for sem in group["semesters"]) == ["5", "7"]
+    assert all(group["seconds"] > 0 for group in summary["groups"])
+
+
+def test_joint_run_reports_a_crash(tmp_path, capsys, monkeypatch):
+    import department
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("no lab rooms")
+
+    monkeypatch.setattr(department, "generate_department", crash)
+    assert main(["--sems", "5", "7", "--joint", "--out", str(tmp_path / "out"), "--no-save"]) == 1
+    summary = json.loads(capsys.readouterr().out)
+    assert not summary["success"]
+    assert all(semester["error"] == "RuntimeError: no lab rooms" for semester in summary["semesters"].values())
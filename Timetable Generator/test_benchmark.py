@@ -0,0 +1,47 @@
+"""
+Tests for the synthetic instances and runner of the benchmark suite:
+
+    cd "Timetable Generator" && python -m pytest -q test_benchmark.py
+"""
+
+import json
+
+import pytest
+
+from benchmark import BENCH_SEM, main, run_once, synthetic_instance
+from problem_model import ProblemModel
+
+
+def test_instances_are_reproducible_and_scaled():
+    data, availability = synthetic_instance(sections=6, subjects=5, labs=2, electives=1, tightness=0.5, seed=3)
+    again, same = synthetic_instance(sections=6, subjects=5, labs=2, electives=1, tightness=0.5, seed=3)
+    assert (data.mappings, data.timings, availability) == (again.mappings, again.timings, same)
+    other, _ = synthetic_instance(sections=6, subjects=5, labs=2, electives=1, tightness=0.5, seed=4)
+    assert other.mappings != data.mappings
+
+    model = ProblemModel(data, BENCH_SEM)
+    assert len(model.sections) == 6 and len(model.electives) == 1
+    assert all(len(model.labs[sec]) == 2 and len(model.theory[sec]) == 5 for sec in model.sections)
+    assert any(hours["daily_hours"] or hours["constraints"] for hours in availability.values())
+
+    _, loose = synthetic_instance(sections=6, tightness=0.0)
+    assert not any(hours["daily_hours"] or hours["constraints"] for hours in loose.values())
+
+
+@pytest.mark.parametrize("engine, phase", [("greedy", "theory"), ("exact", "exact")])
+def test_run_once_reports_phases(engine, phase):
+    data, availability = synthetic_instance(sections=3, seed=1)
+    run = run_once(data, availability, seed=0, engine=engine, memory=True)
+    assert run["success"] and run["missing"] == 0
+    assert {"setup", "feasibility", phase} <= set(run["phases"]) and run["peak_memory_kb"] > 0
+    assert run["counters"]["availability_checks"] > 0
+    assert sum(run["phases"].values()) <= run["seconds"] + 1e-3
+
+
+def test_main_writes_the_report(tmp_path):
+    out = tmp_path / "benchmark.json"
+    main(["--sections", "2", "3", "--seeds", "2", "--no-memory", "--out", str(out)])
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert [instance["params"]["sections"] for instance in report["instances"]] == [2, 3]
+    assert all(len(instance["runs"]) == 2 for instance in report["instances"])
+    assert all(instance["summary"]["peak_memory_kb_max"] is None for instance in report["instances"])
@@ -0,0 +1,88 @@
+"""
+Tests for the compiled availability index behind ConstraintValidator:
+
+    cd "Timetable Generator" && python -m pytest -q test_constraint_validator.py
+"""
+
+import json
+
+import pytest
+
+from constraint_validator import ConstraintValidator, parse_12h
+
+AVAILABILITY = {
+    "SNV": {
+        "daily_hours": {"Monday": {"start": "09:30 AM", "end": "04:00 PM"},
+                        "Saturday": {"off": True}},
+        "constraints": [{"day": "Monday", "start": "12:30 PM", "end": "01:30 PM", "reason": "School pickup"},
+                        {"day": "All Days", "start": "08:00 AM", "end": "09:00 AM", "reason": "Commute"}],
+        "preference": "Prefer Before Lunch",
+        "max_classes": "3",
+    },
+    "KRS": {"preference": "Prefer Early Morning", "max_classes": "No Limit"},
+}
+
+SLOTS = [(h * 60 + m, h * 60 + m + 55) for h in range(8, 17) for m in (0, 25, 30, 45)]
+
+
+@pytest.fixture
+def validator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open("teacher_availability.json", "w", encoding="utf-8") as f:
+        json.dump(AVAILABILITY, f)
+    return ConstraintValidator()
+
+
+def label(minutes):
+    hour, minute = divmod(minutes, 60)
+    period = "PM" if hour >= 12 else "AM"
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {period}"
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    ("11:15 AM", "12:10 PM", True),
+    ("12:30 PM", "1:25 PM", False),  # starts at the block
+    ("1:05 PM", "2:00 PM", False),   # overlaps the block
+    ("1:30 PM", "2:25 PM", True),    # starts at the block's end
+    ("9:00 AM", "9:55 AM", False),   # before working hours
+    ("3:30 PM", "4:25 PM", False),   # after working hours
+])
+def test_monday_slots(validator, start, end, expected):
+    available, _ = validator.is_teacher_available("SNV", "Monday", start, end)
+    assert available == expected
+
+
+def test_off_day_all_days_blocks_and_unknown_teachers(validator):
+    assert not validator.is_available_minutes("SNV", "Saturday", 11 * 60, 12 * 60)[0]
+    assert not validator.is_available_minutes("SNV", "Tuesday", 8 * 60 + 30, 9 * 60 + 25)[0]
+    assert validator.is_available_minutes("SNV", "Tuesday", 9 * 60, 9 * 60 + 55)[0]
+    assert validator.is_available_minutes("NOBODY", "Monday", 8 * 60, 9 * 60) == (True, "No constraints defined")
+
+
+def test_minute_and_string_apis_agree(validator):
+    for teacher in ("SNV", "KRS", "NOBODY"):
+        for day in ("Monday", "Tuesday", "Saturday"):
+            for start, end in SLOTS:
+                assert (validator.is_available_minutes(teacher, day, start, end)
+                        == validator.is_teacher_available(teacher, day, label(start), label(end)))
+        for start, _ in SLOTS:
+            assert validator.preference_penalty_minutes(teacher, start) == \
+                validator.get_preference_penalty(teacher, label(start))
+
+
+def test_preferences_and_limits(validator):
+    assert validator.preference_penalty_minutes("SNV", parse_12h("02:00 PM")) == 10
+    assert validator.preference_penalty_minutes("SNV", parse_12h("10:00 AM")) == 0
+    assert validator.preference_penalty_minutes("KRS", parse_12h("09:00 AM")) == 0
+    assert validator.preference_penalty_minutes("KRS", parse_12h("10:00 AM")) == 15
+    assert validator.max_classes_limit("SNV") == 3
+    assert validator.max_classes_limit("KRS") is None
+
+
+def test_reload_picks_up_changes(validator):
+    assert not validator.is_available_minutes("SNV", "Saturday", 11 * 60, 12 * 60)[0]
+    changed = dict(AVAILABILITY, SNV={"constraints": []})
+    with open("teacher_availability.json", "w", encoding="utf-8") as f:
+        json.dump(changed, f)
+    validator.reload()
+    assert validator.is_available_minutes("SNV", "Saturday", 11 * 60, 12 * 60)[0]
@@ -5,6 +5,7 @@ This simulates what the scheduler does and shows all debug output
 """
 
 from constraint_validator import ConstraintValidator
+from tracing import Tracer, TRACE
 
 print("=" * 80)
 print("CONSTRAINT CHECKING SIMULATION")
@@ -26,7 +27,7 @@ print(f"Day: {day}")
 print("\nExpected constraint: 12:30 PM - 1:30 PM (picking up daughter)")
 print()
 
-validator = ConstraintValidator()
+validator = ConstraintValidator(tracer=Tracer(TRACE))  # show every check
 
 # Check if teacher has constraints
 if teacher in validator.availability_data:
@@ -0,0 +1,65 @@
+"""
+Tests for the incrementally tracked theory demand:
+
+    cd "Timetable Generator" && python -m pytest -q test_demand.py
+"""
+
+import random
+
+from constraint_validator import ConstraintValidator
+from demand import DemandTracker
+from problem_model import ProblemModel
+from scheduler import _attempt_timetable_generation
+from tracing import null_tracer
+
+
+def recount(model, tracker):
+    """What the tracker's counters should be, scanned from its demand table"""
+    remaining = tracker.remaining
+    stuck = sorted((sec, code) for sec in model.sections for code, n in remaining[sec].items() if n > 0)
+    per_section = {sec: sum(codes.values()) for sec, codes in remaining.items()}
+    return stuck, per_section, sum(per_section.values())
+
+
+def test_counters_follow_random_updates(data):
+    model = ProblemModel(data, "5")
+    totals = []
+    tracker = DemandTracker(model, on_change=totals.append)
+    demand = model.theory_demand()
+    rng = random.Random(3)
+    pairs = [(sec, code) for sec in model.sections for code in demand[sec]]
+    for _ in range(500):
+        sec, code = rng.choice(pairs)
+        if tracker.need(sec, code) > 0 and rng.random() < 0.7:
+            tracker.placed(sec, code)
+        elif tracker.need(sec, code) < demand[sec][code]:
+            tracker.unplaced(sec, code)
+        stuck, per_section, total = recount(model, tracker)
+        assert sorted(tracker.stuck) == stuck
+        assert tracker.per_section == per_section and tracker.total == total
+        assert all(tracker.stuck[i] == key for key, i in tracker._pos.items())
+    assert totals and totals[-1] == tracker.total
+
+
+def test_missing_and_stuck_lectures(data):
+    model = ProblemModel(data, "5")
+    tracker = DemandTracker(model)
+    sec = model.sections[0]
+    for code, _, _ in model.theory[sec]:
+        tracker.placed(sec, code, tracker.need(sec, code))
+    assert sec not in tracker.missing()
+    assert all(s != sec for s, _, _ in tracker.stuck_lectures())
+
+    code, teacher, _ = model.theory[sec][0]
+    tracker.unplaced(sec, code)
+    assert tracker.missing()[sec] == {code: 1}
+    assert (sec, code, teacher) in tracker.stuck_lectures()
+
+
+def test_progress_callback_sees_the_last_remaining_count(data):
+    model = ProblemModel(data, "7")
+    model.rng.seed(1)
+    seen = []
+    result = _attempt_timetable_generation(model, ConstraintValidator(), 1, null_tracer,
+                                           progress=lambda phase, remaining: seen.append(remaining))
+    assert seen and seen[-1] == result["missing"]
@@ -0,0 +1,103 @@
+"""
+Tests for joint department-wide generation on a shared resource calendar:
+
+    cd "Timetable Generator" && python -m pytest -q test_department.py
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from department import generate_department, interaction_groups, lay_out_labs
+from problem_model import ProblemModel
+from resource_calendar import ResourceCalendar
+from tracing import null_tracer
+
+
+def merged(results):
+    """All semesters' results as one, for double_bookings across semesters"""
+    schedule, time_slots = {}, {}
+    for sem, result in results.items():
+        for (sec, day, idx), entry in result["schedule"].items():
+            schedule[(f"{sem}{sec}", day, idx)] = entry
+        for (sec, day), slots in result["time_slots"].items():
+            time_slots[(f"{sem}{sec}", day)] = slots
+    return {"schedule": schedule, "time_slots": time_slots}
+
+
+def test_calendar_reports_clashes_with_other_semesters_only():
+    calendar = ResourceCalendar()
+    assert calendar.book("5", "teacher", "SNV", "Monday", 540, 595, "A/DBMS") == []
+    assert calendar.book("5", "teacher", "SNV", "Monday", 560, 615, "B/DBMS") == []
+    clashes = calendar.book("7", "teacher", "SNV", "Monday", 590, 645, "A/ML")
+    assert len(clashes) == 2 and all("sem 7 A/ML" in clash for clash in clashes)
+    assert calendar.book("7", "teacher", "SNV", "Monday", 615, 670, "A/ML") == []
+
+    calendar.release("5")
+    assert calendar.book("3", "teacher", "SNV", "Monday", 540, 590, "A/OS") == []
+
+
+def test_interaction_groups_cover_every_semester_once(data):
+    groups = interaction_groups({sem: ProblemModel(data, sem) for sem in ("3", "5", "7")})
+    assert sorted(sem for group in groups for sem in group) == ["3", "5", "7"]
+
+
+def test_interaction_groups_follow_shared_teachers_and_rooms():
+    rooms = [{"name": "CR", "is_lab": "no"}, {"name": "LAB", "is_lab": "yes"}]
+
+    def semester(teacher, theory=(), labs=()):
+        return SimpleNamespace(teacher_sections={teacher: {}}, open_electives=[], sections=["A"],
+                               theory={"A": list(theory)}, labs={"A": list(labs)},
+                               elective_teachers={"A": {}}, classrooms=rooms)
+
+    models = {"1": semester("T1", theory=[("X", "T1", {})]), "2": semester("T2", theory=[("Y", "T2", {})]),
+              "3": semester("T3", labs=[("L", "T3", "T4")])}
+    # 1 and 2 only share the classroom, 3 only needs the lab room
+    assert interaction_groups(models) == [["1", "2"], ["3"]]
+    models["4"] = semester("T4", theory=[("Z", "T4", {})])
+    assert interaction_groups(models) == [["1", "2", "3", "4"]]
+
+
+def test_department_has_no_cross_semester_double_bookings(data, double_bookings):
+    department = generate_department(data, ("5", "7"), tracer=null_tracer, workers=1, seed=2, cache=False)
+    assert department["modes"] == {"5": "joint", "7": "joint"}
+    assert department["success"] and department["clashes"] == []
+    assert all(result["success"] for result in department["results"].values())
+    assert double_bookings(merged(department["results"])) == []
+
+
+@pytest.mark.parametrize("sems", [("5", "7"), ("3", "5", "7")])
+def test_department_places_every_lab(data, sems):
+    department = generate_department(data, sems, tracer=null_tracer, workers=1, seed=1, cache=False)
+    for sem in sems:
+        result = department["results"][sem]
+        assert result["success"] and result["missing"] == 0, sem
+        assert department["missing_labs"][sem] == [], sem
+        model = ProblemModel(data, sem)
+        labs = sum(1 for entry in result["schedule"].values() if entry.get("lab_span"))
+        assert labs == sum(len(model.labs[sec]) for sec in model.sections)
+    # Every semester is complete, so only cross-semester clashes can fail it
+    # (the independent fallback reports them instead of hiding them)
+    assert department["success"] == (department["clashes"] == [])
+    if all(mode == "joint" for mode in department["modes"].values()):
+        assert department["clashes"] == []
+
+
+def test_joint_lab_layout_is_kept_by_each_semester(data):
+    models = {sem: ProblemModel(data, sem) for sem in ("5", "7")}
+    pinned, problems = lay_out_labs(models, seed=2)
+    assert pinned is not None and problems is None
+    assert pinned == lay_out_labs({sem: ProblemModel(data, sem) for sem in ("5", "7")}, seed=2)[0]
+
+    department = generate_department(data, ("5", "7"), tracer=null_tracer, workers=1, seed=2, cache=False)
+    for sem, blocks in pinned.items():
+        schedule = department["results"][sem]["schedule"]
+        for sec, code, day, idx, room in blocks:
+            assert schedule[(sec, day, idx)]["code"] == code and schedule[(sec, day, idx)]["room"] == room
+
+
+def test_independent_mode_reports_clashes_instead_of_avoiding_them(data):
+    department = generate_department(data, ("5", "7"), tracer=null_tracer, workers=1, seed=2, cache=False,
+                                     mode="independent")
+    assert department["modes"] == {"5": "independent", "7": "independent"}
+    assert department["success"] == (department["clashes"] == [])
@@ -0,0 +1,60 @@
+"""
+Tests for the ejection-chain repair of stuck lectures:
+
+    cd "Timetable Generator" && python -m pytest -q test_ejection_chain.py
+"""
+
+import json
+
+import pytest
+
+from constraint_validator import ConstraintValidator
+from ejection_chain import EjectionChains
+from objective import ObjectiveEngine
+from problem_model import ProblemModel
+from tracing import null_tracer
+
+
+@pytest.fixture
+def full_section(data, tmp_path, monkeypatch):
+    """
+    Sem 5 section A with every cell but Monday's first taken by a one-off
+    lecture, and a teacher NEW who is off on Monday
+    """
+    monkeypatch.chdir(tmp_path)
+    with open("teacher_availability.json", "w", encoding="utf-8") as f:
+        json.dump({"NEW": {"daily_hours": {"Monday": {"off": True}}}}, f)
+    model = ProblemModel(data, "5")
+    validator = ConstraintValidator(tracer=null_tracer)
+    state = model.new_state()
+    objective = ObjectiveEngine(model, validator, state)
+    for d in range(len(state.days)):
+        for idx in range(len(state.slots[0][d])):
+            if (d, idx) != (0, 0):
+                state.place_theory(0, d, idx, f"X{d}{idx}", f"T{d}{idx}", state.theory_rooms[0])
+    code = next(code for code, _, _ in model.theory["A"] if model.display_type(code) == "theory")
+    return model, validator, state, objective, code
+
+
+def lectures(state):
+    return sorted((entry["code"], entry["teacher"]) for entry in state.to_schedule().values())
+
+
+def test_chain_moves_a_blocker_into_the_only_free_cell(full_section):
+    model, validator, state, objective, code = full_section
+    before = lectures(state)
+    chains = EjectionChains(model, validator, state, objective)
+    assert chains.insert("A", code, "NEW")
+    assert chains.chains == 1
+    assert lectures(state) == sorted(before + [(code, "NEW")])
+    assert state.cells[0][0][0]["teacher"] != "NEW"
+    assert objective.hard == 0
+
+
+def test_failed_chain_is_rolled_back(full_section):
+    model, validator, state, objective, code = full_section
+    state.place_theory(0, 0, 0, "X00", "T00", state.theory_rooms[0])
+    before = state.to_schedule()
+    chains = EjectionChains(model, validator, state, objective)
+    assert not chains.insert("A", code, "NEW")
+    assert state.to_schedule() == before
@@ -0,0 +1,57 @@
+"""
+Tests for the slot-mask index behind elective group placement:
+
+    cd "Timetable Generator" && python -m pytest -q test_elective_slots.py
+"""
+
+from constraint_validator import ConstraintValidator
+from elective_slots import ElectiveSlots
+from problem_model import ProblemModel
+
+
+def scanned(electives, lec_num, d):
+    """candidates() the slow way: every slot index tested against every section and teacher"""
+    state = electives.state
+    _, pairs, _ = electives.groups[lec_num]
+    mask = 0
+    for idx in range(min(len(state.slots[s][d]) for s in range(len(state.sections)))):
+        if any(not state.is_empty(s, d, idx) for s in range(len(state.sections))):
+            continue
+        if all(state.teacher_free(t, d, state.slot_mask[s][d][idx]) for s, _, _, t in pairs):
+            mask |= 1 << idx
+    return mask
+
+
+def test_candidates_match_a_full_scan(data):
+    model = ProblemModel(data, "5")
+    state = model.new_state()
+    electives = ElectiveSlots(model, ConstraintValidator(), state)
+    # Busy elective teachers and a few occupied cells
+    _, pairs, _ = electives.groups[0]
+    for (s, _, teacher, _), d in zip(pairs, range(len(model.days))):
+        other = (s + 1) % len(model.sections)
+        code, _, _ = model.theory[model.sections[other]][0]
+        state.place_theory(other, d, 1, code, teacher)
+    code, teacher, _ = model.theory[model.sections[0]][1]
+    state.place_theory(0, 0, 3, code, teacher)
+
+    for lec_num in range(len(electives.groups)):
+        for d in range(len(model.days)):
+            assert electives.candidates(lec_num, d) == scanned(electives, lec_num, d)
+
+
+def test_groups_share_a_slot_in_every_section(data):
+    model = ProblemModel(data, "7")
+    state = model.new_state()
+    electives = ElectiveSlots(model, ConstraintValidator(), state)
+    for lec_num in range(len(electives.groups)):
+        assert electives.place(lec_num)
+
+    placed = {}
+    for s in range(len(model.sections)):
+        for d, row in enumerate(state.cells[s]):
+            for idx, entry in enumerate(row):
+                if entry and entry["type"] == "elective":
+                    placed.setdefault((d, idx), set()).add(s)
+    assert len(placed) == len(electives.groups)
+    assert all(sections == set(range(len(model.sections))) for sections in placed.values())
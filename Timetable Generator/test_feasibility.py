@@ -0,0 +1,50 @@
+"""
+Tests for the capacity / matching pre-check run before any search:
+
+    cd "Timetable Generator" && python -m pytest -q test_feasibility.py
+"""
+
+import copy
+import json
+
+import pytest
+
+from constraint_validator import ConstraintValidator
+from feasibility import _max_disjoint, _unmatched, check_feasibility
+from problem_model import ProblemModel
+from scheduler import generate_timetable
+from tracing import null_tracer
+
+
+def test_bounds():
+    assert _max_disjoint([(540, 595), (595, 650), (560, 615), (665, 720)]) == 3
+    assert _unmatched([[0], [0, 1], [1]]) == [2]
+    assert _unmatched([[0], [0, 1], [1]], {0: 2}) == []
+
+
+@pytest.mark.parametrize("sem", ["3", "5", "7"])
+def test_shipped_semesters_pass(data, sem):
+    assert check_feasibility(ProblemModel(data, sem), ConstraintValidator()) == []
+
+
+def test_rejects_an_impossible_room_demand(data):
+    data = copy.deepcopy(data)
+    data.classrooms = [room for room in data.classrooms if room["is_lab"] == "yes"] + [
+        next(room for room in data.classrooms if room["is_lab"] == "no")]
+    problems = check_feasibility(ProblemModel(data, "5"), ConstraintValidator())
+    assert [message for message in problems if message.startswith("Classrooms:")]
+
+    result = generate_timetable(data, "5", tracer=null_tracer, cache=False)
+    assert not result["success"] and result["status"] == "unsat"
+    assert result["diagnosis"] == problems and "Classrooms:" in result["html"]
+
+
+def test_rejects_an_impossible_teacher_demand(data, tmp_path, monkeypatch):
+    model = ProblemModel(data, "5")
+    teacher = model.theory[model.sections[0]][0][1]
+    # Monday only, one class a day: fewer classes than the teacher's week
+    availability = {teacher: {"daily_hours": {day: {"off": True} for day in model.days[1:]}, "max_classes": "1"}}
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "teacher_availability.json").write_text(json.dumps(availability), encoding="utf-8")
+    problems = check_feasibility(model, ConstraintValidator())
+    assert any(message.startswith(f"Teacher {teacher}:") for message in problems)
@@ -0,0 +1,20 @@
+"""
+Tests for the Generate tab's failure messages (no window is opened):
+
+    cd "Timetable Generator" && python -m pytest -q test_generation_tab.py
+"""
+
+from generation_tab import failure_summary
+
+
+def test_failure_summary_prefers_the_diagnosis():
+    result = {"diagnosis": [f"Teacher T{i}: needs 9 classes" for i in range(7)], "missing": 12}
+    assert failure_summary(result).splitlines() == [f"• Teacher T{i}: needs 9 classes" for i in range(5)]
+
+
+def test_failure_summary_counts_what_is_left():
+    result = {"missing": 2, "violations": 1, "status": "room_assignment_failed"}
+    assert failure_summary(result) == ("• 2 lectures could not be placed\n"
+                                       "• 1 classes break teacher availability\n"
+                                       "• no room could be found for every class")
+    assert failure_summary({}) == "• see the generated page for details"
@@ -0,0 +1,48 @@
+"""
+Tests for parallel multi-start generation (generate_timetable(workers=...)):
+
+    cd "Timetable Generator" && python -m pytest -q test_multi_start.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from problem_model import ProblemModel
+from scheduler import _multi_start_worker, generate_timetable, soft_score
+from tracing import null_tracer
+
+
+def test_seeded_starts_are_reproducible(data):
+    model = ProblemModel(data, "5")
+    first = _multi_start_worker(model, 1, 1234)
+    again = _multi_start_worker(ProblemModel(data, "5"), 1, 1234)
+    assert first["seed"] == again["seed"] == 1234
+    assert first["schedule"] == again["schedule"]
+
+
+def test_seeded_generations_do_not_interfere_across_threads(data):
+    sems = ["3", "5", "7"]
+    sequential = [generate_timetable(data, sem, tracer=null_tracer, seed=7, cache=False)["schedule"] for sem in sems]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(generate_timetable, data, sem, tracer=null_tracer, seed=7, cache=False)
+                   for sem in sems]
+        assert [future.result()["schedule"] for future in futures] == sequential
+
+
+@pytest.mark.parametrize("pick", ["first", "best"])
+def test_multi_start_returns_a_complete_start(data, double_bookings, pick):
+    result = generate_timetable(data, "5", tracer=null_tracer, workers=2, starts=4, pick=pick)
+    assert result["success"] and "seed" in result
+    assert double_bookings(result) == []
+    assert soft_score(result) == result["penalty"]  # nothing missing, no violations
+
+
+def test_best_keeps_the_lowest_score():
+    assert soft_score({"missing": 1}) > soft_score({"violations": 999, "penalty": 999})
+    assert soft_score({"violations": 1}) > soft_score({"penalty": 999})
+
+
+def test_unknown_pick_is_rejected(data):
+    with pytest.raises(ValueError):
+        generate_timetable(data, "5", tracer=null_tracer, workers=2, pick="fastest")
@@ -0,0 +1,117 @@
+"""
+Tests for the incremental objective engine:
+
+    cd "Timetable Generator" && python -m pytest -q test_objective.py
+"""
+
+import json
+import random
+
+import pytest
+
+from constraint_validator import ConstraintValidator
+from objective import CLUSTER_PENALTY, GAP_PENALTY, ObjectiveEngine, is_lecture
+from optimizer import state_from_schedule
+from problem_model import ProblemModel
+from scheduler import generate_timetable
+from tracing import null_tracer
+
+
+@pytest.fixture
+def engine(data, tmp_path, monkeypatch):
+    """Objective engine on a generated sem 3 timetable, with availability that makes every term count"""
+    result = generate_timetable(data, "3", tracer=null_tracer, seed=11, cache=False)
+    model = ProblemModel(data, "3")
+    teachers = sorted({teacher for sec in model.sections for _, teacher, _ in model.theory[sec]})
+    monkeypatch.chdir(tmp_path)
+    with open("teacher_availability.json", "w", encoding="utf-8") as f:
+        json.dump({teachers[0]: {"daily_hours": {"Monday": {"off": True}}},
+                   teachers[1]: {"preference": "Prefer Early Morning", "max_classes": "1"},
+                   teachers[2]: {"preference": "Prefer After Lunch"}}, f)
+    validator = ConstraintValidator(tracer=null_tracer)
+    state = state_from_schedule(model, result["schedule"])
+    return model, validator, ObjectiveEngine(model, validator, state)
+
+
+def from_scratch(model, validator, engine):
+    state = engine.state
+    fresh = ObjectiveEngine(model, validator, state)
+    state.objective = engine
+    return fresh.hard_terms, fresh.soft_terms
+
+
+def test_totals_match_a_full_recount_after_every_move(engine):
+    model, validator, engine = engine
+    state = engine.state
+    rng = random.Random(5)
+    lectures = [(s, d, idx) for s in range(len(state.sections)) for d in range(len(state.days))
+                for idx, entry in enumerate(state.cells[s][d]) if is_lecture(entry)]
+    moved = 0
+    for _ in range(1000):
+        s, d, idx = rng.choice(lectures)
+        if not is_lecture(state.cells[s][d][idx]):
+            continue
+        d2 = rng.randrange(len(state.days))
+        if not state.slots[s][d2]:
+            continue
+        idx2 = rng.randrange(len(state.slots[s][d2]))
+        entry = state.remove_theory(s, d, idx)
+        mask = state.slot_mask[s][d2][idx2]
+        r = state.first_free_room(d2, mask)
+        t = state.teacher_ids[entry["teacher"]]
+        if state.is_empty(s, d2, idx2) and r is not None and state.teacher_free(t, d2, mask):
+            state.place_theory(s, d2, idx2, entry["code"], entry["teacher"], r, entry["type"])
+            lectures.append((s, d2, idx2))
+            moved += 1
+        else:
+            state.restore_theory(s, d, idx, entry)
+        assert (engine.hard_terms, engine.soft_terms) == from_scratch(model, validator, engine)
+    assert moved > 20
+    assert engine.hard_terms["unavailable"] or engine.hard_terms["max_classes"]
+
+
+def test_deltas_of_single_changes(data):
+    model = ProblemModel(data, "5")
+    state = model.new_state()
+    engine = ObjectiveEngine(model, ConstraintValidator(tracer=null_tracer), state)
+    code, teacher = next((code, teacher) for code, teacher, _ in model.theory[model.sections[0]]
+                         if model.display_type(code) == "theory")
+    room = state.theory_rooms[0]
+    assert (engine.hard, engine.soft) == (0, 0)
+
+    state.place_theory(0, 0, 0, code, teacher, room)
+    state.place_theory(0, 0, 1, code, teacher, room)
+    assert engine.soft_terms["clustering"] == 1 and engine.soft == CLUSTER_PENALTY
+    state.place_theory(0, 0, 2, code, teacher, room)
+    assert engine.hard_terms["runs"] == 1
+    state.remove_theory(0, 0, 1)
+    assert engine.hard_terms["runs"] == 0
+    assert engine.soft_terms["gaps"] == 1 and engine.soft == CLUSTER_PENALTY + GAP_PENALTY
+
+    state.remove_theory(0, 0, 2)
+    state.remove_theory(0, 0, 0)
+    assert (engine.hard, engine.soft) == (0, 0)
+
+
+def test_lab_subjects_lectures_never_make_a_run(data):
+    model = ProblemModel(data, "5")
+    state = model.new_state()
+    engine = ObjectiveEngine(model, ConstraintValidator(tracer=null_tracer), state)
+    code, teacher = next((code, teacher) for code, teacher, _ in model.theory[model.sections[0]]
+                         if model.display_type(code) == "lab")
+    for idx in range(3):
+        state.place_theory(0, 0, idx, code, teacher, state.theory_rooms[0], "lab")
+    assert engine.hard_terms["runs"] == 0
+
+
+def test_two_lab_days_follow_each_section(data, monkeypatch):
+    model = ProblemModel(data, "5")
+    first, second = model.sections[:2]
+    monkeypatch.setattr(model, "two_lab_days_allowed", lambda sec: 1 if sec == first else 0)
+    state = model.new_state()
+    engine = ObjectiveEngine(model, ConstraintValidator(tracer=null_tracer), state)
+    for s, sec in enumerate((first, second)):
+        for idx, (code, teacher1, teacher2) in zip((0, 2), model.labs[sec]):
+            state.place_lab(s, 0, idx, code, teacher1, teacher2)
+    # Only the second section is over its limit
+    assert engine.hard_terms["lab_days"] == 1
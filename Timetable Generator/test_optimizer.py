@@ -0,0 +1,55 @@
+"""
+Tests for the simulated-annealing quality optimizer:
+
+    cd "Timetable Generator" && python -m pytest -q test_optimizer.py
+"""
+
+from constraint_validator import ConstraintValidator
+from objective import is_lecture
+from optimizer import QualityOptimizer, optimize_timetable, state_from_schedule
+from problem_model import ProblemModel
+from scheduler import generate_timetable
+from tracing import null_tracer
+
+
+def test_state_from_schedule_round_trip(data):
+    result = generate_timetable(data, "5", tracer=null_tracer, seed=3, cache=False)
+    assert state_from_schedule(ProblemModel(data, "5"), result["schedule"]).to_schedule() == result["schedule"]
+
+
+def test_zero_budget_keeps_the_timetable(data):
+    result = generate_timetable(data, "5", tracer=null_tracer, seed=3, cache=False)
+    validator = ConstraintValidator(tracer=null_tracer)
+    schedule, before, after = optimize_timetable(ProblemModel(data, "5"), validator, result["schedule"], 0,
+                                                 null_tracer)
+    assert schedule == result["schedule"] and before == after
+
+
+def test_optimize_never_worsens_or_breaks_the_timetable(data, double_bookings, lecture_counts):
+    plain = generate_timetable(data, "3", tracer=null_tracer, seed=3, cache=False)
+    result = generate_timetable(data, "3", tracer=null_tracer, seed=3, cache=False, optimize=0.3)
+    quality = result["quality"]
+    assert result["success"]
+    assert quality["after"]["total"] <= quality["before"]["total"]
+    assert double_bookings(result) == []
+    assert lecture_counts(result) == lecture_counts(plain)
+    # Labs, electives and open electives stay where the search put them
+    for key, entry in plain["schedule"].items():
+        if entry["type"] in ("elective", "open_elective") or entry.get("lab_span") or entry.get("skip"):
+            assert result["schedule"][key] == entry
+
+
+def test_delta_leaves_the_state_as_it_was(data):
+    model = ProblemModel(data, "5")
+    result = generate_timetable(data, "5", tracer=null_tracer, seed=3, cache=False)
+    optimizer = QualityOptimizer(model, ConstraintValidator(tracer=null_tracer),
+                                 state_from_schedule(model, result["schedule"]))
+    state, objective = optimizer.state, optimizer.objective
+    soft = objective.soft
+    moves = [(0, 0, i1, d2, i2) for i1, entry in enumerate(state.cells[0][0]) if is_lecture(entry)
+             for d2 in range(1, len(state.days)) for i2, other in enumerate(state.cells[0][d2])
+             if other is None or (is_lecture(other) and other["code"] != entry["code"])]
+    changes = [(move, optimizer.delta(*move)) for move in moves]
+    assert state.to_schedule() == result["schedule"] and objective.soft == soft
+    move, change = next((move, change) for move, change in changes if change is not None)
+    assert optimizer.apply(*move) is not None and objective.soft - soft == change
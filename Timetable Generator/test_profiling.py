@@ -0,0 +1,41 @@
+"""
+Tests for the opt-in generation profile:
+
+    cd "Timetable Generator" && python -m pytest -q test_profiling.py
+"""
+
+import pstats
+
+from profiling import GenerationProfile
+from scheduler import generate_timetable
+from tracing import null_tracer
+
+
+def test_phases_are_summed_and_cover_the_run():
+    profile = GenerationProfile(memory=False)
+    profile.start()
+    for phase in ("labs", "theory", "labs"):
+        profile.enter(phase)
+    profile.count("placements", 2)
+    profile.add({"placements": 1, "swaps": 4})
+    report = profile.finish()
+    assert set(report["phases"]) == {"setup", "labs", "theory"}
+    assert sum(report["phases"].values()) <= report["seconds"] + 1e-6
+    assert report["counters"] == {"placements": 3, "swaps": 4} and report["peak_memory_kb"] is None
+
+
+def test_generate_timetable_reports_its_profile(data, tmp_path):
+    path = str(tmp_path / "gen.prof")
+    result = generate_timetable(data, "5", tracer=null_tracer, seed=1, cprofile=path)
+    assert result["success"] and not result.get("cached")
+    report = result["profile"]
+    assert {"setup", "feasibility", "labs", "theory"} <= set(report["phases"])
+    assert report["counters"]["availability_checks"] > 0 and report["peak_memory_kb"] > 0
+    assert pstats.Stats(report["cprofile"]).total_calls > 0
+
+
+def test_results_without_profile_stay_cacheable(data):
+    generate_timetable(data, "7", tracer=null_tracer, seed=1)
+    assert generate_timetable(data, "7", tracer=null_tracer, seed=1).get("cached")
+    profiled = generate_timetable(data, "7", tracer=null_tracer, seed=1, profile=True)
+    assert not profiled.get("cached") and "profile" in profiled
@@ -0,0 +1,74 @@
+"""
+Tests for the incremental repair of a saved timetable (generate_timetable(repair=True)):
+
+    cd "Timetable Generator" && python -m pytest -q test_repair.py
+"""
+
+import copy
+import time
+
+import schedule_storage
+from scheduler import generate_timetable
+from tracing import null_tracer
+
+
+def generate(data, sem, **options):
+    return generate_timetable(data, sem, tracer=null_tracer, cache=False, **options)
+
+
+def save(sem, result):
+    schedule_storage.save_schedule(sem, result["schedule"], result["time_slots"], result["sections"],
+                                   result["days"])
+
+
+def test_nothing_saved_generates_from_scratch(data):
+    result = generate(data, "7", repair=True)
+    assert result["success"] and "repair" not in result
+
+
+def test_repair_keeps_unchanged_cells(data):
+    result = generate(data, "3", seed=5)
+    save("3", result)
+
+    unchanged = generate(data, "3", repair=True)
+    assert unchanged["success"] and unchanged["schedule"] == result["schedule"]
+    assert unchanged["repair"]["dropped"] == [] and unchanged["repair"]["moved"] == 0
+
+    changed = copy.deepcopy(data)
+    changed.mappings["3"]["A"]["TFC"]["theory"] = "MD"
+    repaired = generate(changed, "3", repair=True)
+    summary = repaired["repair"]
+    assert repaired["success"] and summary["dropped"]
+    kept = sum(1 for key, entry in result["schedule"].items() if repaired["schedule"].get(key) == entry)
+    assert kept >= summary["kept"] - summary["moved"]
+    # Labs, elective groups and open electives are never moved by a repair
+    for key, entry in result["schedule"].items():
+        if entry["type"] in ("elective", "open_elective") or entry.get("lab_span") or entry.get("skip"):
+            assert repaired["schedule"][key] == entry
+
+
+def test_the_time_limit_caps_every_round_together(data, monkeypatch):
+    import repair
+    from constraint_validator import ConstraintValidator
+    from problem_model import ProblemModel
+
+    result = generate(data, "3", seed=5)
+    save("3", result)
+    changed = copy.deepcopy(data)
+    changed.mappings["3"]["A"]["TFC"]["theory"] = "MD"
+    limits = []
+
+    class Solver(repair.BacktrackingSolver):
+        def __init__(self, model, validator, state, tasks, time_limit, tracer):
+            super().__init__(model, validator, state, tasks, time_limit, tracer)
+            limits.append(time_limit)
+
+        def solve(self):
+            time.sleep(0.3)
+            return "unknown"
+
+    monkeypatch.setattr(repair, "BacktrackingSolver", Solver)
+    assert repair.repair_timetable(ProblemModel(changed, "3"), ConstraintValidator(tracer=null_tracer),
+                                   null_tracer, time_limit=0.5) is None
+    # The second round only got what the first left of the one budget, and there was no third
+    assert len(limits) == 2 and limits[1] < 0.25
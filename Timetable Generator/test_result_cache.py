@@ -0,0 +1,62 @@
+"""
+Tests for the on-disk generation result cache:
+
+    cd "Timetable Generator" && python -m pytest -q test_result_cache.py
+"""
+
+import copy
+import os
+
+import pytest
+
+import result_cache
+from scheduler import generate_timetable
+from tracing import null_tracer
+
+
+def test_cache_key_changes_with_inputs(data):
+    availability = {"SNV": {"constraints": []}}
+    key = result_cache.input_hash(data, "5", availability, seed=1)
+    assert key == result_cache.input_hash(copy.deepcopy(data), "5", dict(availability), seed=1)
+    assert key != result_cache.input_hash(data, "5", availability, seed=2)
+    assert key != result_cache.input_hash(data, "3", availability, seed=1)
+    assert key != result_cache.input_hash(data, "5", {"SNV": {"constraints": [{"day": "Monday"}]}}, seed=1)
+
+    changed = copy.deepcopy(data)
+    changed.subjects["5"][0]["l"] += 1
+    assert key != result_cache.input_hash(changed, "5", availability, seed=1)
+
+
+def test_cache_hit_and_invalidation(data):
+    first = generate_timetable(data, "7", tracer=null_tracer, seed=1)
+    again = generate_timetable(data, "7", tracer=null_tracer, seed=1)
+    assert again.get("cached") and again["schedule"] == first["schedule"]
+
+    changed = copy.deepcopy(data)
+    sec = next(iter(changed.mappings["7"]))
+    code = next(code for code, mapping in changed.mappings["7"][sec].items() if mapping.get("theory"))
+    changed.mappings["7"][sec][code]["theory"] = "NEW"
+    assert not generate_timetable(changed, "7", tracer=null_tracer, seed=1).get("cached")
+
+
+def test_same_seed_same_timetable_without_the_cache(data):
+    first = generate_timetable(data, "3", tracer=null_tracer, seed=7, cache=False)
+    again = generate_timetable(data, "3", tracer=null_tracer, seed=7, cache=False)
+    assert not again.get("cached") and again["schedule"] == first["schedule"]
+
+
+class Stale:
+    """Stands in for a class a cached result was pickled with"""
+
+
+@pytest.mark.parametrize("old, new", [(b"test_result_cache", b"gone_result_cache"),  # module moved
+                                      (b"Stale", b"Gone_")])                         # class renamed
+def test_stale_pickles_are_misses(data, old, new):
+    key = result_cache.input_hash(data, "7", {}, seed=1)
+    result_cache.save(key, {"schedule": Stale()})
+    path = os.path.join(result_cache.CACHE_DIR, f"{key}.pkl")
+    with open(path, "rb") as f:
+        blob = f.read()
+    with open(path, "wb") as f:
+        f.write(blob.replace(old, new))
+    assert result_cache.load(key) is None
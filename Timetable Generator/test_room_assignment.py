@@ -0,0 +1,56 @@
+"""
+Tests for the room assignment post-pass:
+
+    cd "Timetable Generator" && python -m pytest -q test_room_assignment.py
+"""
+
+from problem_model import ProblemModel
+from room_assignment import assign_rooms, max_matching
+from scheduler import generate_timetable
+from tracing import null_tracer
+
+
+def test_max_matching_reroutes_earlier_units():
+    assert max_matching([[0, 1], [0]]) == [1, 0]
+    assert max_matching([[0], [0], [0]], {0: 2}) == [0, 0, None]
+
+
+def test_keeps_pinned_rooms(data):
+    model = ProblemModel(data, "5")
+    state = model.new_state()
+    lectures = [(s, code, teacher) for s, sec in enumerate(model.sections)
+                for code, teacher, _ in model.theory[sec][:1]]
+    # Every section's first slot on Monday: all but one pinned to a named room
+    pinned = {}
+    for (s, code, teacher), r in zip(lectures[:-1], reversed(state.theory_rooms)):
+        state.place_theory(s, 0, 0, code, teacher, r)
+        pinned[s] = state.room_names[r]
+    s, code, teacher = lectures[-1]
+    state.place_theory(s, 0, 0, code, teacher)
+
+    assert assign_rooms(state) == []
+    for s, room in pinned.items():
+        assert state.cells[s][0][0]["room"] == room
+    rooms = [state.cells[s][0][0]["room"] for s, _, _ in lectures]
+    assert None not in rooms and len(set(rooms)) == len(rooms)
+
+
+def test_reports_when_other_bookings_leave_no_room(data):
+    model = ProblemModel(data, "5")
+    state = model.new_state()
+    code, teacher, _ = model.theory[model.sections[0]][0]
+    # Every theory room taken at Monday's first slot by other bookings
+    mask = state.slot_mask[0][0][0]
+    for r in state.theory_rooms:
+        state._book_room(r, 0, mask)
+    state.place_theory(0, 0, 0, code, teacher)
+    failed = assign_rooms(state)
+    assert [(s, d, idx) for s, d, idx, _ in failed] == [(0, 0, 0)]
+    assert state.cells[0][0][0]["room"] is None
+
+
+def test_generated_classes_all_get_rooms(data):
+    result = generate_timetable(data, "5", tracer=null_tracer, seed=1, cache=False)
+    assert result["success"]
+    assert all(entry["room"] for entry in result["schedule"].values()
+               if not entry.get("skip") and entry["type"] != "elective")
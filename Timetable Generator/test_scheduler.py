@@ -0,0 +1,157 @@
+"""
+Tests for the dense schedule state and the timetables generated on it:
+
+    cd "Timetable Generator" && python -m pytest -q test_scheduler.py
+"""
+
+import copy
+
+import pytest
+
+from problem_model import ProblemModel
+from schedule_state import ScheduleState
+from scheduler import generate_timetable
+from tracing import INFO, RingBufferSink, Tracer, null_tracer
+
+SECTIONS = ["A", "B"]
+DAYS = ["Monday", "Tuesday"]
+SLOTS = [(540, 595), (595, 650), (665, 720), (720, 775)]
+CLASSROOMS = [{"name": "R1", "is_lab": "no"}, {"name": "R2", "is_lab": "no"}, {"name": "L1", "is_lab": "yes"}]
+
+
+@pytest.fixture
+def state():
+    time_slots = {(sec, day): list(SLOTS) for sec in SECTIONS for day in DAYS}
+    return ScheduleState(SECTIONS, DAYS, time_slots, CLASSROOMS)
+
+
+def snapshot(state):
+    # teacher_section_mask may keep emptied per-day rows: only set bits count
+    sections = [{s: per_day for s, per_day in masks.items() if any(per_day)}
+                for masks in state.teacher_section_mask]
+    return copy.deepcopy((state.cells, state.cell_mask, state.teacher_busy, state.teacher_day_count,
+                          sections, state.room_busy, state.room_free, state.room_pending))
+
+
+def test_place_remove_round_trip(state):
+    state.teacher_id("SNV"), state.teacher_id("KRS")
+    before = snapshot(state)
+
+    state.place_theory(0, 0, 0, "DBMS", "SNV", 0)
+    state.place_theory(1, 0, 1, "DBMS", "SNV", 1)
+    assert state.cell_mask[0][0] == 0b1 and state.cell_mask[1][0] == 0b10
+    assert state.teacher_day_count[state.teacher_id("SNV")][0] == 2
+    assert not state.is_empty(0, 0, 0) and state.is_empty(0, 0, 1)
+
+    entry = state.remove_theory(0, 0, 0)
+    state.restore_theory(0, 0, 0, entry)
+    assert state.cells[0][0][0] == entry
+
+    state.place_theory(0, 1, 0, "OS", "SNV")  # capacity only
+    state.place_lab(1, 1, 2, "DBMSL", "SNV", "KRS")
+    assert state.rooms_left(1, state.slot_mask[0][1][0]) == 1
+    assert state.rooms_left(1, state.slot_mask[1][1][2], lab=True) == 0
+
+    state.remove_lab(1, 1, 2)
+    state.remove_theory(0, 1, 0)
+    state.remove_theory(1, 0, 1)
+    state.remove_theory(0, 0, 0)
+    assert snapshot(state) == before
+
+
+def test_teacher_and_room_queries(state):
+    t = state.teacher_id("SNV")
+    mask = state.slot_mask[0][0][0]
+    state.place_theory(0, 0, 0, "DBMS", "SNV", 0)
+    assert not state.teacher_free(t, 0, mask)
+    assert state.teacher_free(t, 1, mask)
+    assert state.free_rooms(0, mask) == [1]
+    assert state.free_rooms(0, mask, lab=True) == [2]
+    # Section A's time is forbidden for SNV's theory in section B only
+    assert state.forbidden_mask(t, 1, 0) == mask
+    assert state.forbidden_mask(t, 0, 0) == 0
+
+
+def test_lab_books_both_slots(state):
+    state.place_lab(0, 1, 2, "DBMSL", "SNV", "KRS", 2)
+    both = state.slot_mask[0][1][2] | state.slot_mask[0][1][3]
+    for teacher in ("SNV", "KRS"):
+        assert state.teacher_busy[state.teacher_id(teacher)][1] == both
+    assert state.room_busy[2][1] == both
+    assert state.cells[0][1][3]["skip"]
+    assert [(key, entry["type"]) for key, entry in state.to_schedule().items()] == \
+        [(("A", "Tuesday", 2), "lab"), (("A", "Tuesday", 3), "lab")]
+
+
+def test_free_room_index_matches_room_busy(state):
+    state.place_theory(0, 0, 0, "DBMS", "SNV", 1)
+    state.place_theory(1, 0, 1, "OS", "KRS", 0)
+    state.place_lab(0, 0, 2, "DBMSL", "SNV", "KRS", 2)
+    state.remove_theory(0, 0, 0)
+    for d in range(len(DAYS)):
+        for masks in state.slot_mask[0][d], [state.slot_mask[0][d][0] | state.slot_mask[0][d][1]]:
+            for mask in masks:
+                for lab in (False, True):
+                    expected = [r for r in (state.lab_rooms if lab else state.theory_rooms)
+                                if not state.room_busy[r][d] & mask]
+                    assert state.free_rooms(d, mask, lab) == expected
+                    assert state.free_room_count(d, mask, lab) == len(expected)
+                    assert state.first_free_room(d, mask, lab) == (expected[0] if expected else None)
+
+
+def test_misaligned_grids_share_time_bits(data):
+    data = copy.deepcopy(data)
+    data.timings["3"]["B"]["Monday"]["start_time"] = "9:20"  # 25 minutes off section A's grid
+    model = ProblemModel(data, "3")
+    state = model.new_state()
+    a_slot, b_slot = state.slots[0][0][0], state.slots[1][0][0]
+    assert a_slot[0] < b_slot[0] < a_slot[1]
+    assert state.slot_mask[0][0][0] & state.slot_mask[1][0][0]
+
+    code, teacher, _ = model.theory["A"][0]
+    state.place_theory(0, 0, 0, code, teacher, state.theory_rooms[0])
+    t = state.teacher_id(teacher)
+    assert not state.teacher_free(t, 0, state.slot_mask[1][0][0])
+    assert state.theory_rooms[0] not in state.free_rooms(0, state.slot_mask[1][0][0])
+
+
+def test_misaligned_grids_generate_without_double_booking(data, double_bookings):
+    data = copy.deepcopy(data)
+    for sec in ("D", "E"):
+        for cfg in data.timings["3"][sec].values():
+            cfg["start_time"] = "9:20"
+    for engine in ("greedy", "exact"):
+        result = generate_timetable(data, "3", tracer=null_tracer, engine=engine, seed=1, cache=False)
+        assert result["success"], engine
+        assert double_bookings(result) == [], engine
+
+
+@pytest.mark.parametrize("sem", ["3", "5", "7"])
+def test_generated_timetable_has_no_double_bookings(data, double_bookings, sem):
+    result = generate_timetable(data, sem, tracer=null_tracer)
+    assert result["schedule"]
+    assert double_bookings(result) == []
+
+
+@pytest.mark.parametrize("sem", ["3", "5", "7"])
+def test_queue_places_each_demanded_lecture_once(data, lecture_counts, sem):
+    model = ProblemModel(data, sem)
+    demand = {(sec, code): sub["l"] for sec in model.sections for code, _, sub in model.theory[sec]}
+    sink = RingBufferSink()
+    result = generate_timetable(data, sem, tracer=Tracer(INFO, sink))
+    assert result["success"]
+    assert lecture_counts(result) == demand
+
+    # Every attempt's queue pass accounts for the whole demand: placed + left over
+    passes = [event[3].split() for event in sink.events if event[2] == "theory" and "Placed" in event[3]]
+    assert passes and all(int(words[1]) + int(words[3]) == sum(demand.values()) for words in passes)
+
+
+def test_rooms_left_never_goes_negative(state):
+    mask = state.slot_mask[0][0][0]
+    # Capacity holders for every theory room, then one room booked by name on top
+    state.place_theory(0, 0, 0, "DBMS", "SNV")
+    state.place_theory(1, 0, 0, "OS", "KRS")
+    assert state.rooms_left(0, mask) == 0
+    state._book_room(state.theory_rooms[0], 0, mask)
+    assert state.rooms_left(0, mask) == 0
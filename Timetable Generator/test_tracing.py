@@ -0,0 +1,61 @@
+"""
+Tests for the levelled scheduler tracing and its sinks:
+
+    cd "Timetable Generator" && python -m pytest -q test_tracing.py
+"""
+
+import pytest
+
+from constraint_validator import ConstraintValidator
+from scheduler import generate_timetable
+from tracing import DEBUG, INFO, SILENT, TRACE, FileSink, RingBufferSink, Tracer, null_tracer
+
+
+@pytest.mark.parametrize("level, flags", [(SILENT, (False, False, False)), (INFO, (True, False, False)),
+                                          (DEBUG, (True, True, False)), (TRACE, (True, True, True))])
+def test_levels_filter_events(level, flags):
+    sink = RingBufferSink()
+    tracer = Tracer(level, sink)
+    assert (tracer.info, tracer.debug, tracer.trace) == flags
+    for emitted in (INFO, DEBUG, TRACE):
+        tracer.emit(emitted, "phase", f"level {emitted}")
+    assert [event[3] for event in sink.events] == [f"level {emitted}" for emitted in (INFO, DEBUG, TRACE)
+                                                   if emitted <= level]
+
+
+def test_ring_buffer_keeps_the_last_events():
+    sink = RingBufferSink(capacity=3)
+    tracer = Tracer(INFO, sink)
+    for i in range(5):
+        tracer.emit(INFO, "phase", str(i))
+    assert [event[3] for event in sink.events] == ["2", "3", "4"]
+
+
+def test_file_sink_writes_one_line_per_event(tmp_path):
+    path = tmp_path / "trace.log"
+    tracer = Tracer(DEBUG, FileSink(str(path)))
+    tracer.emit(INFO, "labs", "placed DBMS lab")
+    tracer.emit(TRACE, "availability", "dropped")
+    tracer.close()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1 and lines[0].split("\t")[1:] == ["INFO", "labs", "placed DBMS lab"]
+
+
+def test_availability_checks_only_trace_at_trace_level(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "teacher_availability.json").write_text('{"SNV": {"constraints": []}}', encoding="utf-8")
+    for level, expected in ((DEBUG, 0), (TRACE, 2)):
+        sink = RingBufferSink()
+        validator = ConstraintValidator(tracer=Tracer(level, sink))
+        validator.is_teacher_available("SNV", "Monday", "9:00 AM", "9:55 AM")
+        assert len(sink.events) == expected
+
+
+def test_silent_generation_prints_nothing(data, capsys):
+    capsys.readouterr()
+    generate_timetable(data, "7", tracer=null_tracer, cache=False)
+    assert capsys.readouterr().out == ""
+
+    sink = RingBufferSink()
+    generate_timetable(data, "7", tracer=Tracer(INFO, sink), cache=False)
+    assert "setup" in {event[2] for event in sink.events}
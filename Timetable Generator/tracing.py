@@ -0,0 +1,95 @@
+"""
+Structured tracing for the scheduler
+Levelled events routed to a pluggable sink (stdout, file or ring buffer)
+"""
+
+import sys
+import time
+from collections import deque
+
+# Levels (higher = more verbose)
+SILENT = 0
+INFO = 1     # phase banners, progress and final report (default)
+DEBUG = 2    # per-placement / per-swap events
+TRACE = 3    # per availability check (very noisy!)
+
+LEVEL_NAMES = {SILENT: "SILENT", INFO: "INFO", DEBUG: "DEBUG", TRACE: "TRACE"}
+
+
+class StdoutSink:
+    """Print events to stdout (the old print() behaviour)"""
+
+    def write(self, level, phase, message):
+        print(message)
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Append events to a text file, one line per event"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, level, phase, message):
+        self.file.write(f"{time.time():.6f}\t{LEVEL_NAMES.get(level, level)}\t{phase}\t{message}\n")
+
+    def close(self):
+        self.file.close()
+
+
+class RingBufferSink:
+    """Keep only the last `capacity` events in memory"""
+
+    def __init__(self, capacity=10000):
+        self.events = deque(maxlen=capacity)
+
+    def write(self, level, phase, message):
+        self.events.append((time.time(), level, phase, message))
+
+    def dump(self, stream=None):
+        """Write buffered events to stream (default stdout)"""
+        stream = stream or sys.stdout
+        for _, level, phase, message in self.events:
+            stream.write(f"[{LEVEL_NAMES.get(level, level)}] {phase}: {message}\n")
+
+    def close(self):
+        pass
+
+
+class Tracer:
+    """
+    Levelled event emitter.
+
+    Hot paths guard on the boolean flags before building a message, so
+    disabled levels cost a single attribute lookup:
+
+        if tracer.debug:
+            tracer.emit(DEBUG, "labs", f"placed {code} on {day}")
+    """
+
+    def __init__(self, level=INFO, sink=None):
+        self.sink = sink if sink is not None else StdoutSink()
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = level
+        self.info = level >= INFO
+        self.debug = level >= DEBUG
+        self.trace = level >= TRACE
+
+    def emit(self, level, phase, message):
+        if level <= self.level:
+            self.sink.write(level, phase, message)
+
+    def close(self):
+        self.sink.close()
+
+
+# Shared default: INFO to stdout, same output as before tracing existed
+default_tracer = Tracer(INFO)
+
+# Discards everything
+null_tracer = Tracer(SILENT)